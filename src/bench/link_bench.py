@@ -0,0 +1,198 @@
+"""
+链路基准（无需硬件）
+
+在链路两端分别运行 SlaveManager 和 CommManager，测量握手和光源稳定性检测的往返延迟、帧率和吞吐量。
+
+- 默认使用一对伪终端，经过真实的 SerialTransport 收发路径（仅支持 Linux/POSIX）
+- --loopback 使用内存中的 LoopbackTransport，可设置带宽、延迟、分片和误码，排除驱动开销
+- --tcp 使用本机回环地址上的 TcpTransport / TcpServerTransport
+
+用法: python -m bench.link_bench [--baudrate 921600] [--points 1000 16384] [--count 20]
+      python -m bench.link_bench --loopback [--bandwidth 1e6] [--latency 0.001] [--max-chunk 64]
+      python -m bench.link_bench --tcp
+      python -m bench.link_bench --negotiate 921600
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from comm.protocol.parser import Command, RawMessage
+from comm.transport.loopback import LinkModel, LoopbackTransport
+from comm.transport.serial import SerialTransport
+from comm.transport.tcp import TcpServerTransport, TcpTransport
+from comm.transport.transport import ITransport
+from comm.transport.virtual import VirtualSerialPair
+from handler.base import MessageHandler
+from handler.manager import CommManager
+from slave import SlaveManager
+
+
+class _ResponseProbe(MessageHandler):
+    """记录响应到达，替换正常的消息处理器以排除处理耗时"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.payload_len = 0
+
+    def handle(self, msg: RawMessage):
+        self.payload_len = len(msg.data)
+        self.event.set()
+
+
+class LinkBench:
+    def __init__(self, master_transport: ITransport, slave_transport: ITransport):
+        self.slave = SlaveManager(transport=slave_transport)
+        # 不发送保活，避免周期帧混入测量结果和录制的数据
+        self.master = CommManager(master_transport, keepalive_interval=None)
+
+    @classmethod
+    def over_serial(cls, pair: VirtualSerialPair, baudrate: int = 115200) -> "LinkBench":
+        master = SerialTransport(pair.port_a)
+        slave = SerialTransport(pair.port_b)
+        master.baudrate = slave.baudrate = baudrate
+        return cls(master, slave)
+
+    @classmethod
+    def over_loopback(cls, model: LinkModel = None) -> "LinkBench":
+        return cls(*LoopbackTransport.pair(model))
+
+    @classmethod
+    def over_tcp(cls, host: str = "127.0.0.1") -> "LinkBench":
+        # 服务端先监听以获得系统分配的端口
+        slave = TcpServerTransport(host)
+        slave.open()
+        return cls(TcpTransport(host, slave.port), slave)
+
+    def __enter__(self) -> "LinkBench":
+        self.slave.connect()
+        self.master.connect()
+        deadline = time.monotonic() + 5
+        while not self.master.is_handshake_complete:
+            if time.monotonic() > deadline:
+                raise TimeoutError("handshake over link timed out")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.master.disconnect()
+        self.slave.disconnect()
+
+    def measure(
+        self,
+        command: Command,
+        response: Command,
+        data: bytes = b"",
+        count: int = 20,
+        timeout: float = 30.0,
+    ) -> dict:
+        """顺序发送 count 次请求，每次等待响应后再发下一次"""
+        probe = _ResponseProbe()
+        # 测量结束后恢复原来的处理器，同一连接可以继续正常使用
+        previous = self.master._message_handlers.get(response)
+        self.master.register_handler(response, probe)
+        rtts = []
+        payload_bytes = 0
+        try:
+            start = time.perf_counter()
+            for _ in range(count):
+                probe.event.clear()
+                sent = time.perf_counter()
+                self.master._send_message(command, data)
+                if not probe.event.wait(timeout):
+                    raise TimeoutError(f"no {response.name} within {timeout}s")
+                rtts.append(time.perf_counter() - sent)
+                payload_bytes += probe.payload_len
+            elapsed = time.perf_counter() - start
+        finally:
+            if previous is None:
+                self.master.unregister_handler(response)
+            else:
+                self.master.register_handler(response, previous)
+
+        return {
+            "command": command.name,
+            "frames": count,
+            "payload_len": probe.payload_len,
+            "frames_per_s": count / elapsed,
+            "bytes_per_s": payload_bytes / elapsed,
+            "rtt_p50": statistics.median(rtts),
+            "rtt_max": max(rtts),
+        }
+
+    def measure_handshake(self, count: int = 20) -> dict:
+        return self.measure(Command.HANDSHAKE_REQ, Command.HANDSHAKE_RES, count=count)
+
+    def measure_light_stability(self, points: int, count: int = 20) -> dict:
+        self.slave.signal_points = points
+        return self.measure(
+            Command.CHECK_LIGHT_STABILITY,
+            Command.CHECK_LIGHT_STABILITY_RES,
+            b"\01",
+            count=count,
+        )
+
+
+def format_result(result: dict) -> str:
+    return (
+        f"{result['command']:<24} payload {result['payload_len']:>8} B  "
+        f"{result['frames_per_s']:>9.1f} frames/s  "
+        f"{result['bytes_per_s'] / 1024:>9.1f} KiB/s  "
+        f"rtt p50 {result['rtt_p50'] * 1e3:>8.2f} ms  max {result['rtt_max'] * 1e3:>8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--points", type=int, nargs="+", default=[1000])
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--loopback", action="store_true", help="use in-memory transport")
+    parser.add_argument("--tcp", action="store_true", help="use tcp over localhost")
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--max-chunk", type=int, default=None)
+    parser.add_argument("--corrupt-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--negotiate", type=int, default=None, help="negotiate baudrate after handshake"
+    )
+    args = parser.parse_args()
+
+    if args.loopback:
+        model = LinkModel(
+            bandwidth=args.bandwidth,
+            latency=args.latency,
+            max_chunk=args.max_chunk,
+            corrupt_rate=args.corrupt_rate,
+            seed=args.seed,
+        )
+        print(f"loopback link {model}")
+        with LinkBench.over_loopback(model) as bench:
+            run(bench, args)
+        return
+
+    if args.tcp:
+        with LinkBench.over_tcp() as bench:
+            print(f"tcp link {bench.master.transport.name}")
+            run(bench, args)
+        return
+
+    with VirtualSerialPair() as pair, LinkBench.over_serial(pair, args.baudrate) as bench:
+        print(f"virtual serial pair {pair.port_a} <-> {pair.port_b}, {args.baudrate} baud")
+        if args.negotiate:
+            run(bench, args)
+            baudrate = bench.master.negotiate_baudrate(args.negotiate).result(10)
+            print(f"negotiated {baudrate} baud")
+        run(bench, args)
+
+
+def run(bench: LinkBench, args: argparse.Namespace):
+    print(format_result(bench.measure_handshake(args.count)))
+    for points in args.points:
+        print(format_result(bench.measure_light_stability(points, args.count)))
+
+
+if __name__ == "__main__":
+    main()
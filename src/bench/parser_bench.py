@@ -0,0 +1,117 @@
+"""
+解析器吞吐量基准
+
+模拟 1 秒的 1 MB/s 链路流量（光源稳定性响应帧按串口块大小分段到达），
+分别测量关闭/开启 CRC 校验时的解析耗时以及 CRC 本身的耗时。
+
+--check 在 CRC 的 CPU 占用超过 1 秒流量的 5% 时以非零状态退出。
+需求中“CRC 耗时低于解析耗时 5%”的目标未达到：零拷贝解析只按帧头定位，
+CRC 是唯一逐字节处理的步骤，即使用 C 查表实现也占解析耗时的大部分，只输出不检查。
+
+用法: python -m bench.parser_bench [--rate 1048576] [--payload 4000] [--chunk 4096] [--check]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from comm.protocol.command import Command
+from comm.protocol.crc import Crc16
+from comm.protocol.parser import MessageParser
+
+# CRC 耗时占 1 秒流量时间预算（CPU 占用）的上限，--check 时检查
+CRC_SHARE_OF_BUDGET_LIMIT = 0.05
+# 需求目标：CRC 耗时占开启校验后解析耗时的比例上限，未达到
+CRC_SHARE_OF_PARSE_TARGET = 0.05
+
+
+def build_stream(rate: int, payload_size: int) -> bytes:
+    frame = MessageParser.pack(
+        Command.CHECK_LIGHT_STABILITY_RES, os.urandom(payload_size)
+    )
+    return frame * max(1, rate // len(frame))
+
+
+def split_chunks(stream: bytes, chunk_size: int) -> list[bytes]:
+    return [stream[i : i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def time_parse(chunks: list[bytes], verify_crc: bool, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    frames = 0
+    for _ in range(repeat):
+        parser = MessageParser(zero_copy=True, verify_crc=verify_crc)
+        frames = 0
+        start = time.perf_counter()
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _ in parser.parse():
+                frames += 1
+        best = min(best, time.perf_counter() - start)
+    return best, frames
+
+
+def time_crc(chunks: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        crc = Crc16()
+        start = time.perf_counter()
+        for chunk in chunks:
+            crc.update(chunk)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rate: int, payload_size: int, chunk_size: int, repeat: int) -> dict:
+    stream = build_stream(rate, payload_size)
+    chunks = split_chunks(stream, chunk_size)
+
+    parse_plain, frames = time_parse(chunks, verify_crc=False, repeat=repeat)
+    parse_crc, _ = time_parse(chunks, verify_crc=True, repeat=repeat)
+    crc_only = time_crc(chunks, repeat)
+
+    return {
+        "bytes": len(stream),
+        "frames": frames,
+        "parse_s": parse_plain,
+        "parse_crc_s": parse_crc,
+        "crc_s": crc_only,
+        # 相对开启校验后的总解析耗时
+        "crc_share_of_parse": crc_only / parse_crc,
+        # 相对 1 秒流量的时间预算（即 CPU 占用）
+        "crc_share_of_budget": crc_only * rate / len(stream),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=1024 * 1024, help="bytes per second")
+    parser.add_argument("--payload", type=int, default=4000, help="payload bytes per frame")
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per received chunk")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--check", action="store_true", help="exit non-zero if crc exceeds 5%% of the cpu budget"
+    )
+    args = parser.parse_args()
+
+    result = run(args.rate, args.payload, args.chunk, args.repeat)
+    print(f"traffic:          {result['bytes']} bytes, {result['frames']} frames")
+    print(f"parse (no crc):   {result['parse_s'] * 1e3:8.3f} ms")
+    print(f"parse (crc):      {result['parse_crc_s'] * 1e3:8.3f} ms")
+    print(f"crc only:         {result['crc_s'] * 1e3:8.3f} ms")
+    share = result["crc_share_of_parse"]
+    status = "met" if share < CRC_SHARE_OF_PARSE_TARGET else "not met"
+    print(f"crc / parse time: {share:8.2%} (target < {CRC_SHARE_OF_PARSE_TARGET:.0%}, {status})")
+    budget = result["crc_share_of_budget"]
+    within = budget < CRC_SHARE_OF_BUDGET_LIMIT
+    print(
+        f"crc / 1 s budget: {budget:8.2%}"
+        f" (limit < {CRC_SHARE_OF_BUDGET_LIMIT:.0%}, {'ok' if within else 'exceeded'})"
+    )
+    if args.check and not within:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
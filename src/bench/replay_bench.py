@@ -0,0 +1,101 @@
+"""
+回放基准
+
+以最快速度把录制文件中的接收数据回放给 CommManager，测量解析、消息分发和数据处理在真实数据上的吞吐量。
+
+- --record 先在内存链路上运行下位机模拟器，录制主机一侧收发的数据
+- --realtime 按录制时的原始时序回放
+
+用法: python -m bench.replay_bench capture.bin [--repeat 3] [--realtime]
+      python -m bench.replay_bench capture.bin --record [--points 16384] [--count 50]
+"""
+
+import argparse
+import time
+
+from bench.link_bench import LinkBench
+from comm.transport.replay import ReplayTransport
+from handler.manager import CommManager
+
+
+def record(path: str, points: int, count: int):
+    with LinkBench.over_loopback() as bench:
+        capture = bench.master.transport.start_capture(path)
+        bench.slave.signal_points = points
+        for _ in range(count):
+            bench.master.check_light_stability()
+        # 等待最后一个响应到达
+        deadline = time.monotonic() + 10
+        expected = count * points * 4
+        while capture.bytes < expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        bench.master.transport.stop_capture()
+    print(f"recorded {capture.records} chunks, {capture.bytes} bytes to {path}")
+
+
+def replay(path: str, speed: float = None) -> dict:
+    transport = ReplayTransport(path, speed)
+    manager = CommManager(transport)
+    start = time.perf_counter()
+    manager.connect()
+    try:
+        transport.wait()
+        # 消息处理器在执行器中运行，等待全部处理完成后再停止计时
+        manager.executor.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        manager.disconnect()
+    stats = transport.stats
+    return {
+        "chunks": stats.chunks,
+        "bytes": stats.bytes,
+        "frames": manager._parser.stats.frames,
+        "bad_frames": manager._parser.stats.bad_frames,
+        # 回放线程送入数据和解析的耗时
+        "feed_elapsed": stats.elapsed,
+        # 包括消息处理器执行完成的总耗时
+        "elapsed": elapsed,
+        # 通道 -> (处理的消息数, 处理耗时)
+        "handlers": {
+            lane: (lane_stats.completed, lane_stats.busy_time)
+            for lane, lane_stats in manager.executor.stats().items()
+            if lane_stats.completed
+        },
+    }
+
+
+def format_result(result: dict) -> str:
+    elapsed = result["elapsed"] or float("inf")
+    lines = [
+        f"{result['bytes']:>10} B in {result['chunks']:>6} chunks  "
+        f"{result['frames']:>6} frames ({result['bad_frames']} bad)  "
+        f"{result['elapsed'] * 1e3:>9.1f} ms (feed {result['feed_elapsed'] * 1e3:.1f} ms)  "
+        f"{result['bytes'] / elapsed / 1024 / 1024:>8.1f} MiB/s  "
+        f"{result['frames'] / elapsed:>9.1f} frames/s"
+    ]
+    for lane, (count, busy) in sorted(result["handlers"].items()):
+        lines.append(
+            f"    {lane:<40} {count:>6} msgs  {busy * 1e3:>9.1f} ms  "
+            f"{busy / count * 1e3:>8.3f} ms/msg"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture")
+    parser.add_argument("--record", action="store_true", help="record a synthetic capture first")
+    parser.add_argument("--points", type=int, default=16384)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--realtime", action="store_true", help="replay at original timing")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.capture, args.points, args.count)
+    for _ in range(args.repeat):
+        print(format_result(replay(args.capture, 1.0 if args.realtime else None)))
+
+
+if __name__ == "__main__":
+    main()
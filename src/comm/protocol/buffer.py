@@ -0,0 +1,84 @@
+class RingBuffer:
+    """
+    预分配的接收缓冲区，使用读写游标管理数据：
+
+    - 写入时追加到写游标之后；尾部空间不足时，仅将未读数据搬移到缓冲区头部（compact）
+    - 读取时只移动读游标，不拷贝数据
+    - view() 返回 memoryview 切片，在下一次 write() 之前有效
+    """
+
+    DEFAULT_CAPACITY = 64 * 1024
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._read = 0
+        self._write = 0
+
+    def __len__(self) -> int:
+        return self._write - self._read
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def read_pos(self) -> int:
+        return self._read
+
+    @property
+    def write_pos(self) -> int:
+        return self._write
+
+    def write(self, data: bytes):
+        """追加数据，仅在尾部空间不足时整理或扩容"""
+        size = len(data)
+        if size == 0:
+            return
+        if self._write + size > len(self._buffer):
+            self._make_room(size)
+        self._view[self._write : self._write + size] = data
+        self._write += size
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        """在未读数据中查找子串，返回相对读游标的偏移，未找到返回 -1"""
+        index = self._buffer.find(sub, self._read + start, self._write)
+        if index == -1:
+            return -1
+        return index - self._read
+
+    def view(self, start: int, end: int) -> memoryview:
+        """返回相对读游标 [start, end) 的只读视图，不拷贝数据"""
+        return self._view[self._read + start : self._read + end].toreadonly()
+
+    def consume(self, size: int):
+        """丢弃已处理的数据"""
+        if size > len(self):
+            raise ValueError(f"cannot consume {size} bytes, only {len(self)} available")
+        self._read += size
+        if self._read == self._write:
+            # 缓冲区已空，游标归零，避免后续写入触发整理
+            self._read = self._write = 0
+
+    def clear(self):
+        self._read = self._write = 0
+
+    def _make_room(self, size: int):
+        pending = self._write - self._read
+        required = pending + size
+        if required <= len(self._buffer):
+            # 尾部空间不足，将未读数据搬移到头部
+            self._view[:pending] = self._view[self._read : self._write]
+        else:
+            # 容量不足，按倍数扩容（旧缓冲区上的 memoryview 仍保持有效）
+            capacity = len(self._buffer)
+            while capacity < required:
+                capacity *= 2
+            buffer = bytearray(capacity)
+            buffer[:pending] = self._view[self._read : self._write]
+            self._buffer = buffer
+            self._view = memoryview(self._buffer)
+        self._read = 0
+        self._write = pending
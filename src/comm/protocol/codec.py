@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+import enum
+import struct
+import zlib
+
+import numpy as np
+
+from .payload import WIRE_FLOAT32, float32_decoder, to_wire
+
+
+class CodecKind(enum.IntEnum):
+    FLOAT32 = 0  # 原始大端 float32，无头部，与旧版下位机兼容
+    INT16 = 1
+    INT24 = 2
+
+
+class CodecFlag(enum.IntFlag):
+    NONE = 0
+    DELTA = 0x01  # 存储相邻采样点的差值（按位宽取模）
+    ZLIB = 0x02  # 量化后的数据整体 zlib 压缩
+
+
+# 量化负载头部：编码类型、标志、采样点数、scale、offset，采样值 = q * scale + offset
+CODEC_HEADER = struct.Struct(">BBIdd")
+
+_BITS = {CodecKind.INT16: 16, CodecKind.INT24: 24}
+
+
+@dataclass(frozen=True)
+class PayloadCodec:
+    """
+    干涉图负载编码
+
+    INT16 / INT24 将采样值线性量化为整数（整数输入且范围足够时无损），可选差分和 zlib 压缩，
+    编解码均为 NumPy 向量化运算。FLOAT32 保持原有的大端 float32 格式。
+    编码参数通过 SET_CODEC 命令协商，to_bytes()/from_bytes() 为协商负载格式。
+    """
+
+    kind: CodecKind = CodecKind.FLOAT32
+    flags: CodecFlag = CodecFlag.NONE
+    level: int = 1
+
+    @property
+    def bits(self) -> int:
+        return _BITS.get(self.kind, 32)
+
+    def to_bytes(self) -> bytes:
+        return bytes((self.kind, self.flags))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PayloadCodec":
+        if len(data) < 2:
+            raise ValueError(f"codec descriptor must be 2 bytes, got {len(data)}")
+        return cls(CodecKind(data[0]), CodecFlag(data[1]))
+
+    def encode(self, values: np.ndarray) -> bytes | memoryview:
+        values = np.asarray(values)
+        if self.kind == CodecKind.FLOAT32:
+            return to_wire(values, WIRE_FLOAT32)
+
+        bits = self.bits
+        q, scale, offset = _quantize(values, bits)
+        if self.flags & CodecFlag.DELTA:
+            q = _wrap(np.diff(q, prepend=0), bits)
+        body = _pack_int(q, bits)
+        if self.flags & CodecFlag.ZLIB:
+            body = zlib.compress(body, self.level)
+        header = CODEC_HEADER.pack(self.kind, self.flags, len(q), scale, offset)
+        return header + body
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """解码为本机字节序 float32 数组；非 FLOAT32 负载按头部中的参数解码"""
+        if self.kind == CodecKind.FLOAT32:
+            return float32_decoder.decode(data)
+        return decode_payload(data)
+
+
+def decode_payload(data: bytes) -> np.ndarray:
+    """解码带头部的量化负载"""
+    if len(data) < CODEC_HEADER.size:
+        raise ValueError(f"payload shorter than codec header: {len(data)} bytes")
+    kind, flags, count, scale, offset = CODEC_HEADER.unpack_from(data)
+    kind, flags = CodecKind(kind), CodecFlag(flags)
+    if kind not in _BITS:
+        raise ValueError(f"payload codec {kind.name} has no header")
+    bits = _BITS[kind]
+
+    body = memoryview(data)[CODEC_HEADER.size :]
+    if flags & CodecFlag.ZLIB:
+        # 解压结果不超过头部声明的长度，防止损坏的帧解压出超大数据
+        expected = count * (bits // 8)
+        decompressor = zlib.decompressobj()
+        body = decompressor.decompress(body, expected)
+        if decompressor.unconsumed_tail or len(body) != expected:
+            raise ValueError(f"compressed samples do not match {count} samples")
+    q = _unpack_int(body, bits, count)
+    if flags & CodecFlag.DELTA:
+        q = _wrap(np.cumsum(q, dtype=np.int64), bits)
+
+    result = q * scale
+    result += offset
+    return result.astype(np.float32)
+
+
+def _quantize(values: np.ndarray, bits: int) -> tuple[np.ndarray, float, float]:
+    qmax = (1 << (bits - 1)) - 1
+    if values.size == 0:
+        return np.empty(0, dtype=np.int64), 1.0, 0.0
+    lo, hi = values.min(), values.max()
+    if values.dtype.kind in "iu" and -qmax - 1 <= lo and hi <= qmax:
+        # ADC 原始整数，直接无损存储
+        return values.astype(np.int64), 1.0, 0.0
+
+    lo, hi = float(lo), float(hi)
+    offset = (hi + lo) / 2
+    scale = (hi - lo) / (2 * qmax) or 1.0
+    q = np.rint((values - offset) / scale)
+    np.clip(q, -qmax, qmax, out=q)
+    return q.astype(np.int64), scale, offset
+
+
+def _wrap(q: np.ndarray, bits: int) -> np.ndarray:
+    """取低 bits 位并按有符号数解释"""
+    half = 1 << (bits - 1)
+    return ((q + half) & ((1 << bits) - 1)) - half
+
+
+def _pack_int(q: np.ndarray, bits: int) -> bytes:
+    if bits == 16:
+        return q.astype(">i2").tobytes()
+    # 24 位：取大端 32 位的低 3 字节
+    wide = (q & 0xFFFFFF).astype(">u4")
+    return wide.view(np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+
+
+def _unpack_int(body: bytes, bits: int, count: int) -> np.ndarray:
+    itemsize = bits // 8
+    if len(body) != count * itemsize:
+        raise ValueError(f"expected {count * itemsize} bytes of samples, got {len(body)}")
+    if bits == 16:
+        return np.frombuffer(body, dtype=">i2", count=count).astype(np.int64)
+    wide = np.zeros((count, 4), dtype=np.uint8)
+    wide[:, 1:] = np.frombuffer(body, dtype=np.uint8).reshape(count, 3)
+    return _wrap(wide.view(">u4").reshape(count).astype(np.int64), 24)
+
+
+float32_codec = PayloadCodec()
@@ -5,6 +5,21 @@ class Command(enum.IntEnum):
     # 握手消息
     HANDSHAKE_REQ = 0x0101
     HANDSHAKE_RES = 0x0201
+    # 波特率协商，负载为 4 字节大端波特率，响应为 0 表示拒绝
+    BAUD_RATE_REQ = 0x0102
+    BAUD_RATE_RES = 0x0202
+    # 切换波特率后的验证帧，下位机原样返回负载
+    BAUD_RATE_PROBE = 0x0103
+    BAUD_RATE_PROBE_RES = 0x0203
+    # 干涉图负载编码协商，负载为编码类型和标志各 1 字节，响应为下位机实际采用的编码
+    SET_CODEC_REQ = 0x0104
+    SET_CODEC_RES = 0x0204
+    # 链路保活，请求负载为主机发送时的 8 字节单调时钟纳秒数，响应原样带回并附加下位机时间戳
+    KEEPALIVE_REQ = 0x0105
+    KEEPALIVE_RES = 0x0205
+    # 大消息分片传输，负载为分片头部加原负载片段；主机通过 NACK 请求重发缺失的分片
+    FRAGMENT = 0x0230
+    FRAGMENT_NACK = 0x0130
 
     # 光源稳定性检测
     CHECK_LIGHT_STABILITY = 0x0110
@@ -20,3 +35,20 @@ class Command(enum.IntEnum):
 
     START_COLLECT = 0x10
     STOP_COLLECT = 0x11
+
+
+# 控制命令优先发送，可以插到排队中的大数据帧之前
+CONTROL_COMMANDS = frozenset(
+    {
+        Command.HANDSHAKE_REQ,
+        Command.HANDSHAKE_RES,
+        Command.BAUD_RATE_REQ,
+        Command.BAUD_RATE_RES,
+        Command.BAUD_RATE_PROBE,
+        Command.BAUD_RATE_PROBE_RES,
+        Command.FRAGMENT_NACK,
+        Command.KEEPALIVE_REQ,
+        Command.KEEPALIVE_RES,
+        Command.CHECK_STOP,
+    }
+)
@@ -1,11 +1,33 @@
-def calc_crc16(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b << 8
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return crc
+import binascii
+
+CRC16_INIT = 0xFFFF
+
+
+def calc_crc16(data: bytes, crc: int = CRC16_INIT) -> int:
+    """
+    CRC-16/CCITT-FALSE（多项式 0x1021，初值 0xFFFF，不反转）
+
+    binascii.crc_hqx 是 C 实现的 256 项查表算法，与逐位计算结果一致；
+    传入上一次的结果作为 crc 即可分段续算。
+    """
+    return binascii.crc_hqx(data, crc)
+
+
+class Crc16:
+    """可续算的 CRC16 运行状态，用于数据边到达边校验"""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value: int = CRC16_INIT):
+        self._value = value
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def update(self, data: bytes) -> "Crc16":
+        self._value = binascii.crc_hqx(data, self._value)
+        return self
+
+    def reset(self, value: int = CRC16_INIT):
+        self._value = value
@@ -0,0 +1,229 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import itertools
+import logging
+import struct
+
+import numpy as np
+
+from .command import Command
+from .message import RawMessage
+
+logger = logging.getLogger(__name__)
+
+# 分片负载头部：传输编号、原消息码、分片序号、分片总数、原负载总长度、本分片在原负载中的偏移
+FRAGMENT_HEADER = struct.Struct(">HHHHII")
+# 缺失分片请求：传输编号 + 缺失的分片序号列表
+NACK_HEADER = struct.Struct(">H")
+MAX_NACK_INDICES = 512
+
+DEFAULT_FRAGMENT_SIZE = 4096
+
+
+@dataclass
+class FragmentHeader:
+    transfer_id: int
+    command: int
+    index: int
+    count: int
+    total_len: int
+    offset: int
+
+    @classmethod
+    def unpack(cls, payload: bytes) -> "FragmentHeader":
+        if len(payload) < FRAGMENT_HEADER.size:
+            raise ValueError(f"fragment shorter than header: {len(payload)} bytes")
+        return cls(*FRAGMENT_HEADER.unpack_from(payload))
+
+
+def pack_nack(transfer_id: int, missing: list[int]) -> bytes:
+    missing = missing[:MAX_NACK_INDICES]
+    return NACK_HEADER.pack(transfer_id) + np.asarray(missing, dtype=">u2").tobytes()
+
+
+def unpack_nack(payload: bytes) -> tuple[int, list[int]]:
+    if len(payload) < NACK_HEADER.size or len(payload) % 2:
+        raise ValueError(f"invalid nack payload length {len(payload)}")
+    (transfer_id,) = NACK_HEADER.unpack_from(payload)
+    missing = np.frombuffer(payload, dtype=">u2", offset=NACK_HEADER.size)
+    return transfer_id, missing.tolist()
+
+
+class Fragmenter:
+    """
+    发送侧：将大负载拆分为 FRAGMENT 帧的负载
+
+    每个分片是一个独立的帧，由帧 CRC 校验，损坏只影响该分片。最近 retain 个传输的数据被保留，
+    用于按 FRAGMENT_NACK 重发缺失的分片。
+    """
+
+    def __init__(self, fragment_size: int = DEFAULT_FRAGMENT_SIZE, retain: int = 4):
+        self.fragment_size = fragment_size
+        self._retain = retain
+        self._transfer_ids = itertools.count()
+        self._transfers: OrderedDict[int, tuple[Command, bytes, int]] = OrderedDict()
+
+    def split(self, command: Command, data: bytes, seq: int = None) -> list[bytes]:
+        """返回全部分片的负载，seq 为原消息的请求序号，重发时沿用"""
+        transfer_id = next(self._transfer_ids) & 0xFFFF
+        self._transfers[transfer_id] = (command, data, seq)
+        while len(self._transfers) > self._retain:
+            self._transfers.popitem(last=False)
+        count = self.count(len(data))
+        return [self._fragment(transfer_id, index) for index in range(count)]
+
+    def count(self, total_len: int) -> int:
+        return max(1, -(-total_len // self.fragment_size))
+
+    def transfer_seq(self, transfer_id: int) -> int | None:
+        transfer = self._transfers.get(transfer_id)
+        return transfer[2] if transfer else None
+
+    def resend(self, transfer_id: int, indices: list[int]) -> list[bytes]:
+        """返回请求重发的分片负载，传输已不在保留范围内时返回空列表"""
+        if transfer_id not in self._transfers:
+            logger.warning(f"transfer {transfer_id} is no longer retained, cannot resend")
+            return []
+        count = self.count(len(self._transfers[transfer_id][1]))
+        return [self._fragment(transfer_id, i) for i in indices if 0 <= i < count]
+
+    def _fragment(self, transfer_id: int, index: int) -> bytes:
+        command, data, _ = self._transfers[transfer_id]
+        offset = index * self.fragment_size
+        chunk = data[offset : offset + self.fragment_size]
+        header = FRAGMENT_HEADER.pack(
+            transfer_id, command, index, self.count(len(data)), len(data), offset
+        )
+        return header + bytes(chunk)
+
+
+@dataclass
+class ReassemblyStats:
+    fragments: int = 0
+    duplicates: int = 0
+    completed: int = 0
+    dropped: int = 0
+    invalid: int = 0
+    nacks: int = 0
+
+
+class _Transfer:
+    __slots__ = ("command", "seq", "buffer", "received", "remaining", "nacks")
+
+    def __init__(self, command: Command, count: int, total_len: int, seq: int = None):
+        self.command = command
+        self.seq = seq
+        self.buffer = np.empty(total_len, dtype=np.uint8)
+        self.received = np.zeros(count, dtype=bool)
+        self.remaining = count
+        self.nacks = 0
+
+
+class Reassembler:
+    """
+    接收侧：把分片直接拷贝进预分配的数组，全部到达后还原为原消息
+
+    分片负载只在解析器下一次 feed 之前有效，add() 会立即拷贝。同时进行的传输数和单个传输的
+    总长度都有上限，超出时丢弃最早的传输，内存占用有界。
+    """
+
+    def __init__(self, max_transfers: int = 4, max_message_len: int = 64 * 1024 * 1024):
+        self.max_transfers = max_transfers
+        self.max_message_len = max_message_len
+        self.stats = ReassemblyStats()
+        self._transfers: OrderedDict[int, _Transfer] = OrderedDict()
+        # 最近完成的传输，迟到的重发分片不再新建传输
+        self._completed: deque[int] = deque(maxlen=16)
+
+    def add(
+        self, payload: bytes, seq: int = None
+    ) -> tuple[FragmentHeader, RawMessage | None]:
+        """加入一个分片，返回分片头部和（传输完成时）还原的消息，seq 为分片帧携带的请求序号"""
+        header = FragmentHeader.unpack(payload)
+        chunk = memoryview(payload)[FRAGMENT_HEADER.size :]
+        if header.transfer_id in self._completed and header.transfer_id not in self._transfers:
+            self.stats.fragments += 1
+            self.stats.duplicates += 1
+            return header, None
+        transfer = self._transfer(header, seq)
+        if transfer is None:
+            self.stats.invalid += 1
+            return header, None
+        if not 0 <= header.index < len(transfer.received) or (
+            header.offset + len(chunk) > len(transfer.buffer)
+        ):
+            self.stats.invalid += 1
+            logger.warning(f"fragment {header.index} of transfer {header.transfer_id} out of range")
+            return header, None
+
+        self.stats.fragments += 1
+        if transfer.received[header.index]:
+            self.stats.duplicates += 1
+            return header, None
+        transfer.buffer[header.offset : header.offset + len(chunk)] = chunk
+        transfer.received[header.index] = True
+        transfer.remaining -= 1
+        if transfer.remaining:
+            return header, None
+
+        del self._transfers[header.transfer_id]
+        self._completed.append(header.transfer_id)
+        self.stats.completed += 1
+        return header, RawMessage(transfer.command, memoryview(transfer.buffer), transfer.seq)
+
+    def missing(self, transfer_id: int) -> list[int]:
+        transfer = self._transfers.get(transfer_id)
+        if transfer is None:
+            return []
+        return np.flatnonzero(~transfer.received).tolist()
+
+    def note_nack(self, transfer_id: int) -> int:
+        """记录一次缺失分片请求，返回该传输已请求的次数"""
+        transfer = self._transfers.get(transfer_id)
+        if transfer is None:
+            return 0
+        transfer.nacks += 1
+        self.stats.nacks += 1
+        return transfer.nacks
+
+    def drop(self, transfer_id: int):
+        if self._transfers.pop(transfer_id, None) is not None:
+            self.stats.dropped += 1
+
+    def clear(self):
+        self.stats.dropped += len(self._transfers)
+        self._transfers.clear()
+        self._completed.clear()
+
+    @property
+    def pending(self) -> list[int]:
+        return list(self._transfers)
+
+    def _transfer(self, header: FragmentHeader, seq: int = None) -> _Transfer | None:
+        transfer = self._transfers.get(header.transfer_id)
+        if transfer is not None:
+            if len(transfer.received) != header.count or len(transfer.buffer) != header.total_len:
+                # 编号回绕后被新的传输复用，丢弃旧的
+                self.drop(header.transfer_id)
+                transfer = None
+        if transfer is not None:
+            return transfer
+
+        try:
+            command = Command(header.command)
+        except ValueError:
+            logger.warning(f"fragment of unknown command 0x{header.command:04X}")
+            return None
+        if header.total_len > self.max_message_len or header.count == 0:
+            logger.warning(
+                f"transfer {header.transfer_id} of {header.total_len} bytes exceeds limit"
+            )
+            return None
+        while len(self._transfers) >= self.max_transfers:
+            oldest = next(iter(self._transfers))
+            logger.warning(f"too many transfers in progress, drop transfer {oldest}")
+            self.drop(oldest)
+        transfer = self._transfers[header.transfer_id] = _Transfer(
+            command, header.count, header.total_len, seq
+        )
+        return transfer
@@ -5,13 +5,18 @@ from .command import Command
 @dataclass
 class RawMessage:
     command: Command
-    data: bytes
+    data: bytes | memoryview
+    # 请求/响应关联序号，帧中未携带时为 None
+    seq: int = None
 
 
 class Message:
     """
     消息结构：
     起始标志（2字节）|消息类型（1字节）|消息码（1字节）|负载长度（4字节）|数据负载（N字节）|校验和（2字节）|结束标志（2字节）
+
+    负载长度最高位为 1 时，负载长度之后紧跟 2 字节序号（不计入负载长度，计入 CRC），
+    用于请求与响应的关联；不使用序号的设备不受影响。
     """
 
     START_FLAG = b"\xa5\x5a"
@@ -20,8 +25,14 @@ class Message:
     END_FLAG = b"\xfe\xef"
     END_FLAG_LEN = len(END_FLAG)
 
+    CHECKSUM_LEN = 2
+
+    SEQ_FLAG = 0x80000000
+    DATA_LEN_MASK = 0x7FFFFFFF
+    SEQ_LEN = 2
+
     HEADER_LEN = START_FLAG_LEN + 2 + 4
-    FOOTER_LEN = 2 + END_FLAG_LEN
+    FOOTER_LEN = CHECKSUM_LEN + END_FLAG_LEN
 
     MIN_MESSAGE_LEN = HEADER_LEN + FOOTER_LEN
 
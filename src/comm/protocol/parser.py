@@ -1,63 +1,380 @@
+from dataclasses import dataclass
 from typing import Generator
+import enum
+import logging
 import struct
+import time
+import numpy as np
+from .buffer import RingBuffer
 from .command import Command
+from .crc import Crc16
 from .message import RawMessage, Message
+from .payload import to_wire
+
+logger = logging.getLogger(__name__)
+
+# 负载长度上限，防止长度字段出错导致解析器一直等待
+DEFAULT_MAX_DATA_LEN = 1024 * 1024
+MAX_DATA_LEN: dict[Command, int] = {
+    Command.HANDSHAKE_REQ: 64,
+    Command.HANDSHAKE_RES: 64,
+    Command.BAUD_RATE_REQ: 64,
+    Command.BAUD_RATE_RES: 64,
+    Command.BAUD_RATE_PROBE: 1024,
+    Command.BAUD_RATE_PROBE_RES: 1024,
+    Command.SET_CODEC_REQ: 64,
+    Command.SET_CODEC_RES: 64,
+    Command.KEEPALIVE_REQ: 64,
+    Command.KEEPALIVE_RES: 64,
+    Command.FRAGMENT_NACK: 2048,
+    Command.CHECK_LIGHT_STABILITY: 64,
+    Command.CHECK_STANDARD_WAVE_ACCURACY: 64,
+    Command.CHECK_STANDARD_WAVE_REPEATABILITY: 64,
+    Command.CHECK_STOP: 64,
+}
+
+
+# 预编译的帧头、序号和校验和格式
+HEADER_STRUCT = struct.Struct(">HI")
+SEQ_HEADER_STRUCT = struct.Struct(">HIH")
+U16_STRUCT = struct.Struct(">H")
+
+# 消息码到 Command 的查找表，未知消息码不经过 IntEnum 构造和异常
+COMMANDS: dict[int, Command] = {command.value: command for command in Command}
+
+
+class ParserState(enum.Enum):
+    HUNT = enum.auto()  # 查找起始标志
+    HEADER = enum.auto()  # 读取消息码和负载长度
+    BODY = enum.auto()  # 接收数据负载和帧尾
+
+
+@dataclass
+class ParserStats:
+    frames: int = 0
+    crc_errors: int = 0
+    end_flag_errors: int = 0
+    # 失步相关
+    skipped_bytes: int = 0
+    false_starts: int = 0
+    oversize_frames: int = 0
+    unknown_commands: int = 0
+    # 最近一次失步到重新同步之间丢弃的字节数和耗时
+    last_recovery_bytes: int = 0
+    last_recovery_time: float = 0.0
+    max_recovery_bytes: int = 0
+
+    @property
+    def bad_frames(self) -> int:
+        return self.crc_errors + self.end_flag_errors
 
 
 class MessageParser:
-    def __init__(self):
-        self._buffer = bytearray()
+    """
+    消息解析器
+
+    接收数据保存在预分配的 RingBuffer 中，解析时只移动读游标，解析成本与接收字节数成线性关系。
+
+    zero_copy=True 时，RawMessage.data 为指向内部缓冲区的只读 memoryview，
+    仅在下一次 feed() 之前有效，需要保留数据的调用方应自行拷贝（bytes(msg.data)）。
+
+    verify_crc=True 时，CRC 随数据到达增量计算（覆盖消息码、负载长度和数据负载），
+    帧尾到达后只需比较校验和与结束标志，校验失败的帧计入 stats 并丢弃。
+
+    解析过程为显式状态机 HUNT -> HEADER -> BODY。任何候选帧被判定无效（未知命令、
+    长度超限、CRC 或结束标志错误）时，从该候选起始位置后一个字节继续查找，
+    已扫描过的数据不会重复扫描，失步后的恢复代价不超过一个最大帧长。
+    """
+
+    def __init__(
+        self,
+        zero_copy: bool = False,
+        capacity: int = RingBuffer.DEFAULT_CAPACITY,
+        verify_crc: bool = True,
+        max_data_len: dict[Command, int] = None,
+        default_max_data_len: int = DEFAULT_MAX_DATA_LEN,
+    ):
+        self._buffer = RingBuffer(capacity)
+        self._zero_copy = zero_copy
+        self._verify_crc = verify_crc
+        self._max_data_len = dict(MAX_DATA_LEN)
+        if max_data_len:
+            self._max_data_len.update(max_data_len)
+        self._default_max_data_len = default_max_data_len
+        # 消息码 -> (Command, 负载长度上限)，帧头校验只需一次字典查找
+        self._limits: dict[int, tuple[Command, int]] = {}
+        self._build_limits()
+        self.stats = ParserStats()
+
+        self._state = ParserState.HUNT
+        # 当前正在接收的帧
+        self._frame_command: Command = None
+        self._frame_len = 0
+        # 负载起始偏移，带序号的帧比 HEADER_LEN 多 SEQ_LEN
+        self._frame_data_start = Message.HEADER_LEN
+        self._crc = Crc16()
+        self._crc_pos = 0
+        # 失步起点，None 表示处于同步状态
+        self._lost_sync_at: float = None
+        self._recovery_bytes = 0
 
     def feed(self, data: bytes):
-        self._buffer.extend(data)
+        self._buffer.write(data)
+
+    def reset(self):
+        """丢弃缓冲区中尚未解析的数据"""
+        self._buffer.clear()
+        self._state = ParserState.HUNT
+        self._frame_command = None
+
+    @property
+    def state(self) -> ParserState:
+        return self._state
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def set_max_data_len(self, command: Command, max_len: int):
+        self._max_data_len[command] = max_len
+        self._build_limits()
+
+    def _build_limits(self):
+        default = self._default_max_data_len
+        self._limits = {
+            value: (command, self._max_data_len.get(command, default))
+            for value, command in COMMANDS.items()
+        }
 
     def parse(self) -> Generator[RawMessage, None, None]:
         """
         从缓冲区中解析出一个完整的消息
         """
         while True:
-            start_index = self._buffer.find(Message.START_FLAG)
-            if start_index == -1:
+            if self._state is ParserState.HUNT and not self._hunt():
                 break
-            if start_index > 0:
-                # 丢弃消息头之前的无效数据
-                self._buffer = self._buffer[start_index:]
-
-            if len(self._buffer) < Message.MIN_MESSAGE_LEN:
-                # 数据不足，等待更多数据
+            if self._state is ParserState.HEADER and not self._read_header():
                 break
+            if self._state is ParserState.BODY:
+                message = self._read_body()
+                if message is None:
+                    if self._state is ParserState.BODY:
+                        # 数据不足，等待更多数据
+                        break
+                    continue
+                yield message
 
-            command_val, data_len = struct.unpack(
-                ">HI", self._buffer[Message.START_FLAG_LEN : Message.HEADER_LEN]
-            )
+    def _hunt(self) -> bool:
+        buffer = self._buffer
+        start_index = buffer.find(Message.START_FLAG)
+        if start_index == -1:
+            # 保留最后一个字节，它可能是被截断的起始标志
+            self._skip(max(0, len(buffer) - (Message.START_FLAG_LEN - 1)))
+            return False
+        if start_index > 0:
+            # 丢弃消息头之前的无效数据
+            self._skip(start_index)
+        self._state = ParserState.HEADER
+        return True
 
-            message_len = Message.MIN_MESSAGE_LEN + data_len
-            if len(self._buffer) < message_len:
-                # 数据不足，等待更多数据
-                break
+    def _read_header(self) -> bool:
+        buffer = self._buffer
+        if len(buffer) < Message.HEADER_LEN:
+            # 数据不足，等待更多数据
+            return False
+
+        command_val, length_field = HEADER_STRUCT.unpack(
+            buffer.view(Message.START_FLAG_LEN, Message.HEADER_LEN)
+        )
+        data_len = length_field & Message.DATA_LEN_MASK
+        limit = self._limits.get(command_val)
+        if limit is None:
+            self.stats.unknown_commands += 1
+            self._false_start("unknown command 0x%04x", command_val)
+            return True
+
+        command, max_len = limit
+        if data_len > max_len:
+            self.stats.oversize_frames += 1
+            self._false_start("%s length %d exceeds %d", command.name, data_len, max_len)
+            return True
 
-            message_bytes = self._buffer[:message_len]
+        seq_len = Message.SEQ_LEN if length_field & Message.SEQ_FLAG else 0
+        self._frame_command = command
+        self._frame_data_start = Message.HEADER_LEN + seq_len
+        self._frame_len = Message.MIN_MESSAGE_LEN + seq_len + data_len
+        self._crc.reset()
+        self._crc_pos = Message.START_FLAG_LEN
+        self._state = ParserState.BODY
+        return True
 
-            # TODO: CRC
-            try:
-                command = Command(command_val)
-            except ValueError:
-                # 未知命令类型
-                self._buffer = self._buffer[Message.START_FLAG_LEN]
-                continue
+    def _read_body(self) -> RawMessage:
+        buffer = self._buffer
+        message_len = self._frame_len
+        crc_end = min(len(buffer), message_len - Message.FOOTER_LEN)
+        if self._verify_crc and crc_end > self._crc_pos:
+            # 对新到达的数据增量计算 CRC
+            self._crc.update(buffer.view(self._crc_pos, crc_end))
+            self._crc_pos = crc_end
 
-            data_bytes = message_bytes[Message.HEADER_LEN : -Message.FOOTER_LEN]
-            yield RawMessage(command, data_bytes)
+        if len(buffer) < message_len:
+            return None
 
-            self._buffer = self._buffer[message_len:]
+        command = self._frame_command
+        self._frame_command = None
+        if not self._check_footer(command, message_len):
+            self._false_start()
+            return None
+
+        data_start = self._frame_data_start
+        seq = None
+        if data_start != Message.HEADER_LEN:
+            (seq,) = U16_STRUCT.unpack(buffer.view(Message.HEADER_LEN, data_start))
+        data_bytes = buffer.view(data_start, message_len - Message.FOOTER_LEN)
+        if not self._zero_copy:
+            data_bytes = data_bytes.tobytes()
+        # 先移动读游标再交付消息，视图在下一次 feed() 之前仍然有效
+        buffer.consume(message_len)
+        self._state = ParserState.HUNT
+        self._synced()
+        self.stats.frames += 1
+        return RawMessage(command, data_bytes, seq)
+
+    def _check_footer(self, command: Command, message_len: int) -> bool:
+        footer = self._buffer.view(message_len - Message.FOOTER_LEN, message_len)
+        if footer[Message.CHECKSUM_LEN :] != Message.END_FLAG:
+            self.stats.end_flag_errors += 1
+            logger.warning("bad frame %s: end flag mismatch", command.name)
+            return False
+        if self._verify_crc:
+            (crc,) = U16_STRUCT.unpack(footer[: Message.CHECKSUM_LEN])
+            if crc != self._crc.value:
+                self.stats.crc_errors += 1
+                logger.warning(
+                    "bad frame %s: crc mismatch, expected 0x%04x, got 0x%04x",
+                    command.name,
+                    self._crc.value,
+                    crc,
+                )
+                return False
+        return True
+
+    def _false_start(self, reason: str = None, *args):
+        """候选帧无效，从起始标志后一个字节继续查找"""
+        if reason:
+            logger.debug("false start: " + reason, *args)
+        self.stats.false_starts += 1
+        self._state = ParserState.HUNT
+        self._skip(1)
+
+    def _skip(self, size: int):
+        if size == 0:
+            return
+        self._buffer.consume(size)
+        self.stats.skipped_bytes += size
+        if self._lost_sync_at is None:
+            self._lost_sync_at = time.monotonic()
+            self._recovery_bytes = 0
+        self._recovery_bytes += size
+
+    def _synced(self):
+        if self._lost_sync_at is None:
+            return
+        stats = self.stats
+        stats.last_recovery_bytes = self._recovery_bytes
+        stats.last_recovery_time = time.monotonic() - self._lost_sync_at
+        stats.max_recovery_bytes = max(stats.max_recovery_bytes, self._recovery_bytes)
+        self._lost_sync_at = None
+
+    @staticmethod
+    def frame_size(data_len: int, seq: int = None) -> int:
+        return Message.MIN_MESSAGE_LEN + data_len + (0 if seq is None else Message.SEQ_LEN)
+
+    @staticmethod
+    def pack_into(
+        buffer: bytearray,
+        offset: int,
+        command: Command,
+        data: bytes = b"",
+        seq: int = None,
+    ) -> int:
+        """
+        将消息直接写入调用方提供的缓冲区，返回写入的字节数
+
+        data 可以是任意支持缓冲区协议的对象，NumPy 数组会先转换为大端字节序。
+        seq 不为空时在帧头后写入 2 字节序号。
+        """
+        payload = _as_payload(data)
+        data_len = len(payload)
+        message_len = MessageParser.frame_size(data_len, seq)
+        view = memoryview(buffer)[offset : offset + message_len]
+        if len(view) < message_len:
+            raise ValueError(f"buffer too small: need {message_len} bytes at {offset}")
+
+        view[: Message.START_FLAG_LEN] = Message.START_FLAG
+        data_start = Message.HEADER_LEN
+        if seq is None:
+            HEADER_STRUCT.pack_into(view, Message.START_FLAG_LEN, command.value, data_len)
+        else:
+            SEQ_HEADER_STRUCT.pack_into(
+                view,
+                Message.START_FLAG_LEN,
+                command.value,
+                data_len | Message.SEQ_FLAG,
+                seq & 0xFFFF,
+            )
+            data_start += Message.SEQ_LEN
+        view[data_start : data_start + data_len] = payload
+        crc_end = data_start + data_len
+        crc = Crc16().update(view[Message.START_FLAG_LEN : crc_end]).value
+        U16_STRUCT.pack_into(view, crc_end, crc)
+        view[crc_end + Message.CHECKSUM_LEN :] = Message.END_FLAG
+        return message_len
 
     @staticmethod
-    def pack(command: Command, data: bytes = b"") -> bytes:
+    def pack_vectored(command: Command, data: bytes = b"", seq: int = None) -> list[bytes]:
+        """
+        打包为 [帧头, 负载, 帧尾] 三段缓冲区，负载不拷贝，供分散写（writev / sendmsg）使用
+        """
+        payload = _as_payload(data)
+        if seq is None:
+            header = Message.START_FLAG + HEADER_STRUCT.pack(command.value, len(payload))
+        else:
+            header = Message.START_FLAG + SEQ_HEADER_STRUCT.pack(
+                command.value, len(payload) | Message.SEQ_FLAG, seq & 0xFFFF
+            )
+        crc = Crc16().update(header[Message.START_FLAG_LEN :]).update(payload).value
+        footer = U16_STRUCT.pack(crc) + Message.END_FLAG
+        return [header, payload, footer]
+
+    @staticmethod
+    def pack(command: Command, data: bytes = b"", seq: int = None) -> bytes:
         """
         打包消息为字节流
         """
-        data_len = len(data)
-        crc = 0
-        header = Message.START_FLAG + struct.pack(">HI", command.value, data_len)
-        footer = struct.pack(">H", crc) + Message.END_FLAG
-        return header + data + footer
+        return b"".join(MessageParser.pack_vectored(command, data, seq))
+
+
+class FramePacker:
+    """
+    复用同一块缓冲区打包消息，避免大负载每次打包都重新分配内存
+
+    pack() 返回的 memoryview 在下一次 pack() 之前有效，适用于同步写出的场景。
+    """
+
+    def __init__(self, capacity: int = RingBuffer.DEFAULT_CAPACITY):
+        self._buffer = bytearray(capacity)
+
+    def pack(self, command: Command, data: bytes = b"", seq: int = None) -> memoryview:
+        payload = _as_payload(data)
+        message_len = MessageParser.frame_size(len(payload), seq)
+        if message_len > len(self._buffer):
+            self._buffer = bytearray(max(message_len, 2 * len(self._buffer)))
+        MessageParser.pack_into(self._buffer, 0, command, payload, seq)
+        return memoryview(self._buffer)[:message_len]
+
+
+def _as_payload(data) -> memoryview:
+    if isinstance(data, np.ndarray):
+        return to_wire(data)
+    return memoryview(data).cast("B")
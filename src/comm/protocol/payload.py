@@ -0,0 +1,61 @@
+import numpy as np
+
+# 协议中的采样点均为大端 float32
+WIRE_FLOAT32 = np.dtype(">f4")
+
+
+class PayloadDecoder:
+    """
+    将负载字节直接解码为 NumPy 数组，不经过 Python float 对象
+
+    - decode(data): 返回新的本机字节序数组（一次拷贝并完成字节交换）
+    - decode(data, out=buf): 写入调用方提供的可复用数组，返回其前 N 项视图
+    - view(data): 返回直接引用负载的大端只读数组，不拷贝，生命周期与 data 相同
+    """
+
+    def __init__(self, dtype: np.dtype = WIRE_FLOAT32):
+        self.wire_dtype = np.dtype(dtype)
+        self.native_dtype = self.wire_dtype.newbyteorder("=")
+
+    def count(self, data: bytes) -> int:
+        itemsize = self.wire_dtype.itemsize
+        if len(data) % itemsize != 0:
+            raise ValueError(
+                f"data length must be a multiple of {itemsize}, got {len(data)} bytes"
+            )
+        return len(data) // itemsize
+
+    def view(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype=self.wire_dtype, count=self.count(data))
+
+    def decode(self, data: bytes, out: np.ndarray = None) -> np.ndarray:
+        wire = self.view(data)
+        if out is None:
+            return wire.astype(self.native_dtype)
+        if out.dtype != self.native_dtype or len(out) < len(wire):
+            raise ValueError(
+                f"out must be {self.native_dtype} with at least {len(wire)} items"
+            )
+        result = out[: len(wire)]
+        np.copyto(result, wire)
+        return result
+
+    def buffer(self, count: int) -> np.ndarray:
+        """分配可复用的输出数组"""
+        return np.empty(count, dtype=self.native_dtype)
+
+
+float32_decoder = PayloadDecoder()
+
+
+def to_wire(values: np.ndarray, dtype: np.dtype = None) -> memoryview:
+    """
+    将数组转换为协议字节序（大端）的字节视图，用于打包负载
+
+    dtype 为空时保持原数据类型仅调整字节序；已是连续大端数组时不拷贝，
+    否则类型转换与字节交换在一次拷贝中完成。
+    """
+    wire_dtype = np.dtype(dtype) if dtype is not None else values.dtype
+    wire_dtype = wire_dtype.newbyteorder(">")
+    wire = np.ascontiguousarray(values, dtype=wire_dtype)
+    return memoryview(wire).cast("B")
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+from collections import deque
+
+import serial
+import serial.tools.list_ports
+
+from .transport import ITransport, SendPriority
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSerialTransport(ITransport):
+    """
+    基于 asyncio 事件循环的串口传输
+
+    不创建线程：通过 loop.add_reader 监听串口文件描述符可读事件，发送时直接非阻塞写入，
+    写不完的部分通过 loop.add_writer 在可写时继续，因此一个事件循环可以同时驱动多个串口。
+
+    所有方法都必须在事件循环线程中调用；send_data 返回 asyncio.Future。
+    依赖可被 select 的文件描述符，仅支持 POSIX 平台。
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        port: str = "",
+        baudrate: int = 115200,
+        loop: asyncio.AbstractEventLoop = None,
+    ):
+        super().__init__()
+        self.port = port
+        self.baudrate = baudrate
+        self._loop = loop
+        self._serial: serial.Serial = None
+        # 待发送的帧：[剩余数据, future, 优先级, 帧长]，队首可能已部分写出
+        self._send_queue: deque[list] = deque()
+        self._writing = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    def set_port(self, port: str):
+        if self.is_open:
+            logger.warning(f"serial port {self.port} is already opened, cannot change port")
+            return
+        self.port = port
+
+    def open(self):
+        if self.is_open:
+            logger.warning(f"serial port {self.port} already opened")
+            return
+        try:
+            # timeout=0 为非阻塞读取
+            self._serial = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=0)
+            self.loop.add_reader(self._serial.fileno(), self._on_readable)
+            logger.info(f"opened serial port {self.port} successfully")
+        except serial.SerialException as e:
+            logger.error(f"failed to open serial port {self.port}: {e}")
+            self._serial = None
+            raise
+
+    def close(self):
+        if self._serial is None:
+            logger.warning(f"serial port {self.port} is already closed")
+            return
+        fd = self._serial.fileno()
+        self.loop.remove_reader(fd)
+        if self._writing:
+            self.loop.remove_writer(fd)
+            self._writing = False
+        try:
+            self._serial.close()
+        except serial.SerialException as e:
+            logger.error(f"failed to close serial port {self.port}: {e}")
+        finally:
+            self._serial = None
+        # 未写完的帧全部失败
+        while self._send_queue:
+            future = self._send_queue.popleft()[1]
+            if not future.done():
+                future.set_exception(ConnectionError(f"serial port {self.port} closed"))
+        logger.info(f"closed serial port {self.port} success")
+
+    @property
+    def is_open(self) -> bool:
+        return self._serial is not None and self._serial.is_open
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> asyncio.Future:
+        future = self.loop.create_future()
+        if not self.is_open:
+            future.set_exception(serial.PortNotOpenError())
+            return future
+        view = memoryview(data).cast("B")
+        self._capture_sent(view)
+        entry = [view, future, priority, len(view)]
+        if priority is SendPriority.CONTROL:
+            # 插到所有未开始写出的非控制帧之前，正在写出的帧不能被打断
+            index = 1 if self._writing else 0
+            while (
+                index < len(self._send_queue)
+                and self._send_queue[index][2] is SendPriority.CONTROL
+            ):
+                index += 1
+            self._send_queue.insert(index, entry)
+        else:
+            self._send_queue.append(entry)
+        if not self._writing:
+            self._on_writable()
+        return future
+
+    def receive_data(self) -> bytes:
+        if not self.is_open:
+            return b""
+        return self._serial.read(self.BLOCK_SIZE)
+
+    def list_ports(self) -> list[str]:
+        return [port.device for port in serial.tools.list_ports.comports()]
+
+    def _on_readable(self):
+        try:
+            data = self._serial.read(self.BLOCK_SIZE)
+        except serial.SerialException as e:
+            logger.error(f"failed to read data from serial port {self.port}: {e}")
+            self.close()
+            return
+        if data:
+            self._emit_data(data)
+
+    def _on_writable(self):
+        fd = self._serial.fileno()
+        while self._send_queue:
+            entry = self._send_queue[0]
+            view, future = entry[0], entry[1]
+            try:
+                n = os.write(fd, view)
+            except BlockingIOError:
+                n = 0
+            except OSError as e:
+                self._send_queue.popleft()
+                future.set_exception(e)
+                continue
+            if n < len(view):
+                # 剩余部分等待可写事件
+                entry[0] = view[n:]
+                if not self._writing:
+                    self._writing = True
+                    self.loop.add_writer(fd, self._on_writable)
+                return
+            self._send_queue.popleft()
+            if not future.done():
+                future.set_result(entry[3])
+        if self._writing:
+            self._writing = False
+            self.loop.remove_writer(fd)
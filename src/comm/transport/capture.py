@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import BinaryIO, Iterator
+import enum
+import logging
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+# 文件头：魔数、版本、开始录制时的墙上时间（秒）
+CAPTURE_MAGIC = b"FTCAP"
+CAPTURE_VERSION = 1
+CAPTURE_HEADER = struct.Struct(">5sBd")
+# 记录头：方向、距开始录制的单调时钟纳秒数、数据长度
+RECORD_HEADER = struct.Struct(">BQI")
+
+
+class Direction(enum.IntEnum):
+    RX = 0  # 接收到的数据块
+    TX = 1  # 发送的数据
+    GAP = 2  # 接收数据丢失（通道溢出、重连等），无数据
+
+
+@dataclass
+class CaptureRecord:
+    direction: Direction
+    timestamp: float  # 距开始录制的秒数
+    data: bytes
+
+
+class CaptureWriter:
+    """
+    线路数据录制文件
+
+    按到达顺序追加每个收发数据块及其单调时钟时间戳，记录头 13 字节，数据原样保存。
+    可在多个线程中调用 record()。
+    """
+
+    def __init__(self, path: str, buffer_size: int = 256 * 1024):
+        self.path = path
+        self._file: BinaryIO = open(path, "wb", buffering=buffer_size)
+        self._lock = Lock()
+        self._start_ns = time.monotonic_ns()
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, time.time()))
+        self.records = 0
+        self.bytes = 0
+
+    def record(self, direction: Direction, data: bytes = b""):
+        elapsed = time.monotonic_ns() - self._start_ns
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD_HEADER.pack(direction, elapsed, len(data)))
+            self._file.write(data)
+            self.records += 1
+            self.bytes += len(data)
+
+    def flush(self):
+        with self._lock:
+            if self._file:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        logger.info(f"capture {self.path} closed, {self.records} records, {self.bytes} bytes")
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """顺序读取录制文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(CAPTURE_HEADER.size)
+        if len(header) < CAPTURE_HEADER.size:
+            raise ValueError(f"{path} is not a capture file")
+        magic, version, self.start_time = CAPTURE_HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise ValueError(f"{path} is not a version {CAPTURE_VERSION} capture file")
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        with open(self.path, "rb") as f:
+            f.seek(CAPTURE_HEADER.size)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    # 录制被中断时最后一条记录可能不完整
+                    return
+                direction, elapsed, length = RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    return
+                yield CaptureRecord(Direction(direction), elapsed / 1e9, data)
@@ -0,0 +1,200 @@
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition
+import enum
+import logging
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# get() 返回空数据块表示此处有数据被丢弃，消费端应重新同步
+GAP = b""
+
+
+class OverflowPolicy(enum.Enum):
+    BLOCK = "block"  # 阻塞写入方，直到消费端腾出空间
+    DROP = "drop"  # 丢弃数据并插入 GAP 标记，消费端丢弃不完整的帧
+    SPILL = "spill"  # 超出预算的数据暂存到磁盘临时文件
+
+
+@dataclass
+class ChannelStats:
+    depth_bytes: int = 0
+    depth_chunks: int = 0
+    peak_bytes: int = 0
+    spill_bytes: int = 0
+    total_bytes: int = 0
+    dropped_bytes: int = 0
+    dropped_chunks: int = 0
+    spilled_bytes: int = 0
+    gaps: int = 0
+    blocked_time: float = 0.0
+
+
+class ByteChannel:
+    """
+    按字节数限制内存占用的接收通道，连接接收线程与处理线程
+
+    budget 为内存中允许缓存的最大字节数，超出时按 policy 处理：
+
+    - BLOCK: put() 阻塞直到有足够空间，数据不丢失
+    - DROP: 丢弃数据块，直到缓存降到预算的一半以下才重新接收，丢弃处插入一个 GAP 标记，
+      消费端据此丢弃正在拼装的帧，避免把前后不连续的数据拼成错误的帧
+    - SPILL: 超出预算的数据按顺序写入临时文件，内存数据取完后再从文件读回，数据不丢失
+    """
+
+    def __init__(
+        self,
+        budget: int = 8 * 1024 * 1024,
+        policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        spill_dir: str = None,
+    ):
+        self.budget = budget
+        self.policy = policy
+        self.stats = ChannelStats()
+
+        self._chunks: deque[bytes] = deque()
+        self._cond = Condition()
+        self._closed = False
+        self._dropping = False
+
+        self._spill_dir = spill_dir
+        self._spill_file = None
+        self._spill_chunks: deque[int] = deque()
+        self._spill_read = 0
+        self._spill_write = 0
+
+    def put(self, data: bytes, timeout: float = None) -> bool:
+        """写入数据块，数据被丢弃或通道已关闭时返回 False"""
+        size = len(data)
+        if size == 0:
+            return True
+        with self._cond:
+            if self._closed:
+                return False
+            self.stats.total_bytes += size
+            if self._spill_chunks:
+                # 已有数据暂存在磁盘上，后续数据也必须写入磁盘以保持顺序
+                self._spill(data)
+                return True
+            if self._has_room(size):
+                self._dropping = False
+                self._append(data)
+                return True
+
+            if self.policy is OverflowPolicy.BLOCK:
+                return self._put_blocking(data, timeout)
+            if self.policy is OverflowPolicy.SPILL:
+                self._spill(data)
+                return True
+            self._drop(data)
+            return False
+
+    def get(self, timeout: float = None) -> bytes | None:
+        """取出最早的数据块，超时返回 None，GAP 表示此前有数据被丢弃"""
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._chunks and not self._spill_chunks:
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            if self._chunks:
+                data = self._chunks.popleft()
+                self.stats.depth_bytes -= len(data)
+                self.stats.depth_chunks -= 1
+            else:
+                data = self._unspill()
+            self._cond.notify_all()
+            return data
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._chunks.clear()
+            self._spill_chunks.clear()
+            self.stats.depth_bytes = self.stats.depth_chunks = 0
+            self.stats.spill_bytes = 0
+            if self._spill_file:
+                self._spill_file.close()
+                self._spill_file = None
+
+    def _has_room(self, size: int) -> bool:
+        depth = self.stats.depth_bytes
+        if self._dropping:
+            # 丢弃状态下需要降到低水位才恢复接收，保证恢复后从完整的帧开始
+            # 通道为空时总能接收，否则超过低水位的数据块会被一直丢弃
+            return depth + size <= self.budget // 2 or depth == 0
+        # 单个超过预算的数据块在通道为空时也允许写入
+        return depth + size <= self.budget or depth == 0
+
+    def _append(self, data: bytes):
+        self._chunks.append(data)
+        stats = self.stats
+        stats.depth_bytes += len(data)
+        stats.depth_chunks += 1
+        stats.peak_bytes = max(stats.peak_bytes, stats.depth_bytes)
+        self._cond.notify_all()
+
+    def _put_blocking(self, data: bytes, timeout: float) -> bool:
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        try:
+            while not self._has_room(len(data)):
+                if self._closed:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._drop(data)
+                    return False
+                self._cond.wait(remaining)
+        finally:
+            self.stats.blocked_time += time.monotonic() - start
+        self._append(data)
+        return True
+
+    def _drop(self, data: bytes):
+        stats = self.stats
+        stats.dropped_bytes += len(data)
+        stats.dropped_chunks += 1
+        if not self._dropping:
+            self._dropping = True
+            stats.gaps += 1
+            # GAP 不计入字节预算
+            self._chunks.append(GAP)
+            stats.depth_chunks += 1
+            self._cond.notify_all()
+            logger.warning(
+                f"channel over budget ({stats.depth_bytes} bytes), dropping data"
+            )
+
+    def _spill(self, data: bytes):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(
+                prefix="ftnir-spill-", dir=self._spill_dir
+            )
+            logger.warning("channel over budget, spilling data to disk")
+        self._spill_file.seek(self._spill_write)
+        self._spill_file.write(data)
+        self._spill_write += len(data)
+        self._spill_chunks.append(len(data))
+        self.stats.spill_bytes += len(data)
+        self.stats.spilled_bytes += len(data)
+        self._cond.notify_all()
+
+    def _unspill(self) -> bytes:
+        size = self._spill_chunks.popleft()
+        self._spill_file.seek(self._spill_read)
+        data = self._spill_file.read(size)
+        self._spill_read += size
+        self.stats.spill_bytes -= size
+        if not self._spill_chunks:
+            # 磁盘数据已全部读回，从头复用临时文件
+            self._spill_file.truncate(0)
+            self._spill_read = self._spill_write = 0
+        return data
@@ -0,0 +1,181 @@
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Condition, Lock, Thread
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from .transport import ITransport, SendPriority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LinkModel:
+    """
+    单方向链路模型
+
+    bandwidth: 带宽（字节/秒），None 表示不限速
+    latency: 传播延迟（秒）
+    min_chunk / max_chunk: 接收端每次收到的数据块大小范围，max_chunk 为 None 时不分片
+    corrupt_rate: 每个字节被翻转一位的概率
+    seed: 随机种子，相同的种子和发送序列得到相同的分片与误码
+    """
+
+    bandwidth: float = None
+    latency: float = 0.0
+    min_chunk: int = 1
+    max_chunk: int = None
+    corrupt_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class LinkStats:
+    sent_bytes: int = 0
+    delivered_bytes: int = 0
+    delivered_chunks: int = 0
+    corrupted_bytes: int = 0
+    dropped_bytes: int = 0
+
+
+class LoopbackTransport(ITransport):
+    """
+    内存中的传输对，完全实现 ITransport，不经过串口驱动
+
+    通过 pair() 创建互联的两端，发送方按 LinkModel 计算每个数据块的到达时间、分片与误码，
+    接收方的投递线程按到达时间回调 on_data_received。用于在没有驱动开销的情况下
+    测试和剖析解析器、消息处理器和数据处理流程。
+    """
+
+    def __init__(self, model: LinkModel = None, name: str = "loopback"):
+        super().__init__()
+        self.model = model or LinkModel()
+        self.name = name
+        self.stats = LinkStats()
+        self._peer: "LoopbackTransport" = None
+        self._rng = random.Random(self.model.seed)
+        self._send_lock = Lock()
+        # 发送方向链路空闲的时刻
+        self._link_free_at = 0.0
+
+        self._inbox: list = []
+        self._sequence = itertools.count()
+        self._cond = Condition()
+        self._is_open = False
+        self._thread: Thread = None
+
+    @classmethod
+    def pair(
+        cls, model: LinkModel = None, reverse_model: LinkModel = None
+    ) -> tuple["LoopbackTransport", "LoopbackTransport"]:
+        """创建互联的两端，model 为 a->b 方向，reverse_model 为 b->a 方向（默认与 model 相同）"""
+        model = model or LinkModel()
+        if reverse_model is None:
+            reverse_model = LinkModel(**{**model.__dict__, "seed": model.seed + 1})
+        a = cls(model, "loopback-a")
+        b = cls(reverse_model, "loopback-b")
+        a._peer, b._peer = b, a
+        return a, b
+
+    def open(self):
+        if self._is_open:
+            logger.warning(f"{self.name} already opened")
+            return
+        self._is_open = True
+        self._thread = Thread(target=self._deliver_loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if not self._is_open:
+            logger.warning(f"{self.name} is already closed")
+            return
+        with self._cond:
+            self._is_open = False
+            self._inbox.clear()
+            self._cond.notify_all()
+        self._thread.join(timeout=2)
+        self._thread = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> Future:
+        future = Future()
+        if not self._is_open:
+            future.set_exception(ConnectionError(f"{self.name} is not open"))
+            return future
+
+        self._capture_sent(data)
+        with self._send_lock:
+            self._transmit(bytes(data))
+        self.stats.sent_bytes += len(data)
+        future.set_result(len(data))
+        return future
+
+    def _transmit(self, data: bytes):
+        model = self.model
+        now = time.monotonic()
+        offset = 0
+        while offset < len(data):
+            size = len(data) - offset
+            if model.max_chunk:
+                size = min(size, self._rng.randint(model.min_chunk, model.max_chunk))
+            chunk = self._corrupt(data[offset : offset + size])
+            offset += size
+
+            # 按带宽串行发送，到达时间 = 发送完成时间 + 传播延迟
+            start = max(now, self._link_free_at)
+            done = start + (size / model.bandwidth if model.bandwidth else 0.0)
+            self._link_free_at = done
+            self._peer._deliver_at(done + model.latency, chunk, self)
+
+    def receive_data(self) -> bytes:
+        return b""
+
+    def list_ports(self) -> list[str]:
+        return [self.name]
+
+    def _corrupt(self, chunk: bytes) -> bytes:
+        rate = self.model.corrupt_rate
+        if rate <= 0:
+            return chunk
+        count = self._rng.binomialvariate(len(chunk), rate)
+        if count == 0:
+            return chunk
+        corrupted = bytearray(chunk)
+        for _ in range(count):
+            corrupted[self._rng.randrange(len(chunk))] ^= 1 << self._rng.randrange(8)
+        self.stats.corrupted_bytes += count
+        return bytes(corrupted)
+
+    def _deliver_at(self, when: float, chunk: bytes, sender: "LoopbackTransport"):
+        with self._cond:
+            if not self._is_open:
+                sender.stats.dropped_bytes += len(chunk)
+                return
+            heapq.heappush(self._inbox, (when, next(self._sequence), chunk))
+            self._cond.notify()
+
+    def _deliver_loop(self):
+        while True:
+            with self._cond:
+                while self._is_open:
+                    if self._inbox:
+                        delay = self._inbox[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if not self._is_open:
+                    return
+                _, _, chunk = heapq.heappop(self._inbox)
+            self.stats.delivered_bytes += len(chunk)
+            self.stats.delivered_chunks += 1
+            self._emit_data(chunk)
@@ -0,0 +1,124 @@
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Event, Thread
+import logging
+import time
+
+from .capture import CaptureReader, Direction
+from .transport import ITransport, SendPriority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayStats:
+    chunks: int = 0
+    bytes: int = 0
+    gaps: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+
+class ReplayTransport(ITransport):
+    """
+    回放录制文件中的接收数据
+
+    open() 后由回放线程按录制顺序回调 on_data_received，数据块边界与录制时相同。
+    speed 为回放速度倍数（1.0 为原始时序），None 表示不等待、以最快速度回放，
+    用于在真实数据上测量解析、消息处理和数据处理的吞吐量。发送的数据被丢弃。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = None,
+        direction: Direction = Direction.RX,
+        preload: bool = True,
+    ):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        # 回放的方向：RX 回放给当时的接收方，TX 可把主机发出的数据回放给下位机模拟器
+        self.direction = direction
+        self.stats = ReplayStats()
+        self._reader = CaptureReader(path)
+        # 预先读入内存，避免文件读取计入回放耗时
+        self._records = list(self._reader) if preload else None
+        self._is_open = False
+        self._stop = Event()
+        self.finished = Event()
+        self._thread: Thread = None
+
+    def open(self):
+        if self._is_open:
+            logger.warning(f"replay {self.path} already opened")
+            return
+        self._is_open = True
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = Thread(target=self._replay_loop, name="replay", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if not self._is_open:
+            logger.warning(f"replay {self.path} is already closed")
+            return
+        self._is_open = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待回放结束"""
+        return self.finished.wait(timeout)
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> Future:
+        future = Future()
+        self._capture_sent(data)
+        future.set_result(len(data))
+        return future
+
+    def receive_data(self) -> bytes:
+        return b""
+
+    def list_ports(self) -> list[str]:
+        return [self.path]
+
+    def _replay_loop(self):
+        records = self._records if self._records is not None else self._reader
+        stats = self.stats
+        start = time.perf_counter()
+        for record in records:
+            if self._stop.is_set():
+                break
+            if record.direction == Direction.GAP:
+                # 数据丢失只发生在接收方向
+                if self.direction == Direction.RX:
+                    stats.gaps += 1
+                    self._emit_gap()
+                continue
+            if record.direction != self.direction:
+                continue
+            if self.speed:
+                delay = record.timestamp / self.speed - (time.perf_counter() - start)
+                if delay > 0 and self._stop.wait(delay):
+                    break
+            stats.chunks += 1
+            stats.bytes += len(record.data)
+            self._emit_data(record.data)
+        stats.elapsed = time.perf_counter() - start
+        self.finished.set()
+        logger.info(
+            f"replay {self.path} finished: {stats.chunks} chunks, {stats.bytes} bytes "
+            f"in {stats.elapsed:.3f}s"
+        )
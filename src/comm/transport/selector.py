@@ -0,0 +1,357 @@
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Event, Lock, Thread, get_ident
+from typing import Callable
+import logging
+import os
+import selectors
+import socket
+import time
+
+import serial
+
+from .transport import ITransport, SendPriority
+
+logger = logging.getLogger(__name__)
+
+
+class SerialStream:
+    """串口（含伪终端）流适配器，文件描述符为非阻塞模式"""
+
+    def __init__(self, port: str, baudrate: int = 115200):
+        self.port = port
+        self.baudrate = baudrate
+        self._serial: serial.Serial = None
+
+    @property
+    def name(self) -> str:
+        return self.port
+
+    def open(self):
+        # pyserial 在 POSIX 上以 O_NONBLOCK 打开，timeout=0 时读取不阻塞
+        self._serial = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=0)
+
+    def close(self):
+        if self._serial:
+            self._serial.close()
+            self._serial = None
+
+    def fileno(self) -> int:
+        return self._serial.fileno()
+
+    def readinto(self, buffer: memoryview) -> int:
+        return os.readv(self._serial.fileno(), [buffer])
+
+    def write(self, data: memoryview) -> int:
+        return os.write(self._serial.fileno(), data)
+
+
+class SocketStream:
+    """TCP 流适配器"""
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 3.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._sock: socket.socket = None
+
+    @property
+    def name(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def open(self):
+        sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        self._sock = sock
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def readinto(self, buffer: memoryview) -> int:
+        return self._sock.recv_into(buffer)
+
+    def write(self, data: memoryview) -> int:
+        return self._sock.send(data)
+
+
+@dataclass
+class StreamStats:
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    reads: int = 0
+    # 从读到数据到解析和消息处理完成的耗时
+    dispatch_time: float = 0.0
+    max_dispatch_time: float = 0.0
+    opened_at: float = 0.0
+
+
+class SelectorLoop:
+    """
+    单线程 I/O 循环，用一个 selectors 选择器驱动多个流的收发
+
+    所有流共用一块接收缓冲区：数据在 I/O 线程中同步交给各自的 on_data_received 回调，
+    回调返回后缓冲区即被复用。注册、注销和写请求从其它线程通过唤醒管道转交给 I/O 线程执行。
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, name: str = "selector loop"):
+        self._name = name
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._calls: deque[Callable[[], None]] = deque()
+        self._calls_lock = Lock()
+        self._buffer = memoryview(bytearray(self.BLOCK_SIZE))
+        self._thread: Thread = None
+        self._is_running = False
+
+    @property
+    def in_loop(self) -> bool:
+        return self._thread is not None and self._thread.ident == get_ident()
+
+    def start(self):
+        if self._is_running:
+            return
+        self._is_running = True
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._is_running:
+            return
+        self._is_running = False
+        self._wakeup()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def call_soon(self, callback: Callable[[], None]):
+        """在 I/O 线程中执行 callback"""
+        with self._calls_lock:
+            self._calls.append(callback)
+        self._wakeup()
+
+    def call(self, callback: Callable[[], object], timeout: float = 2.0):
+        """在 I/O 线程中执行 callback 并等待结果"""
+        if self.in_loop:
+            return callback()
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(callback())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.call_soon(run)
+        return future.result(timeout)
+
+    def _wakeup(self):
+        try:
+            self._wakeup_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # 管道已满说明 I/O 线程已经会被唤醒
+            pass
+
+    def _run(self):
+        logger.debug(f"{self._name} started")
+        while self._is_running:
+            for key, events in self._selector.select():
+                transport: PooledTransport = key.data
+                if transport is None:
+                    self._drain_wakeup()
+                    continue
+                if events & selectors.EVENT_READ:
+                    transport._on_readable(self._buffer)
+                if events & selectors.EVENT_WRITE and transport.is_open:
+                    transport._on_writable()
+            self._run_calls()
+        logger.debug(f"{self._name} finished")
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run_calls(self):
+        while True:
+            with self._calls_lock:
+                if not self._calls:
+                    return
+                callback = self._calls.popleft()
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"{self._name} callback failed: {e}")
+
+    def _update(self, transport: "PooledTransport", writing: bool):
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+        self._selector.modify(transport._fileno, events, transport)
+
+
+class PooledTransport(ITransport):
+    """
+    由 SelectorLoop 驱动的传输，不创建自己的线程
+
+    send_data 把帧放入发送队列（CONTROL 帧插到未开始写出的普通帧之前）后由 I/O 线程非阻塞写出，
+    返回在整帧写完后完成的 Future。on_data_received 回调在 I/O 线程中执行，数据仅在回调期间有效。
+    """
+
+    def __init__(self, loop: SelectorLoop, stream: SerialStream | SocketStream):
+        super().__init__()
+        self._loop = loop
+        self.stream = stream
+        self.stats = StreamStats()
+        self._fileno: int = None
+        self._is_open = False
+        # [剩余数据, future, 优先级, 帧长]，只在 I/O 线程中访问
+        self._send_queue: deque[list] = deque()
+        self._writing = False
+        self.closed = Event()
+
+    @property
+    def name(self) -> str:
+        return self.stream.name
+
+    def open(self):
+        if self._is_open:
+            logger.warning(f"{self.name} already opened")
+            return
+        self.stream.open()
+        self._fileno = self.stream.fileno()
+        self.stats.opened_at = time.monotonic()
+        self.closed.clear()
+        self._loop.call(
+            lambda: self._loop._selector.register(self._fileno, selectors.EVENT_READ, self)
+        )
+        self._is_open = True
+        logger.info(f"opened {self.name} successfully")
+
+    def close(self):
+        if not self._is_open:
+            logger.warning(f"{self.name} is already closed")
+            return
+        self._loop.call(self._close_in_loop)
+
+    def _close_in_loop(self):
+        if not self._is_open:
+            return
+        self._is_open = False
+        try:
+            self._loop._selector.unregister(self._fileno)
+        except (KeyError, ValueError):
+            pass
+        self.stream.close()
+        while self._send_queue:
+            future = self._send_queue.popleft()[1]
+            if not future.done():
+                future.set_exception(ConnectionError(f"{self.name} closed"))
+        self._writing = False
+        self.closed.set()
+        logger.info(f"closed {self.name} success")
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> Future:
+        future = Future()
+        if not self._is_open:
+            future.set_exception(ConnectionError(f"{self.name} is not open"))
+            return future
+        future.set_running_or_notify_cancel()
+        self._capture_sent(data)
+        view = memoryview(data).cast("B")
+        self._loop.call_soon(lambda: self._enqueue([view, future, priority, len(view)]))
+        return future
+
+    def receive_data(self) -> bytes:
+        return b""
+
+    def list_ports(self) -> list[str]:
+        return [self.name]
+
+    def _enqueue(self, entry: list):
+        if not self._is_open:
+            entry[1].set_exception(ConnectionError(f"{self.name} closed"))
+            return
+        if entry[2] is SendPriority.CONTROL:
+            # 正在写出的帧不能被打断
+            index = 1 if self._writing else 0
+            while (
+                index < len(self._send_queue)
+                and self._send_queue[index][2] is SendPriority.CONTROL
+            ):
+                index += 1
+            self._send_queue.insert(index, entry)
+        else:
+            self._send_queue.append(entry)
+        if not self._writing:
+            self._on_writable()
+
+    def _on_readable(self, buffer: memoryview):
+        try:
+            n = self.stream.readinto(buffer)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"failed to read from {self.name}: {e}")
+            self._close_in_loop()
+            self._emit_connection_lost(e)
+            return
+        if not n:
+            logger.warning(f"{self.name} connection lost")
+            self._close_in_loop()
+            self._emit_connection_lost(ConnectionError(f"{self.name} closed by peer"))
+            return
+        stats = self.stats
+        stats.rx_bytes += n
+        stats.reads += 1
+        start = time.perf_counter()
+        self._emit_data(buffer[:n])
+        elapsed = time.perf_counter() - start
+        stats.dispatch_time += elapsed
+        if elapsed > stats.max_dispatch_time:
+            stats.max_dispatch_time = elapsed
+
+    def _on_writable(self):
+        while self._send_queue:
+            entry = self._send_queue[0]
+            view, future = entry[0], entry[1]
+            try:
+                n = self.stream.write(view)
+            except BlockingIOError:
+                n = 0
+            except OSError as e:
+                self._send_queue.popleft()
+                future.set_exception(e)
+                continue
+            self.stats.tx_bytes += n
+            if n < len(view):
+                # 剩余部分等待可写事件
+                entry[0] = view[n:]
+                if not self._writing:
+                    self._writing = True
+                    self._loop._update(self, writing=True)
+                return
+            self._send_queue.popleft()
+            future.set_result(entry[3])
+        if self._writing:
+            self._writing = False
+            self._loop._update(self, writing=False)
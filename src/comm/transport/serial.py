@@ -3,31 +3,90 @@ import serial.tools.list_ports
 import time
 import random
 import logging
+import os
+import select
+from concurrent.futures import Future
+from dataclasses import dataclass
 from threading import Thread
-import queue
-from queue import Queue
 
-from .transport import ITransport
+from .channel import ByteChannel, ChannelStats, OverflowPolicy
+from .transport import ITransport, SendPriority
+from .writer import PacedWriter
 
 logger = logging.getLogger(__name__)
 
+# 单次读取超时范围，决定接收延迟的上限和空闲时的唤醒频率
+MIN_READ_TIMEOUT = 0.005
+MAX_READ_TIMEOUT = 0.05
+MIN_BLOCK_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class PortIdentity:
+    """
+    USB 串口设备的身份，用于设备重新插入后找回同一台仪器
+
+    重新枚举后串口名（COMx、/dev/ttyUSBx）可能改变，优先按序列号匹配，没有序列号时按 VID/PID 匹配。
+    """
+
+    serial_number: str = None
+    vid: int = None
+    pid: int = None
+
+    @classmethod
+    def of(cls, port: str) -> "PortIdentity | None":
+        """查询串口的身份，非 USB 设备（如伪终端）返回 None"""
+        for info in serial.tools.list_ports.comports():
+            if info.device == port:
+                if info.serial_number is None and info.vid is None:
+                    return None
+                return cls(info.serial_number, info.vid, info.pid)
+        return None
+
+    def matches(self, info) -> bool:
+        if self.serial_number:
+            return info.serial_number == self.serial_number
+        return self.vid is not None and (info.vid, info.pid) == (self.vid, self.pid)
+
+
+def find_serial_port(identity: PortIdentity) -> str | None:
+    for info in serial.tools.list_ports.comports():
+        if identity.matches(info):
+            return info.device
+    return None
+
 
 class SerialTransport(ITransport):
 
-    def __init__(self, port: str = ""):
+    def __init__(
+        self,
+        port: str = "",
+        expected_frame_size: int = 64 * 1024,
+        receive_budget: int = 8 * 1024 * 1024,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+    ):
         super().__init__()
         self.port = port
         self.baudrate = 115200
         self.bytesize = 8
         self.stopbits = 1
         self.parity = "N"
+        # 预期的最大帧长，用于推算接收块大小
+        self.expected_frame_size = expected_frame_size
+        # 发送限速（字节/秒），None 表示按波特率限速
+        self.send_rate: float = None
 
         self._serial: serial.Serial = None
 
         self._is_running = False
         self._receive_thread: Thread = None
         self._process_thread: Thread = None
-        self._process_queue = Queue(maxsize=100)
+        # 接收线程与处理线程之间按字节数限制内存占用
+        self.receive_budget = receive_budget
+        self.overflow_policy = overflow_policy
+        self._channel: ByteChannel = None
+        self._fileno: int = None
+        self._writer: PacedWriter = None
 
     def set_port(self, port: str):
         if self.is_open:
@@ -49,9 +108,20 @@ class SerialTransport(ITransport):
                 bytesize=self.bytesize,
                 stopbits=self.stopbits,
                 parity=self.parity,
-                timeout=1,  # 1 second timeout for read operations
+                timeout=self.read_timeout,
             )
-            # start the receive and process threads
+            self._fileno = self._selectable_fileno()
+            if self._fileno is not None:
+                # 可 select 的平台上由 select 等待数据，读取本身不阻塞
+                self._serial.timeout = 0
+            # start the writer, receive and process threads
+            self._writer = PacedWriter(
+                self._serial.write,
+                rate=self.send_rate or self.bytes_per_second,
+                name=f"{self.port} writer",
+            )
+            self._writer.start()
+            self._channel = ByteChannel(self.receive_budget, self.overflow_policy)
             self._is_running = True
             self._process_thread = Thread(target=self._process_loop, daemon=True)
             self._receive_thread = Thread(target=self._receive_loop, daemon=True)
@@ -78,15 +148,19 @@ class SerialTransport(ITransport):
         try:
             # notify threads to stop
             self._is_running = False
-
-            # close serial port
-            if self._serial and self._serial.is_open:
-                self._serial.close()
+            if self._writer:
+                self._writer.stop()
+            if self._channel:
+                self._channel.close()
 
             # wait for receive thread to finish
             if self._receive_thread and self._receive_thread.is_alive():
                 self._receive_thread.join(timeout=2)  # 等待读取线程安全退出
 
+            # close serial port
+            if self._serial and self._serial.is_open:
+                self._serial.close()
+
             # wait for process thread to finish
             if self._process_thread and self._process_thread.is_alive():
                 self._process_thread.join(timeout=2)  # 等待读取线程安全退出
@@ -96,35 +170,87 @@ class SerialTransport(ITransport):
             logger.error(f"failed to close serial port {self.port}: {e}")
         finally:
             self._serial = None
+            self._writer = None
             self._receive_thread = None
             self._process_thread = None
 
-    @property
-    def is_open(self) -> bool:
-        return self._serial and self._serial.is_open
+    def set_baudrate(self, baudrate: int):
+        """
+        切换波特率，串口打开时立即生效
 
-    def send_data(self, data: bytes):
-        # logger.debug(f"Sending data: {data.hex()}")
-        if not isinstance(data, bytes) or not data:
-            logger.error("send data failed: data must be bytes and not empty")
+        先等待已写入驱动的数据全部发出再切换，调用方需要保证此前的帧已经写出（其 Future 已完成）。
+        发送限速随之更新（未单独设置 send_rate 时）。
+        """
+        if baudrate == self.baudrate:
             return
-        if not self._serial.is_open:
-            logger.error("send data failed: serial port not opened")
+        old = self.baudrate
+        self.baudrate = baudrate
+        if not self.is_open:
             return
         try:
-            for i in range(0, len(data), 2048):
-                chunk = data[i : i + 2048]
-                n = self._serial.write(chunk)
-                if n != len(chunk):
-                    logger.warning("send data failed: data length not match")
-                self._serial.flush()  # 确保数据被发送
-                time.sleep(0.01)  # 确保数据发送间隔
-        except serial.SerialTimeoutException:
-            logger.error("send data failed: timeout")
-            raise
+            self._serial.flush()
+            self._serial.baudrate = baudrate
+            if self._fileno is None:
+                # 按块读取的超时随波特率变化
+                self._serial.timeout = self.read_timeout
         except serial.SerialException as e:
-            logger.error(f"send data failed: serial port error {e}")
+            logger.error(f"failed to set baudrate of {self.port} to {baudrate}: {e}")
+            self.baudrate = old
             raise
+        if self._writer and not self.send_rate:
+            self._writer.set_rate(self.bytes_per_second)
+        logger.info(f"serial port {self.port} baudrate {old} -> {baudrate}")
+
+    @property
+    def bytes_per_second(self) -> float:
+        # 起始位 + 数据位 + 校验位 + 停止位
+        bits = 1 + self.bytesize + (0 if self.parity == "N" else 1) + self.stopbits
+        return self.baudrate / bits
+
+    @property
+    def read_timeout(self) -> float:
+        """接收一个预期帧所需时间，限制在 [MIN_READ_TIMEOUT, MAX_READ_TIMEOUT]"""
+        frame_time = self.expected_frame_size / self.bytes_per_second
+        return min(max(frame_time, MIN_READ_TIMEOUT), MAX_READ_TIMEOUT)
+
+    @property
+    def block_size(self) -> int:
+        """
+        单次读取的块大小：大于一个读取超时内按波特率能到达的字节数，
+        低速链路一次读取返回超时期间的全部数据，USB-CDC 等实际速率高于标称波特率的链路在块满时立即返回
+        """
+        arrival = int(self.bytes_per_second * self.read_timeout) * 2
+        return max(self.expected_frame_size, arrival, MIN_BLOCK_SIZE)
+
+    @property
+    def channel_stats(self) -> ChannelStats:
+        """接收通道的队列深度和丢弃/暂存计数"""
+        return self._channel.stats if self._channel else ChannelStats()
+
+    @property
+    def is_open(self) -> bool:
+        return self._serial and self._serial.is_open
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> Future:
+        """
+        异步发送，按链路速率分块写出，返回在整帧写完后完成的 Future
+
+        data 在 Future 完成前不能被修改
+        """
+        # logger.debug(f"Sending data: {data.hex()}")
+        future = Future()
+        if not isinstance(data, (bytes, bytearray, memoryview)) or not data:
+            logger.error("send data failed: data must be bytes-like and not empty")
+            future.set_exception(ValueError("data must be bytes-like and not empty"))
+            return future
+        if not self.is_open or not self._writer:
+            logger.error("send data failed: serial port not opened")
+            future.set_exception(serial.PortNotOpenError())
+            return future
+        self._capture_sent(data)
+        return self._writer.submit(data, priority)
 
     def receive_data(self) -> bytes:
         if not self._serial.is_open:
@@ -141,35 +267,59 @@ class SerialTransport(ITransport):
         return b""
 
     def _receive_loop(self):
-        logger.debug("receive loop started")
+        logger.debug(
+            f"receive loop started, block size {self.block_size}, timeout {self.read_timeout:.3f}s"
+        )
         while self._is_running:
             try:
-                # block on reading data
-                data = self._serial.read(1)
+                # 波特率可能在运行中被协商修改，每次按当前速率计算块大小
+                data = self._read_block(self.block_size)
                 if not data:
                     continue
-
-                if self._serial.in_waiting > 0:
-                    data += self._serial.read(self._serial.in_waiting)
-                    # non-blocking put to process queue
-                    self._process_queue.put(data, block=False)
-            except serial.SerialException as e:
-                logger.error(f"failed to read data from serial port: {e}")
-            except queue.Full:
-                logger.warning("failed to put data to process queue: queue is full")
+                # 通道超出预算时按 overflow_policy 处理
+                self._channel.put(data)
+            except (serial.SerialException, OSError) as e:
+                # 设备拔出后每次读取都会立即失败，退出接收循环并通知上层，避免错误日志刷屏
+                if not self._is_running:
+                    break
+                logger.error(f"serial port {self.port} failed, stop receiving: {e}")
+                self._emit_connection_lost(e)
+                break
             except Exception as e:
                 logger.error(f"failed to receive data: {e}")
+                time.sleep(self.read_timeout)
         logger.debug("receive loop finished")
 
+    def _selectable_fileno(self) -> int | None:
+        try:
+            return self._serial.fileno()
+        except (AttributeError, OSError):
+            return None
+
+    def _read_block(self, block_size: int) -> bytes:
+        """
+        读取一个数据块：有数据到达即返回已到达的全部数据（不超过 block_size），
+        read_timeout 只决定空闲时的唤醒周期，不增加接收延迟
+        """
+        if self._fileno is not None:
+            ready, _, _ = select.select([self._fileno], [], [], self.read_timeout)
+            if not ready:
+                return b""
+            return self._serial.read(block_size)
+        # 不支持 select 的平台（Windows），按块读取：块满或 read_timeout 超时后返回
+        return self._serial.read(block_size)
+
     def _process_loop(self):
         logger.debug("process loop started")
         while self._is_running:
             try:
-                data = self._process_queue.get(timeout=1)
+                data = self._channel.get(timeout=1)
+                if data is None:
+                    continue
                 if data:
                     self._emit_data(data)
-            except queue.Empty:
-                continue
+                else:
+                    self._emit_gap()
             except Exception as e:
                 logger.error(f"failed to process data: {e}")
         logger.debug("process loop finished")
@@ -179,3 +329,9 @@ class SerialTransport(ITransport):
         for port in serial.tools.list_ports.comports():
             ports.append(port.device)
         return ports
+
+    def identity(self) -> PortIdentity | None:
+        return PortIdentity.of(self.port)
+
+    def port_exists(self) -> bool:
+        return os.path.exists(self.port) or self.port in self.list_ports()
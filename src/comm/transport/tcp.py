@@ -0,0 +1,269 @@
+from concurrent.futures import Future
+from threading import Event, Thread
+import logging
+import socket
+import time
+
+from .transport import ITransport, SendPriority
+from .writer import CoalescingWriter
+
+logger = logging.getLogger(__name__)
+
+
+class SocketTransport(ITransport):
+    """
+    基于 TCP 套接字的传输，帧格式与串口相同（同一个 MessageParser）
+
+    - 设置 TCP_NODELAY，控制帧立即发出；BULK 数据帧由 CoalescingWriter 合并后用 sendmsg 一次写出
+    - 接收使用 recv_into 写入复用的缓冲区，on_data_received 回调收到的 memoryview 仅在回调期间有效
+    - 连接断开后按退避间隔自动重连，重连后通过 on_stream_gap 通知接收方丢弃未完成的帧
+
+    子类实现 _connect() 获取已连接的套接字。
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        reconnect: bool = True,
+        reconnect_interval: float = 0.5,
+        max_reconnect_interval: float = 10.0,
+        coalesce_delay: float = 0.002,
+        coalesce_bytes: int = 64 * 1024,
+    ):
+        super().__init__()
+        self.reconnect = reconnect
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+        self.coalesce_delay = coalesce_delay
+        self.coalesce_bytes = coalesce_bytes
+
+        self._sock: socket.socket = None
+        self._connected = Event()
+        self._is_running = False
+        self._receive_thread: Thread = None
+        self._writer: CoalescingWriter = None
+        self._receive_buffer = bytearray(self.BLOCK_SIZE)
+
+    def _connect(self) -> socket.socket:
+        raise NotImplementedError
+
+    @property
+    def name(self) -> str:
+        raise NotImplementedError
+
+    def open(self):
+        if self._is_running:
+            logger.warning(f"{self.name} already opened")
+            return
+        self._is_running = True
+        try:
+            self._attach(self._connect())
+        except OSError as e:
+            logger.error(f"failed to open {self.name}: {e}")
+            self._is_running = False
+            raise
+        self._writer = CoalescingWriter(
+            self._write_batch,
+            batch_bytes=self.coalesce_bytes,
+            delay=self.coalesce_delay,
+            name=f"{self.name} writer",
+        )
+        self._writer.start()
+        self._receive_thread = Thread(
+            target=self._receive_loop, name=f"{self.name} receiver", daemon=True
+        )
+        self._receive_thread.start()
+        logger.info(f"opened {self.name} successfully")
+
+    def close(self):
+        if not self._is_running:
+            logger.warning(f"{self.name} is already closed")
+            return
+        self._is_running = False
+        if self._writer:
+            self._writer.stop()
+        self._detach()
+        self._close_listener()
+        if self._receive_thread and self._receive_thread.is_alive():
+            self._receive_thread.join(timeout=2)
+        self._writer = None
+        self._receive_thread = None
+        logger.info(f"closed {self.name} success")
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_running and self._connected.is_set()
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def send_data(
+        self, data: bytes, priority: SendPriority = SendPriority.NORMAL
+    ) -> Future:
+        if not self.is_open or not self._writer:
+            future = Future()
+            future.set_exception(ConnectionError(f"{self.name} is not connected"))
+            return future
+        self._capture_sent(data)
+        return self._writer.submit(data, priority)
+
+    def receive_data(self) -> bytes:
+        return b""
+
+    def list_ports(self) -> list[str]:
+        return [self.name]
+
+    def _attach(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._connected.set()
+
+    def _detach(self):
+        self._connected.clear()
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _close_listener(self):
+        pass
+
+    def _write_batch(self, buffers: list[memoryview]):
+        sock = self._sock
+        if sock is None:
+            raise ConnectionError(f"{self.name} is not connected")
+        if not hasattr(sock, "sendmsg"):
+            sock.sendall(b"".join(buffers))
+            return
+        # sendmsg 可能只发送部分数据，跳过已发送的部分继续
+        while buffers:
+            sent = sock.sendmsg(buffers)
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                buffers.pop(0)
+            if buffers and sent:
+                buffers[0] = buffers[0][sent:]
+
+    def _receive_loop(self):
+        view = memoryview(self._receive_buffer)
+        interval = self.reconnect_interval
+        while self._is_running:
+            sock = self._sock
+            if sock is None:
+                # 连接已断开，按退避间隔重连
+                if not self.reconnect:
+                    break
+                try:
+                    self._attach(self._connect())
+                    interval = self.reconnect_interval
+                    logger.info(f"{self.name} reconnected")
+                    self._emit_gap()
+                except OSError as e:
+                    if not self._is_running:
+                        break
+                    logger.warning(f"{self.name} reconnect failed: {e}, retry in {interval}s")
+                    time.sleep(interval)
+                    interval = min(interval * 2, self.max_reconnect_interval)
+                continue
+            try:
+                n = sock.recv_into(view)
+            except OSError as e:
+                n = 0
+                if self._is_running:
+                    logger.warning(f"{self.name} receive failed: {e}")
+            if n == 0:
+                if self._is_running:
+                    logger.warning(f"{self.name} connection lost")
+                if self._sock is sock:
+                    self._detach()
+                continue
+            self._emit_data(view[:n])
+        logger.debug(f"{self.name} receive loop finished")
+
+
+class TcpTransport(SocketTransport):
+    """TCP 客户端，连接串口转以太网桥或 TcpServerTransport"""
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 3.0, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+
+    @property
+    def name(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        sock.settimeout(None)
+        return sock
+
+
+class TcpServerTransport(SocketTransport):
+    """
+    TCP 服务端，供下位机模拟器使用：监听端口并接受一个客户端，
+    客户端断开后等待下一个连接。port 为 0 时由系统分配，open() 后通过 address 获取。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **kwargs):
+        kwargs.setdefault("reconnect_interval", 0.0)
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self._listener: socket.socket = None
+
+    @property
+    def name(self) -> str:
+        return f"tcp-server://{self.host}:{self.port}"
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.host, self.port
+
+    @property
+    def is_open(self) -> bool:
+        # 等待客户端连接期间也视为已打开
+        return self._is_running
+
+    def open(self):
+        if self._is_running:
+            logger.warning(f"{self.name} already opened")
+            return
+        self._listener = socket.create_server((self.host, self.port))
+        self.port = self._listener.getsockname()[1]
+        self._is_running = True
+        self._writer = CoalescingWriter(
+            self._write_batch,
+            batch_bytes=self.coalesce_bytes,
+            delay=self.coalesce_delay,
+            name=f"{self.name} writer",
+        )
+        self._writer.start()
+        self._receive_thread = Thread(
+            target=self._receive_loop, name=f"{self.name} receiver", daemon=True
+        )
+        self._receive_thread.start()
+        logger.info(f"listening on {self.name}")
+
+    def _connect(self) -> socket.socket:
+        listener = self._listener
+        if listener is None:
+            raise OSError(f"{self.name} is not listening")
+        sock, peer = listener.accept()
+        logger.info(f"{self.name} accepted connection from {peer[0]}:{peer[1]}")
+        return sock
+
+    def _close_listener(self):
+        listener, self._listener = self._listener, None
+        if listener:
+            # shutdown 唤醒阻塞在 accept() 中的接收线程
+            try:
+                listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            listener.close()
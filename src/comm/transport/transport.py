@@ -1,13 +1,41 @@
 from abc import ABC, abstractmethod
 from typing import Callable
+import enum
 import logging
 
+from comm.protocol.command import CONTROL_COMMANDS, Command
+from .capture import CaptureWriter, Direction
+
 logger = logging.getLogger(__name__)
 
 
+class SendPriority(enum.IntEnum):
+    """发送优先级，数值越小越先发送"""
+
+    CONTROL = 0
+    NORMAL = 1
+    BULK = 2
+
+
+# 不低于该长度的帧按 BULK 优先级发送
+BULK_MESSAGE_LEN = 4096
+
+
+def priority_for(command: Command, message_len: int) -> SendPriority:
+    """控制命令优先发送，大数据帧排在最后"""
+    if command in CONTROL_COMMANDS:
+        return SendPriority.CONTROL
+    if message_len >= BULK_MESSAGE_LEN:
+        return SendPriority.BULK
+    return SendPriority.NORMAL
+
+
 class ITransport(ABC):
     def __init__(self):
         self._data_received_callback: Callable[[bytes], None] = None
+        self._stream_gap_callback: Callable[[], None] = None
+        self._connection_lost_callback: Callable[[Exception], None] = None
+        self._capture: CaptureWriter = None
 
     @abstractmethod
     def open(self):
@@ -18,7 +46,7 @@ class ITransport(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def send_data(self, data: bytes):
+    def send_data(self, data: bytes, priority: SendPriority = SendPriority.NORMAL):
         raise NotImplementedError
 
     @abstractmethod
@@ -33,7 +61,57 @@ class ITransport(ABC):
     def on_data_received(self, callback: Callable[[bytes], None]):
         self._data_received_callback = callback
 
+    def on_stream_gap(self, callback: Callable[[], None]):
+        """接收数据因溢出被丢弃时回调，接收方应丢弃未完成的帧并重新同步"""
+        self._stream_gap_callback = callback
+
+    def on_connection_lost(self, callback: Callable[[Exception], None]):
+        """
+        连接因设备拔出等故障中断时回调，之后不再接收数据，需要 close() 后重新打开
+
+        回调在传输内部的线程中执行，不能在回调中直接调用 close()。
+        """
+        self._connection_lost_callback = callback
+
+    def start_capture(self, path: str) -> CaptureWriter:
+        """开始录制收发的原始数据块，可用 ReplayTransport 回放"""
+        self.stop_capture()
+        self._capture = CaptureWriter(path)
+        logger.info(f"capturing wire data to {path}")
+        return self._capture
+
+    def stop_capture(self):
+        capture, self._capture = self._capture, None
+        if capture:
+            capture.close()
+
+    def _capture_sent(self, data: bytes):
+        """由具体传输在发送时调用"""
+        capture = self._capture
+        if capture:
+            capture.record(Direction.TX, data)
+
+    def _emit_gap(self):
+        capture = self._capture
+        if capture:
+            capture.record(Direction.GAP)
+        try:
+            if self._stream_gap_callback:
+                self._stream_gap_callback()
+        except Exception as e:
+            logger.error(f"Error in stream gap callback: {e}")
+
+    def _emit_connection_lost(self, exc: Exception):
+        try:
+            if self._connection_lost_callback:
+                self._connection_lost_callback(exc)
+        except Exception as e:
+            logger.error(f"Error in connection lost callback: {e}")
+
     def _emit_data(self, data: bytes):
+        capture = self._capture
+        if capture:
+            capture.record(Direction.RX, data)
         try:
             if self._data_received_callback:
                 self._data_received_callback(data)
@@ -0,0 +1,83 @@
+import logging
+import os
+import select
+import tty
+from threading import Thread
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualSerialPair:
+    """
+    由两个伪终端组成的虚拟串口对（类似 socat 的 PTY 桥接），仅支持 Linux/POSIX
+
+    port_a 与 port_b 是两个真实的 tty 设备路径，可以直接交给 SerialTransport 打开，
+    写入一端的数据由转发线程原样送到另一端，从而无需硬件即可测试完整的串口收发路径。
+    伪终端不模拟波特率，链路速率由 SerialTransport 的发送限速决定。
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._masters: list[int] = []
+        self._slaves: list[int] = []
+        self.port_a = ""
+        self.port_b = ""
+        self._wakeup_r = self._wakeup_w = -1
+        self._thread: Thread = None
+        self._is_running = False
+
+    def __enter__(self) -> "VirtualSerialPair":
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        if self._is_running:
+            return
+        for _ in range(2):
+            master, slave = os.openpty()
+            tty.setraw(slave)
+            self._masters.append(master)
+            # 保持从端打开，避免对端串口关闭后主端读取出现 EIO
+            self._slaves.append(slave)
+        self.port_a, self.port_b = (os.ttyname(fd) for fd in self._slaves)
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._is_running = True
+        self._thread = Thread(target=self._relay_loop, name="pty relay", daemon=True)
+        self._thread.start()
+        logger.info(f"virtual serial pair {self.port_a} <-> {self.port_b}")
+
+    def close(self):
+        if not self._is_running:
+            return
+        self._is_running = False
+        os.write(self._wakeup_w, b"\0")
+        self._thread.join(timeout=2)
+        for fd in self._masters + self._slaves + [self._wakeup_r, self._wakeup_w]:
+            os.close(fd)
+        self._masters.clear()
+        self._slaves.clear()
+        self._thread = None
+
+    def _relay_loop(self):
+        peer = {
+            self._masters[0]: self._masters[1],
+            self._masters[1]: self._masters[0],
+        }
+        watched = [*peer, self._wakeup_r]
+        while self._is_running:
+            ready, _, _ = select.select(watched, [], [])
+            for fd in ready:
+                if fd == self._wakeup_r:
+                    return
+                try:
+                    data = os.read(fd, self.BLOCK_SIZE)
+                except OSError:
+                    continue
+                view = memoryview(data)
+                while view:
+                    n = os.write(peer[fd], view)
+                    view = view[n:]
@@ -0,0 +1,201 @@
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import Callable
+import heapq
+import itertools
+import logging
+import time
+
+from .transport import SendPriority
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶限速，rate 为每秒字节数，None 表示不限速"""
+
+    def __init__(self, rate: float = None, burst: int = 4096):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def delay(self, size: int) -> float:
+        """发送 size 字节前需要等待的时间"""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= size:
+            return 0.0
+        return (size - self._tokens) / self.rate
+
+    def consume(self, size: int):
+        if self.rate:
+            self._tokens -= size
+
+
+class PacedWriter:
+    """
+    异步发送线程
+
+    submit() 将数据放入按优先级排序的队列后立即返回 Future，发送线程按令牌桶速率分块写出，
+    整帧写完后 Future 完成。优先级只在帧之间生效：CONTROL 帧可以插到排队中的大数据帧之前，
+    但不会打断一个已经开始写出的帧。
+    """
+
+    def __init__(
+        self,
+        write: Callable[[bytes], int],
+        rate: float = None,
+        chunk_size: int = 4096,
+        name: str = "writer",
+    ):
+        self._write = write
+        self._bucket = TokenBucket(rate, burst=chunk_size)
+        self._chunk_size = chunk_size
+        self._name = name
+
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._cond = Condition()
+        self._is_running = False
+        self._thread: Thread = None
+
+    @property
+    def rate(self) -> float:
+        return self._bucket.rate
+
+    def set_rate(self, rate: float):
+        self._bucket.rate = rate
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        if self._is_running:
+            return
+        self._is_running = True
+        self._thread = Thread(target=self._write_loop, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2):
+        with self._cond:
+            self._is_running = False
+            self._cond.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        # 未发送的数据全部取消
+        with self._cond:
+            pending, self._queue = self._queue, []
+        for _, _, _, future in pending:
+            future.cancel()
+
+    def submit(self, data: bytes, priority: SendPriority = SendPriority.NORMAL) -> Future:
+        future = Future()
+        with self._cond:
+            if not self._is_running:
+                future.set_exception(RuntimeError(f"{self._name} is not running"))
+                return future
+            heapq.heappush(self._queue, (priority, next(self._sequence), data, future))
+            self._cond.notify()
+        return future
+
+    def _write_loop(self):
+        logger.debug(f"{self._name} loop started")
+        while True:
+            with self._cond:
+                while self._is_running and not self._queue:
+                    self._cond.wait()
+                if not self._is_running:
+                    break
+                _, _, data, future = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._write_frame(data)
+                future.set_result(len(data))
+            except Exception as e:
+                logger.error(f"{self._name} failed to write {len(data)} bytes: {e}")
+                future.set_exception(e)
+        logger.debug(f"{self._name} loop finished")
+
+    def _write_frame(self, data: bytes):
+        view = memoryview(data).cast("B")
+        for i in range(0, len(view), self._chunk_size):
+            chunk = view[i : i + self._chunk_size]
+            delay = self._bucket.delay(len(chunk))
+            if delay > 0:
+                time.sleep(delay)
+            n = self._write(chunk)
+            if n is not None and n != len(chunk):
+                logger.warning(f"{self._name} short write: {n} of {len(chunk)} bytes")
+            self._bucket.consume(len(chunk))
+
+
+class CoalescingWriter(PacedWriter):
+    """
+    合并写出的发送线程，用于套接字等支持分散写的链路
+
+    队首为 BULK 帧时最多等待 delay 秒，把排队中的帧凑到 batch_bytes 后通过 write_batch
+    一次写出（例如 socket.sendmsg），减少小包和系统调用次数；CONTROL 和 NORMAL 帧不等待，
+    只顺带合并已经在排队的帧。
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[memoryview]], None],
+        batch_bytes: int = 64 * 1024,
+        delay: float = 0.002,
+        name: str = "writer",
+    ):
+        super().__init__(write=None, name=name)
+        self._write_batch = write_batch
+        self._batch_bytes = batch_bytes
+        self._delay = delay
+
+    def _write_loop(self):
+        logger.debug(f"{self._name} loop started")
+        while True:
+            with self._cond:
+                while self._is_running and not self._queue:
+                    self._cond.wait()
+                if not self._is_running:
+                    break
+                if self._queue[0][0] is SendPriority.BULK:
+                    # 等待更多帧到达以合并写出
+                    deadline = time.monotonic() + self._delay
+                    while self._is_running and self._queued_bytes() < self._batch_bytes:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self._queue[0][0] is not SendPriority.BULK:
+                            break
+                        self._cond.wait(remaining)
+                batch = self._take_batch()
+
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._write_batch([memoryview(data).cast("B") for data, _ in batch])
+                for data, future in batch:
+                    future.set_result(len(data))
+            except Exception as e:
+                logger.error(f"{self._name} failed to write {len(batch)} frames: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+        logger.debug(f"{self._name} loop finished")
+
+    def _queued_bytes(self) -> int:
+        return sum(len(item[2]) for item in self._queue)
+
+    def _take_batch(self) -> list:
+        batch = []
+        size = 0
+        while self._queue and (not batch or size + len(self._queue[0][2]) <= self._batch_bytes):
+            _, _, data, future = heapq.heappop(self._queue)
+            batch.append((data, future))
+            size += len(data)
+        return batch
@@ -4,15 +4,20 @@ os.environ["QT_API"] = "PySide6"
 
 import numpy as np
 from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import Signal, Slot
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 from matplotlib import rcParams
 
+from handler.event_bus import DeliveryPolicy
 from handler.manager import CommManager
+from handler.topics import LIGHT_STABILITY, ScanResult
 
 
 class InterferenceFigureWidget(QWidget):
+    # 事件总线的回调不在 GUI 线程中，经信号转到 GUI 线程绘图
+    scan_received = Signal(object)
 
     def __init__(self, comm_manager: CommManager):
 
@@ -25,8 +30,10 @@ class InterferenceFigureWidget(QWidget):
         self._init_plot()
 
         self.comm_manager = comm_manager
-        self.comm_manager.light_stability_handler.add_callback(
-            self.on_receive_spectrum_data
+        self.scan_received.connect(self.on_receive_spectrum_data)
+        # 绘图跟不上时只画最新的结果
+        self._subscription = self.comm_manager.events.subscribe(
+            LIGHT_STABILITY, self.scan_received.emit, DeliveryPolicy.LATEST
         )
 
         # 数据缓存
@@ -104,9 +111,10 @@ class InterferenceFigureWidget(QWidget):
         self.line.set_data([], [])
         self.canvas.draw()
 
-    def on_receive_spectrum_data(self, data: map):
+    @Slot(object)
+    def on_receive_spectrum_data(self, result: ScanResult):
         # TODO: 数据类型转换可能有问题
-        interference_data = data.get("interference_data", np.array([]))
+        interference_data = result.interference_data
         x_data = list(range(interference_data.shape[0]))
         self.update_data(x_data, interference_data.tolist())
 
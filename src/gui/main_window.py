@@ -5,10 +5,16 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QMenu,
     QSplitter,
+    QLabel,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal, Slot
 
+from config.config import DEFAULT_DATA_PATH
+from handler.event_bus import DeliveryPolicy
+from handler.keepalive import LinkStats
 from handler.manager import CommManager
+from handler.supervisor import ConnectionState
+from handler.topics import CONNECTION_STATE, LINK_STATS
 from .control_widget import ControlWidget
 from .interference_widget import InterferenceFigureWidget
 from .spectrum_figure import SpectrumFigureWidget
@@ -21,8 +27,12 @@ from .signal_widget2 import SignalWidget
 
 
 class MainWindow(QMainWindow):
+    # 事件总线回调转到 GUI 线程
+    link_stats_received = Signal(object)
+    connection_state_changed = Signal(object)
+
     def __init__(self):
-        self.comm_manager = CommManager()
+        self.comm_manager = CommManager(archive_dir=DEFAULT_DATA_PATH)
 
         super().__init__()
         self.setup_ui()
@@ -87,7 +97,7 @@ class MainWindow(QMainWindow):
             action = settings_menu.addAction(action_name)
             action.triggered.connect(method)
 
-        self.hardware_dialog = HardwareSettingWidget(self)
+        self.hardware_dialog = HardwareSettingWidget(self.comm_manager, self)
         self.acquisition_dialog = CollectSettingWidget(self)
         self.communication_dialog = CommunicationSettingWidget(self.comm_manager)
 
@@ -114,4 +124,38 @@ class MainWindow(QMainWindow):
         self.signal_widget.exec()
 
     def setup_status_bar(self):
-        pass
+        # 链路质量，随每次保活发布的遥测刷新
+        self.link_label = QLabel("未连接")
+        self.statusBar().addPermanentWidget(self.link_label)
+        self.link_stats_received.connect(self.update_link_status)
+        self.connection_state_changed.connect(self.update_connection_state)
+        events = self.comm_manager.events
+        events.subscribe(LINK_STATS, self.link_stats_received.emit, DeliveryPolicy.LATEST)
+        events.subscribe(CONNECTION_STATE, self.connection_state_changed.emit)
+
+    @Slot(object)
+    def update_connection_state(self, state: ConnectionState):
+        if state is ConnectionState.RECONNECTING:
+            self.link_label.setText("连接中断，正在重连")
+            self.link_label.setStyleSheet("color: red;")
+        elif state is ConnectionState.DISCONNECTED:
+            self.link_label.setText("未连接")
+            self.link_label.setStyleSheet("")
+
+    @Slot(object)
+    def update_link_status(self, stats: LinkStats):
+        if not self.comm_manager.is_handshake_complete:
+            return
+        self.link_label.setText(
+            f"RTT p50 {stats.rtt_p50 * 1e3:.1f} ms  p99 {stats.rtt_p99 * 1e3:.1f} ms  "
+            f"接收 {stats.rx_bytes_per_second / 1024:.1f} KiB/s  "
+            f"发送 {stats.tx_bytes_per_second / 1024:.1f} KiB/s  "
+            f"CRC 错误 {stats.crc_error_rate:.2%}  "
+            f"保活丢失 {stats.lost}/{stats.sent}"
+        )
+        # 保活中断或出现校验错误时提示操作员检查线缆
+        stale = stats.last_response_age is None or stats.last_response_age > 3 * (
+            self.comm_manager.keepalive_interval or 1.0
+        )
+        degraded = stats.sent and (stale or stats.loss_rate > 0.01 or stats.crc_error_rate > 0)
+        self.link_label.setStyleSheet("color: red;" if degraded else "")
@@ -8,17 +8,22 @@ from PySide6.QtWidgets import (
     QPushButton,
     QHBoxLayout,
     QRadioButton,
+    QDoubleSpinBox,
 )
 
 from handler.manager import CommManager
+from storage.archive import ScanMetadata
 
 
 class HardwareSettingWidget(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, comm_manager: CommManager, parent=None):
         super().__init__(parent)
+        self.comm_manager = comm_manager
         self.setWindowTitle("硬件设置")
         self.resize(600, 400)
         self.setup_ui()
+        # 默认参数也写入归档
+        self.apply_settings()
 
     def setup_ui(self):
         # Main layout
@@ -55,6 +60,22 @@ class HardwareSettingWidget(QDialog):
         self.scan_mode_combo.setCurrentText("单向-单边")
         hardware_form.addRow(QLabel("扫描模式:"), self.scan_mode_combo)
 
+        # 参考激光波长
+        self.laser_wavelength_spinbox = QDoubleSpinBox()
+        self.laser_wavelength_spinbox.setRange(400, 2000)
+        self.laser_wavelength_spinbox.setDecimals(2)
+        self.laser_wavelength_spinbox.setValue(632.8)
+        self.laser_wavelength_spinbox.setSuffix(" nm")
+        hardware_form.addRow(QLabel("激光波长:"), self.laser_wavelength_spinbox)
+
+        # 仪器温度
+        self.temperature_spinbox = QDoubleSpinBox()
+        self.temperature_spinbox.setRange(-20, 80)
+        self.temperature_spinbox.setDecimals(1)
+        self.temperature_spinbox.setValue(25.0)
+        self.temperature_spinbox.setSuffix(" ℃")
+        hardware_form.addRow(QLabel("温度:"), self.temperature_spinbox)
+
         main_layout.addLayout(hardware_form)
 
         # Buttons
@@ -69,12 +90,22 @@ class HardwareSettingWidget(QDialog):
         self.save_button.clicked.connect(self.save_settings)
         self.cancel_button.clicked.connect(self.reject)
 
+    def apply_settings(self):
+        """把采集参数交给 CommManager，写入之后检测数据归档的文件头"""
+        self.comm_manager.set_acquisition_metadata(
+            ScanMetadata(
+                resolution=float(self.resolution_combo.currentText()),
+                velocity=float(self.velocity_combo.currentText()),
+                laser_wavelength=self.laser_wavelength_spinbox.value(),
+                temperature=self.temperature_spinbox.value(),
+            )
+        )
+
     def save_settings(self):
         # Placeholder for saving settings logic
-        resolution = self.resolution_combo.currentText()
-        velocity = self.velocity_combo.currentText()
         direction = self.direction_combo.currentText()
         scan_mode = self.scan_mode_combo.currentText()
+        self.apply_settings()
         print("Settings saved!")
         self.accept()
 
@@ -1,16 +1,21 @@
 import numpy as np
 
 from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import Signal, Slot
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib import rcParams
 
+from handler.event_bus import DeliveryPolicy
 from handler.manager import CommManager
+from handler.topics import LIGHT_STABILITY, ScanResult
 from comm.protocol.command import Command
 from handler.processor.fft_processor import FFTProcessor
 
 
 class SpectrumFigureWidget(QWidget):
+    # 事件总线的回调不在 GUI 线程中，经信号转到 GUI 线程绘图
+    scan_received = Signal(object)
     def __init__(self, comm_manager: CommManager):
 
         # 设置中文字体
@@ -22,8 +27,10 @@ class SpectrumFigureWidget(QWidget):
         self._init_plot()
 
         self.comm_manager = comm_manager
-        self.comm_manager.light_stability_handler.add_callback(
-            self.on_receive_spectrum_data
+        self.scan_received.connect(self.on_receive_spectrum_data)
+        # 绘图跟不上时只画最新的结果
+        self._subscription = self.comm_manager.events.subscribe(
+            LIGHT_STABILITY, self.scan_received.emit, DeliveryPolicy.LATEST
         )
 
         # 数据缓存
@@ -97,9 +104,10 @@ class SpectrumFigureWidget(QWidget):
         self.line.set_data([], [])
         self.canvas.draw()
 
-    def on_receive_spectrum_data(self, data: map):
+    @Slot(object)
+    def on_receive_spectrum_data(self, result: ScanResult):
         """处理接收到的光谱数据"""
-        spectrum_data = data.get("spectrum_data", np.array([]))
+        spectrum_data = result.spectrum_data
         x_data = list(range(spectrum_data.shape[0]))
         self.update_data(x_data, spectrum_data.tolist())
 
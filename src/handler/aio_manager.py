@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+
+from comm.protocol.parser import Command, MessageParser, RawMessage
+from comm.transport.transport import ITransport, priority_for
+from .base import MessageHandler
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCommManager:
+    """
+    asyncio 版本的通信管理器
+
+    解析、分发和所有超时都运行在同一个事件循环中，不为每个串口或每次重试创建线程，
+    一个事件循环可以同时管理多台仪器。传输层回调来自其它线程时会转交给事件循环处理。
+    """
+
+    def __init__(self, transport: ITransport, loop: asyncio.AbstractEventLoop = None):
+        self.transport = transport
+        self.transport.on_data_received(self._handle_raw_data)
+        self.transport.on_stream_gap(self._handle_stream_gap)
+
+        self._loop = loop
+        # 等待者在事件循环的后续回调中才读取数据，负载需要拷贝
+        self._parser = MessageParser()
+        self._message_handlers: dict[Command, MessageHandler] = {}
+        self._waiters: dict[Command, deque[asyncio.Future]] = defaultdict(deque)
+        self._handshake_complete = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    @property
+    def is_connected(self) -> bool:
+        return self.transport.is_open and self._handshake_complete
+
+    async def connect(
+        self,
+        timeout: float = 3.0,
+        retry_interval: float = 5.0,
+        retries: int = None,
+    ):
+        """打开传输并完成握手，retries 为空时一直重试"""
+        self._loop = asyncio.get_running_loop()
+        if not self.transport.is_open:
+            self.transport.open()
+        await self.handshake(timeout, retry_interval, retries)
+
+    def disconnect(self):
+        self._handshake_complete = False
+        for waiters in self._waiters.values():
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(ConnectionError("disconnected"))
+        self._waiters.clear()
+        if self.transport.is_open:
+            self.transport.close()
+
+    async def handshake(
+        self, timeout: float = 3.0, retry_interval: float = 5.0, retries: int = None
+    ):
+        attempt = 0
+        while True:
+            try:
+                await self.send_and_wait(
+                    Command.HANDSHAKE_REQ, Command.HANDSHAKE_RES, timeout
+                )
+                self._handshake_complete = True
+                logger.info(f"handshake complete after {attempt + 1} attempts")
+                return
+            except asyncio.TimeoutError:
+                attempt += 1
+                if retries is not None and attempt > retries:
+                    raise
+                logger.warning(
+                    f"Handshake timeout, {retry_interval} seconds later will retry {attempt + 1} times..."
+                )
+                await asyncio.sleep(retry_interval)
+
+    def register_handler(self, command: Command, handler: MessageHandler):
+        """注册消息处理器"""
+        self._message_handlers[command] = handler
+
+    def unregister_handler(self, command: Command):
+        """注销消息处理器"""
+        self._message_handlers.pop(command, None)
+
+    def send(self, command: Command, data: bytes = b"") -> asyncio.Future:
+        message_bytes = self._parser.pack(command, data)
+        future = self.transport.send_data(
+            message_bytes, priority_for(command, len(message_bytes))
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("send message: %s", command.name)
+        return future
+
+    async def send_and_wait(
+        self,
+        command: Command,
+        response_command: Command,
+        timeout: float = 3.0,
+        data: bytes = b"",
+    ) -> RawMessage:
+        """发送命令并等待指定类型的响应，超时抛出 asyncio.TimeoutError"""
+        waiter = self.loop.create_future()
+        # 先登记再发送，避免响应先于登记到达
+        self._waiters[response_command].append(waiter)
+        try:
+            self.send(command, data)
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            waiters = self._waiters.get(response_command)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _handle_raw_data(self, data: bytes):
+        if self._in_loop():
+            self._feed(data)
+        else:
+            self.loop.call_soon_threadsafe(self._feed, bytes(data))
+
+    def _handle_stream_gap(self):
+        if self._in_loop():
+            self._parser.reset()
+        else:
+            self.loop.call_soon_threadsafe(self._parser.reset)
+
+    def _feed(self, data: bytes):
+        self._parser.feed(data)
+        for raw_message in self._parser.parse():
+            self._process_message(raw_message)
+
+    def _process_message(self, msg: RawMessage):
+        """处理接收到的消息"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "received message: %s, payload length: %d", msg.command.name, len(msg.data)
+            )
+        if msg.command == Command.HANDSHAKE_REQ:
+            self.send(Command.HANDSHAKE_RES)
+
+        waiters = self._waiters.get(msg.command)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(msg)
+                break
+
+        handler = self._message_handlers.get(msg.command)
+        if handler:
+            handler.handle(msg)
@@ -0,0 +1,181 @@
+from concurrent.futures import Future
+from typing import Callable
+import logging
+import struct
+import threading
+
+from comm.protocol.parser import Command, RawMessage
+from comm.transport.serial import SerialTransport
+from .base import MessageHandler
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+BAUDRATE_FORMAT = struct.Struct(">I")
+# 验证帧负载，覆盖所有字节值，便于在错误的波特率下触发 CRC 校验失败
+PROBE_PATTERN = bytes(range(256))
+
+
+def pack_baudrate(baudrate: int) -> bytes:
+    return BAUDRATE_FORMAT.pack(baudrate)
+
+
+def unpack_baudrate(data: bytes) -> int:
+    if len(data) != BAUDRATE_FORMAT.size:
+        return 0
+    return BAUDRATE_FORMAT.unpack(data)[0]
+
+
+class BaudRateNegotiator(MessageHandler):
+    """
+    握手完成后协商更高的波特率（主机侧）
+
+    1. 以当前波特率发送 BAUD_RATE_REQ(目标波特率)
+    2. 下位机回复 BAUD_RATE_RES(接受的波特率，0 为拒绝)，该帧发出后下位机切换
+    3. 主机切换后发送 BAUD_RATE_PROBE，收到原样返回的 BAUD_RATE_PROBE_RES 即协商成功
+    4. 下位机在 fallback 时间内没有收到验证帧会自行退回原波特率
+    5. 验证帧重试 probe_retries 次仍失败时，下位机可能已经退回，也可能已经切换而只是响应丢失，
+       主机在原波特率和新波特率之间轮流验证，共 probe_rounds 轮，以得到响应的波特率为准；
+       全部失败时停在原波特率
+    """
+
+    def __init__(
+        self,
+        transport: SerialTransport,
+        send_message_callback: Callable[[Command, bytes], Future],
+        timeout: float = 1.0,
+        probe_timeout: float = 0.5,
+        probe_retries: int = 3,
+        probe_rounds: int = 4,
+        settle_time: float = 0.02,
+        scheduler: Scheduler = None,
+    ):
+        self._transport = transport
+        self._send_message = send_message_callback
+        self.timeout = timeout
+        self.probe_timeout = probe_timeout
+        self.probe_retries = probe_retries
+        self.probe_rounds = probe_rounds
+        # 收到响应后等待下位机完成切换的时间
+        self.settle_time = settle_time
+        self._scheduler = scheduler or default_scheduler()
+
+        self._lock = threading.Lock()
+        self._timer: TimerHandle = None
+        self._future: Future = None
+        self._initial_baudrate: int = None
+        self._fallback_baudrate: int = None
+        self._target_baudrate: int = None
+        self._probe_attempts = 0
+        self._probe_round = 0
+
+    @property
+    def baudrate(self) -> int:
+        return self._transport.baudrate
+
+    @property
+    def in_progress(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def start(self, baudrate: int) -> Future:
+        """开始协商，返回的 Future 在结束后给出实际使用的波特率"""
+        with self._lock:
+            if self.in_progress:
+                return self._future
+            future = self._future = Future()
+            if baudrate <= self.baudrate:
+                future.set_result(self.baudrate)
+                return future
+            if self._initial_baudrate is None:
+                self._initial_baudrate = self.baudrate
+            self._fallback_baudrate = self.baudrate
+            logger.info(f"propose baudrate {baudrate}")
+            self._send_message(Command.BAUD_RATE_REQ, pack_baudrate(baudrate))
+            self._arm(self.timeout, self._handle_request_timeout)
+            return future
+
+    def stop(self):
+        """停止协商，并把串口参数恢复为协商前的波特率（用于断开后重新连接）"""
+        with self._lock:
+            self._cancel_timer()
+            if self.in_progress:
+                self._future.set_exception(ConnectionError("baudrate negotiation stopped"))
+            if self._initial_baudrate is not None:
+                self._transport.set_baudrate(self._initial_baudrate)
+                self._initial_baudrate = None
+
+    def handle(self, msg: RawMessage):
+        with self._lock:
+            if not self.in_progress:
+                return
+            if msg.command == Command.BAUD_RATE_RES:
+                self._handle_response(unpack_baudrate(msg.data))
+            elif msg.command == Command.BAUD_RATE_PROBE_RES:
+                if bytes(msg.data) == PROBE_PATTERN:
+                    self._cancel_timer()
+                    logger.info(f"baudrate {self.baudrate} verified")
+                    self._future.set_result(self.baudrate)
+                else:
+                    logger.warning("baudrate probe response mismatch")
+
+    def _handle_response(self, baudrate: int):
+        self._cancel_timer()
+        if baudrate <= self.baudrate:
+            logger.info(f"device rejected baudrate, keep {self.baudrate}")
+            self._future.set_result(self.baudrate)
+            return
+        self._transport.set_baudrate(baudrate)
+        self._target_baudrate = baudrate
+        self._probe_attempts = 0
+        self._probe_round = 1
+        self._arm(self.settle_time, self._send_probe)
+
+    def _send_probe(self):
+        with self._lock:
+            if not self.in_progress:
+                return
+            self._probe_attempts += 1
+            self._send_message(Command.BAUD_RATE_PROBE, PROBE_PATTERN)
+            self._arm(self.probe_timeout, self._handle_probe_timeout)
+
+    def _handle_request_timeout(self):
+        with self._lock:
+            if not self.in_progress:
+                return
+            logger.warning(f"no baudrate response, keep {self.baudrate}")
+            self._future.set_result(self.baudrate)
+
+    def _handle_probe_timeout(self):
+        with self._lock:
+            if not self.in_progress:
+                return
+            if self._probe_attempts < self.probe_retries:
+                self._arm(0, self._send_probe)
+                return
+            if self._probe_round >= self.probe_rounds:
+                logger.warning(
+                    f"baudrate {self._target_baudrate} and {self._fallback_baudrate} "
+                    f"probes failed, fall back to {self._fallback_baudrate}"
+                )
+                self._transport.set_baudrate(self._fallback_baudrate)
+                self._future.set_result(self.baudrate)
+                return
+            other = (
+                self._fallback_baudrate
+                if self.baudrate == self._target_baudrate
+                else self._target_baudrate
+            )
+            logger.warning(f"baudrate {self.baudrate} probe failed, try {other}")
+            self._transport.set_baudrate(other)
+            self._probe_attempts = 0
+            self._probe_round += 1
+            self._arm(self.settle_time, self._send_probe)
+
+    def _arm(self, interval: float, callback: Callable[[], None]):
+        self._cancel_timer()
+        self._timer = self._scheduler.call_later(interval, callback)
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
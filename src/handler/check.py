@@ -1,37 +1,32 @@
-from typing import Callable
 from .base import MessageHandler
+from .event_bus import EventBus
+from .topics import CHECK_ACCURACY, CHECK_REPEATABILITY, CHECK_STABILITY
 from comm.protocol.parser import RawMessage, Command
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class CheckHandler(MessageHandler):
-    def __init__(self):
-        self._stability_callback = None
-        self._accuracy_callback = None
-        self._repeatability_callback = None
-
-    def set_stability_callback(self, callback: Callable[[bytes], None]):
-        self._stability_callback = callback
+# 检测类型 -> 发布的主题
+CHECK_TOPICS = {
+    0x01: CHECK_STABILITY,
+    0x02: CHECK_ACCURACY,
+    0x03: CHECK_REPEATABILITY,
+}
 
-    def set_accuracy_callback(self, callback: Callable[[bytes], None]):
-        self._accuracy_callback = callback
 
-    def set_repeatability_callback(self, callback: Callable[[bytes], None]):
-        self._repeatability_callback = callback
+class CheckHandler(MessageHandler):
+    def __init__(self, events: EventBus = None):
+        self.events = events or EventBus()
 
     def handle(self, msg: RawMessage):
         if msg.command == Command.CHECK_RESP:
             check_type = msg.data[0]
-            check_data = msg.data[1:]
+            check_data = bytes(msg.data[1:])
 
             try:
-                if check_type == 0x01 and self._stability_callback:
-                    self._stability_callback(check_data)
-                elif check_type == 0x02 and self._accuracy_callback:
-                    self._accuracy_callback(check_data)
-                elif check_type == 0x03 and self._repeatability_callback:
-                    self._repeatability_callback(check_data)
+                topic = CHECK_TOPICS.get(check_type)
+                if topic:
+                    self.events.publish(topic, check_data)
             except Exception as e:
                 logger.error(f"处理检查数据失败: {e}")
@@ -0,0 +1,78 @@
+from concurrent.futures import Future
+from typing import Callable
+import logging
+import threading
+
+from comm.protocol.codec import PayloadCodec
+from comm.protocol.parser import Command, RawMessage
+from .base import MessageHandler
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class CodecNegotiator(MessageHandler):
+    """
+    协商干涉图负载编码（主机侧）
+
+    发送 SET_CODEC_REQ(期望的编码)，下位机回复 SET_CODEC_RES(实际采用的编码，
+    不支持时为 FLOAT32)，收到响应后通过 on_change 通知各数据处理器切换解码方式。
+    """
+
+    def __init__(
+        self,
+        send_message_callback: Callable[[Command, bytes], Future],
+        on_change: Callable[[PayloadCodec], None],
+        timeout: float = 1.0,
+        scheduler: Scheduler = None,
+    ):
+        self._send_message = send_message_callback
+        self._on_change = on_change
+        self.timeout = timeout
+        self._scheduler = scheduler or default_scheduler()
+
+        self._lock = threading.Lock()
+        self._timer: TimerHandle = None
+        self._future: Future = None
+
+    def start(self, codec: PayloadCodec) -> Future:
+        """返回的 Future 给出下位机实际采用的编码，超时抛出 TimeoutError"""
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                self._future.set_exception(RuntimeError("superseded by a new codec request"))
+            future = self._future = Future()
+            self._cancel_timer()
+            self._send_message(Command.SET_CODEC_REQ, codec.to_bytes())
+            self._timer = self._scheduler.call_later(self.timeout, self._handle_timeout, future)
+            return future
+
+    def stop(self):
+        with self._lock:
+            self._cancel_timer()
+            if self._future is not None and not self._future.done():
+                self._future.set_exception(ConnectionError("codec negotiation stopped"))
+
+    def handle(self, msg: RawMessage):
+        if msg.command != Command.SET_CODEC_RES:
+            return
+        try:
+            codec = PayloadCodec.from_bytes(msg.data)
+        except ValueError as e:
+            logger.error(f"invalid codec response: {e}")
+            return
+        logger.info(f"payload codec {codec.kind.name} flags {codec.flags!r}")
+        self._on_change(codec)
+        with self._lock:
+            self._cancel_timer()
+            if self._future is not None and not self._future.done():
+                self._future.set_result(codec)
+
+    def _handle_timeout(self, future: Future):
+        with self._lock:
+            if not future.done():
+                future.set_exception(TimeoutError("no codec response"))
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
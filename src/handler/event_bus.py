@@ -0,0 +1,254 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+import enum
+import itertools
+import logging
+import threading
+import time
+
+from .executor import DispatchExecutor
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Topic(Generic[T]):
+    """事件主题，发布的事件必须是 event_type 的实例"""
+
+    def __init__(self, name: str, event_type: type[T]):
+        self.name = name
+        self.event_type = event_type
+
+    def __repr__(self) -> str:
+        return f"Topic({self.name!r}, {self.event_type.__name__})"
+
+
+class DeliveryPolicy(enum.Enum):
+    ALL = "all"  # 逐个投递每个事件，队列满时丢弃最早的事件
+    LATEST = "latest"  # 只投递最新的事件，未来得及投递的旧事件被覆盖
+    BATCH = "batch"  # 攒够 batch_size 个或等待 batch_interval 秒后以列表投递
+
+
+@dataclass
+class SubscriptionStats:
+    delivered: int = 0
+    dropped: int = 0
+    failed: int = 0
+    # 从发布到回调开始执行的延迟
+    latency_total: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency_total / self.delivered if self.delivered else 0.0
+
+
+@dataclass
+class TopicStats:
+    published: int = 0
+    subscribers: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    mean_latency: float = 0.0
+    max_latency: float = 0.0
+    # 首次发布以来的平均发布速率
+    events_per_second: float = 0.0
+
+
+class Subscription(Generic[T]):
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        topic: Topic[T],
+        callback: Callable,
+        policy: DeliveryPolicy,
+        maxsize: int,
+        batch_size: int,
+        batch_interval: float,
+    ):
+        self.topic = topic
+        self.callback = callback
+        self.policy = policy
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.name = f"{topic.name}#{next(self._ids)}"
+        self.stats = SubscriptionStats()
+        self.active = True
+        self._bus = bus
+        self._lock = threading.Lock()
+        # (发布时间, 事件)
+        self._queue: deque[tuple[float, T]] = deque()
+        self._maxsize = 1 if policy is DeliveryPolicy.LATEST else maxsize
+        self._scheduled = False
+        self._timer: TimerHandle = None
+
+    def cancel(self):
+        self._bus.unsubscribe(self)
+
+    def _offer(self, published: float, event: T):
+        with self._lock:
+            if not self.active:
+                return
+            if len(self._queue) >= self._maxsize:
+                self._queue.popleft()
+                self.stats.dropped += 1
+            self._queue.append((published, event))
+            if self._scheduled:
+                return
+            if self.policy is DeliveryPolicy.BATCH and len(self._queue) < self.batch_size:
+                if self._timer is None:
+                    self._timer = self._bus._scheduler.call_later(
+                        self.batch_interval, self._flush
+                    )
+                return
+            self._scheduled = True
+        self._bus._executor.submit(self.name, self._deliver)
+
+    def _flush(self):
+        with self._lock:
+            self._timer = None
+            if self._scheduled or not self._queue or not self.active:
+                return
+            self._scheduled = True
+        self._bus._executor.submit(self.name, self._deliver)
+
+    def _deliver(self):
+        with self._lock:
+            if self.policy is DeliveryPolicy.BATCH:
+                count = min(len(self._queue), self.batch_size)
+            else:
+                count = 1 if self._queue else 0
+            items = [self._queue.popleft() for _ in range(count)]
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if items and self.active:
+            now = time.perf_counter()
+            latency = now - items[0][0]
+            try:
+                if self.policy is DeliveryPolicy.BATCH:
+                    self.callback([event for _, event in items])
+                else:
+                    self.callback(items[0][1])
+            except Exception as e:
+                self.stats.failed += 1
+                logger.error(f"subscriber {self.name} failed: {e}")
+            stats = self.stats
+            stats.delivered += len(items)
+            stats.latency_total += latency * len(items)
+            stats.max_latency = max(stats.max_latency, latency)
+
+        with self._lock:
+            self._scheduled = False
+            if not self._queue or not self.active:
+                return
+            if self.policy is DeliveryPolicy.BATCH and len(self._queue) < self.batch_size:
+                if self._timer is None:
+                    self._timer = self._bus._scheduler.call_later(
+                        self.batch_interval, self._flush
+                    )
+                return
+            self._scheduled = True
+        # 重新排队，让其它订阅者有机会执行
+        self._bus._executor.submit(self.name, self._deliver)
+
+
+class EventBus:
+    """
+    带类型的发布/订阅总线
+
+    每个订阅者有自己的有界队列和投递方式（DeliveryPolicy），回调在 DispatchExecutor 中按订阅者分通道执行，
+    同一订阅者的事件按发布顺序投递，慢的订阅者只会丢弃自己的事件而不影响其它订阅者和发布方。
+    publish() 只做入队，可以在解析或数据处理线程中直接调用。回调不在 GUI 线程中执行，
+    界面组件应通过 Qt 信号转到 GUI 线程更新。
+    """
+
+    def __init__(self, executor: DispatchExecutor = None, scheduler: Scheduler = None):
+        self._executor = executor or DispatchExecutor(name="event bus")
+        self._scheduler = scheduler or default_scheduler()
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, list[Subscription]] = {}
+        self._published: dict[str, int] = {}
+        self._first_published: dict[str, float] = {}
+        # 已取消订阅的统计仍计入主题统计
+        self._retired: dict[str, list[SubscriptionStats]] = {}
+
+    def subscribe(
+        self,
+        topic: Topic[T],
+        callback: Callable,
+        policy: DeliveryPolicy = DeliveryPolicy.ALL,
+        maxsize: int = 64,
+        batch_size: int = 16,
+        batch_interval: float = 0.1,
+    ) -> Subscription[T]:
+        """
+        订阅主题，BATCH 方式下 callback 收到事件列表，其余方式收到单个事件
+        maxsize: 待投递事件上限，超出时丢弃最早的事件（LATEST 固定为 1）
+        """
+        if policy is DeliveryPolicy.BATCH:
+            maxsize = max(maxsize, batch_size)
+        subscription = Subscription(
+            self, topic, callback, policy, maxsize, batch_size, batch_interval
+        )
+        with self._lock:
+            self._subscriptions.setdefault(topic.name, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic.name, [])
+            if subscription not in subscriptions:
+                return
+            subscriptions.remove(subscription)
+            self._retired.setdefault(subscription.topic.name, []).append(subscription.stats)
+        with subscription._lock:
+            subscription.active = False
+            subscription._queue.clear()
+            if subscription._timer is not None:
+                subscription._timer.cancel()
+                subscription._timer = None
+
+    def has_subscribers(self, topic: Topic) -> bool:
+        """没有订阅者时发布方可以省去准备事件数据"""
+        return bool(self._subscriptions.get(topic.name))
+
+    def publish(self, topic: Topic[T], event: T):
+        if not isinstance(event, topic.event_type):
+            raise TypeError(
+                f"{topic.name} expects {topic.event_type.__name__}, got {type(event).__name__}"
+            )
+        published = time.perf_counter()
+        with self._lock:
+            self._published[topic.name] = self._published.get(topic.name, 0) + 1
+            self._first_published.setdefault(topic.name, published)
+            subscriptions = tuple(self._subscriptions.get(topic.name, ()))
+        for subscription in subscriptions:
+            subscription._offer(published, event)
+
+    def stats(self) -> dict[str, TopicStats]:
+        now = time.perf_counter()
+        with self._lock:
+            names = set(self._published) | set(self._subscriptions)
+            result = {}
+            for name in names:
+                subscriptions = self._subscriptions.get(name, [])
+                all_stats = [s.stats for s in subscriptions] + self._retired.get(name, [])
+                stats = TopicStats(
+                    published=self._published.get(name, 0), subscribers=len(subscriptions)
+                )
+                stats.delivered = sum(s.delivered for s in all_stats)
+                stats.dropped = sum(s.dropped for s in all_stats)
+                if stats.delivered:
+                    stats.mean_latency = sum(s.latency_total for s in all_stats) / stats.delivered
+                stats.max_latency = max((s.max_latency for s in all_stats), default=0.0)
+                elapsed = now - self._first_published.get(name, now)
+                if elapsed > 0:
+                    stats.events_per_second = stats.published / elapsed
+                result[name] = stats
+        return result
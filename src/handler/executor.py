@@ -0,0 +1,196 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from threading import Condition
+from typing import Callable
+import enum
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Overflow(enum.Enum):
+    BLOCK = "block"  # 队列满时提交方等待，数据不丢失
+    DROP_OLDEST = "drop_oldest"  # 队列满时丢弃最早的任务，只用于明确允许丢失的通道（如遥测）
+
+
+@dataclass
+class LaneStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    # 队列满时被丢弃的最早的任务（DROP_OLDEST）
+    dropped: int = 0
+    # 队列满时提交方等待的次数和总时间（BLOCK）
+    blocked: int = 0
+    blocked_time: float = 0.0
+    pending: int = 0
+    peak_pending: int = 0
+    busy_time: float = 0.0
+    max_handle_time: float = 0.0
+    slow_calls: int = 0
+
+
+class _Lane:
+    __slots__ = ("name", "overflow", "tasks", "running", "slow", "backlogged", "stats")
+
+    def __init__(self, name: str, overflow: Overflow):
+        self.name = name
+        self.overflow = overflow
+        self.tasks: deque[tuple[Callable, tuple]] = deque()
+        self.running = False
+        self.slow = False
+        self.backlogged = False
+        self.stats = LaneStats()
+
+
+class DispatchExecutor:
+    """
+    消息处理执行器，让解析线程只负责解析
+
+    每个通道（通常对应一种消息）有独立的有界队列，同一通道的任务按提交顺序逐个执行，不同通道在工作线程池中并行。
+    工作线程每执行完一个任务就把通道重新排到线程池队尾，一个慢的处理器最多占用一个工作线程。
+    通道队列满时默认让提交方等待（对解析线程形成背压，数据不丢失），set_overflow() 可以把
+    明确允许丢失的通道设为丢弃最早的任务。单次处理超过 slow_threshold 秒或队列积压的通道会被记录并告警。
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 64,
+        slow_threshold: float = 0.2,
+        name: str = "dispatch",
+    ):
+        self.max_pending = max_pending
+        self.slow_threshold = slow_threshold
+        self._name = name
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix=name)
+        self._cond = Condition()
+        self._lanes: dict[str, _Lane] = {}
+        self._overflow: dict[str, Overflow] = {}
+        self._active = 0
+        self._is_shutdown = False
+
+    def set_overflow(self, lane: str, overflow: Overflow):
+        """设置通道队列满时的处理方式"""
+        with self._cond:
+            self._overflow[lane] = overflow
+            if lane in self._lanes:
+                self._lanes[lane].overflow = overflow
+
+    def submit(self, lane: str, fn: Callable, *args) -> bool:
+        """
+        把任务放入通道，返回 False 表示因通道积压丢弃了更早的任务，或执行器已关闭
+
+        BLOCK 通道满时等待到有空位，不能在同一通道的任务中向该通道提交。
+        """
+        with self._cond:
+            entry = self._lanes.get(lane)
+            if entry is None:
+                entry = self._lanes[lane] = _Lane(
+                    lane, self._overflow.get(lane, Overflow.BLOCK)
+                )
+            stats = entry.stats
+            accepted = True
+            if len(entry.tasks) >= self.max_pending and not self._is_shutdown:
+                if not entry.backlogged:
+                    entry.backlogged = True
+                    action = "waiting" if entry.overflow is Overflow.BLOCK else "dropping oldest"
+                    logger.warning(f"{lane} is backlogged, {action}")
+                if entry.overflow is Overflow.BLOCK:
+                    start = time.perf_counter()
+                    self._cond.wait_for(
+                        lambda: len(entry.tasks) < self.max_pending or self._is_shutdown
+                    )
+                    stats.blocked += 1
+                    stats.blocked_time += time.perf_counter() - start
+                else:
+                    entry.tasks.popleft()
+                    stats.dropped += 1
+                    accepted = False
+            if self._is_shutdown:
+                return False
+            entry.tasks.append((fn, args))
+            stats.submitted += 1
+            stats.pending = len(entry.tasks)
+            stats.peak_pending = max(stats.peak_pending, stats.pending)
+            if entry.running:
+                return accepted
+            entry.running = True
+            self._active += 1
+        self._pool.submit(self._run, entry)
+        return accepted
+
+    def slow_lanes(self) -> list[str]:
+        """当前处理过慢或有积压的通道"""
+        with self._cond:
+            return [name for name, lane in self._lanes.items() if lane.slow or lane.backlogged]
+
+    def stats(self) -> dict[str, LaneStats]:
+        with self._cond:
+            return {name: replace(lane.stats) for name, lane in self._lanes.items()}
+
+    def join(self, timeout: float = None) -> bool:
+        """等待所有已提交的任务执行完毕"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._active == 0, timeout)
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._is_shutdown = True
+            for lane in self._lanes.values():
+                lane.tasks.clear()
+            self._cond.notify_all()
+        self._pool.shutdown(wait)
+
+    def _run(self, lane: _Lane):
+        with self._cond:
+            if not lane.tasks:
+                # 执行器关闭时任务已被清空
+                lane.running = False
+                self._active -= 1
+                self._cond.notify_all()
+                return
+            fn, args = lane.tasks.popleft()
+            lane.stats.pending = len(lane.tasks)
+            if lane.overflow is Overflow.BLOCK and len(lane.tasks) == self.max_pending - 1:
+                # 唤醒等待空位的提交方
+                self._cond.notify_all()
+        start = time.perf_counter()
+        failed = False
+        try:
+            fn(*args)
+        except Exception as e:
+            failed = True
+            logger.error(f"{lane.name} handler failed: {e}")
+        elapsed = time.perf_counter() - start
+
+        with self._cond:
+            stats = lane.stats
+            stats.completed += 1
+            stats.failed += failed
+            stats.busy_time += elapsed
+            stats.max_handle_time = max(stats.max_handle_time, elapsed)
+            if elapsed > self.slow_threshold:
+                stats.slow_calls += 1
+                if not lane.slow:
+                    lane.slow = True
+                    logger.warning(f"{lane.name} is slow, handler took {elapsed * 1e3:.1f} ms")
+            else:
+                lane.slow = False
+            if not lane.tasks:
+                lane.backlogged = False
+                lane.running = False
+                self._active -= 1
+                self._cond.notify_all()
+                return
+        try:
+            self._pool.submit(self._run, lane)
+        except RuntimeError:
+            # 执行器已关闭
+            with self._cond:
+                lane.tasks.clear()
+                lane.running = False
+                self._active -= 1
+                self._cond.notify_all()
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+from typing import Callable
+import logging
+import threading
+
+from comm.protocol.fragment import Reassembler, pack_nack
+from comm.protocol.parser import Command, RawMessage
+from .base import MessageHandler
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentHandler(MessageHandler):
+    """
+    接收 FRAGMENT 帧并还原为原消息（主机侧）
+
+    收到最后一个分片仍有缺失，或 nack_timeout 内没有新的分片到达时，发送 FRAGMENT_NACK
+    只请求缺失的分片；请求 max_nacks 次仍不完整则放弃该传输。还原的消息交给 on_message，
+    与未分片的消息走相同的分发流程。
+    """
+
+    def __init__(
+        self,
+        send_message_callback: Callable[[Command, bytes], Future],
+        on_message: Callable[[RawMessage], None],
+        reassembler: Reassembler = None,
+        nack_timeout: float = 0.5,
+        max_nacks: int = 5,
+        scheduler: Scheduler = None,
+    ):
+        self._send_message = send_message_callback
+        self._on_message = on_message
+        self.reassembler = reassembler or Reassembler()
+        self.nack_timeout = nack_timeout
+        self.max_nacks = max_nacks
+        self._scheduler = scheduler or default_scheduler()
+
+        self._lock = threading.Lock()
+        self._timers: dict[int, TimerHandle] = {}
+
+    def handle(self, msg: RawMessage):
+        if msg.command != Command.FRAGMENT:
+            return
+        with self._lock:
+            try:
+                header, message = self.reassembler.add(msg.data, msg.seq)
+            except ValueError as e:
+                logger.error(f"invalid fragment: {e}")
+                return
+            transfer_id = header.transfer_id
+            if message is None:
+                if transfer_id in self.reassembler.pending:
+                    if header.index == header.count - 1:
+                        self._request_missing(transfer_id)
+                    else:
+                        self._arm(transfer_id)
+                return
+            self._cancel(transfer_id)
+        self._on_message(message)
+
+    def reset(self):
+        """连接断开或数据流中断时丢弃所有未完成的传输"""
+        with self._lock:
+            for transfer_id in list(self._timers):
+                self._cancel(transfer_id)
+            self.reassembler.clear()
+
+    def _request_missing(self, transfer_id: int):
+        missing = self.reassembler.missing(transfer_id)
+        if not missing:
+            return
+        if self.reassembler.note_nack(transfer_id) > self.max_nacks:
+            logger.warning(f"transfer {transfer_id} still missing {len(missing)} fragments, drop it")
+            self._cancel(transfer_id)
+            self.reassembler.drop(transfer_id)
+            return
+        logger.info(f"request {len(missing)} missing fragments of transfer {transfer_id}")
+        self._send_message(Command.FRAGMENT_NACK, pack_nack(transfer_id, missing))
+        self._arm(transfer_id)
+
+    def _handle_timeout(self, transfer_id: int, timer: TimerHandle):
+        with self._lock:
+            if self._timers.get(transfer_id) is not timer:
+                return
+            del self._timers[transfer_id]
+            self._request_missing(transfer_id)
+
+    def _arm(self, transfer_id: int):
+        # 调用时持有 self._lock，回调取得锁时 timer 已赋值
+        self._cancel(transfer_id)
+        timer = self._scheduler.call_later(
+            self.nack_timeout, lambda: self._handle_timeout(transfer_id, timer)
+        )
+        self._timers[transfer_id] = timer
+
+    def _cancel(self, transfer_id: int):
+        timer = self._timers.pop(transfer_id, None)
+        if timer:
+            timer.cancel()
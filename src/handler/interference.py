@@ -1,54 +1,62 @@
 import logging
 import struct
 import numpy as np
-from typing import Callable
 
 
 from .base import MessageHandler
+from .event_bus import EventBus
+from .topics import INTERFEROGRAM
 from comm.protocol.parser import RawMessage, Command
+from comm.protocol.codec import CodecKind, PayloadCodec, float32_codec
+from comm.protocol.payload import PayloadDecoder, float32_decoder
 
 logger = logging.getLogger(__name__)
 
 
 class InterferenceHandler(MessageHandler):
-    def __init__(self):
-        self._callbacks: list[Callable[[map], None]] = []
-
-    def add_callback(self, callback: Callable[[map], None]):
-        if callback not in self._callbacks:
-            self._callbacks.append(callback)
-
-    def remove_callback(self, callback: Callable[[map], None]):
-        if callback in self._callbacks:
-            self._callbacks.remove(callback)
-
-    def clear_callbacks(self):
-        self._callbacks.clear()
-
-    def _run_callbacks(self, data: map):
-        for callback in self._callbacks:
-            try:
-                callback(data)
-            except Exception as e:
-                logger.error(f"failed to run callback {callback.__name__}: {e}")
+    def __init__(self, decoder: PayloadDecoder = float32_decoder, events: EventBus = None):
+        """events: 处理结果发布到的事件总线，订阅者通过总线接收数据"""
+        self.events = events or EventBus()
+        self._decoder = decoder
+        self._codec = float32_codec
+        # FLOAT32 负载解码用的可复用数组，同一处理器的消息在一个通道中依次处理
+        self._buffer: np.ndarray = None
+
+    @property
+    def codec(self) -> PayloadCodec:
+        return self._codec
+
+    def set_codec(self, codec: PayloadCodec):
+        """切换负载解码方式，FLOAT32 使用 decoder，其余按量化负载头部解码"""
+        self._codec = codec
 
     def handle(self, msg: RawMessage):
         if msg.command in [Command.CHECK_RESP]:
             try:
-                points = self._parse_spectrum_data(msg.data)
-                data = np.array(points, dtype=np.float32)
-                self._run_callbacks(data)
+                data = self._parse_spectrum_data(msg.data)
+                if self.events.has_subscribers(INTERFEROGRAM):
+                    self.events.publish(INTERFEROGRAM, self._detach(data))
             except Exception as e:
                 logger.error(f"failed to handle message {msg.command}: {e}")
 
-    def _parse_spectrum_data(self, data: bytes) -> list[float]:
-        if len(data) % 4 != 0:
-            raise ValueError(
-                f"data length must be a multiple of 4, got {len(data)} bytes"
-            )
-
-        count = len(data) // 4
-        return list(struct.unpack(f">{count}f", data))
+    def _parse_spectrum_data(self, data: bytes) -> np.ndarray:
+        """
+        负载直接解码为本机字节序 float32 数组
+
+        FLOAT32 负载写入可复用数组，结果只在下一次解码前有效，需要保留时用 _detach() 拷贝
+        """
+        if self._codec.kind == CodecKind.FLOAT32:
+            count = self._decoder.count(data)
+            if self._buffer is None or len(self._buffer) < count:
+                self._buffer = self._decoder.buffer(count)
+            return self._decoder.decode(data, out=self._buffer)
+        return self._codec.decode(data)
+
+    def _detach(self, samples: np.ndarray) -> np.ndarray:
+        """交给其它线程或归档的数据从可复用数组中拷贝出来"""
+        if self._buffer is not None and np.may_share_memory(samples, self._buffer):
+            return samples.copy()
+        return samples
 
 
 import numpy as np
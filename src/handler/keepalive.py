@@ -0,0 +1,190 @@
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+
+from comm.protocol.parser import Command, RawMessage
+from .base import MessageHandler
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+# 请求：主机发送时的单调时钟纳秒数；响应：带回的主机时间戳、下位机时间戳
+KEEPALIVE_REQ_FORMAT = struct.Struct(">Q")
+KEEPALIVE_RES_FORMAT = struct.Struct(">QQ")
+
+
+@dataclass
+class LinkCounters:
+    """连接建立以来的累计收发计数"""
+
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    frames: int = 0
+    bad_frames: int = 0
+
+
+@dataclass
+class LinkStats:
+    # 最近 window 个保活往返时间的分位数（秒）
+    samples: int = 0
+    rtt_p50: float = 0.0
+    rtt_p95: float = 0.0
+    rtt_p99: float = 0.0
+    rtt_max: float = 0.0
+    sent: int = 0
+    lost: int = 0
+    # 统计窗口内的平均速率
+    rx_bytes_per_second: float = 0.0
+    tx_bytes_per_second: float = 0.0
+    frames_per_second: float = 0.0
+    # 统计窗口内校验失败的帧占比
+    crc_error_rate: float = 0.0
+    # 距最近一次保活响应的秒数，尚未收到时为 None
+    last_response_age: float = None
+
+    @property
+    def loss_rate(self) -> float:
+        return self.lost / self.sent if self.sent else 0.0
+
+
+class LinkMonitor(MessageHandler):
+    """
+    周期性保活并统计链路质量
+
+    每隔 interval 秒发送一次 KEEPALIVE_REQ，用响应中带回的时间戳计算往返时间，timeout 内没有响应的
+    记为丢失。每次发送时对 counters() 给出的累计计数采样，吞吐量和 CRC 错误率按最近 window 次采样计算，
+    线缆或接口逐渐劣化时可以在长时间测量失败之前发现。
+    """
+
+    def __init__(
+        self,
+        send_message_callback: Callable[[Command, bytes], Future],
+        counters: Callable[[], LinkCounters],
+        interval: float = 1.0,
+        timeout: float = 3.0,
+        window: int = 120,
+        scheduler: Scheduler = None,
+        on_stats: Callable[[LinkStats], None] = None,
+    ):
+        self._send_message = send_message_callback
+        self._counters = counters
+        self.interval = interval
+        self.timeout = timeout
+        self._scheduler = scheduler or default_scheduler()
+        # 每次发送保活后以最新统计回调，用于发布遥测
+        self._on_stats = on_stats
+
+        self._lock = threading.Lock()
+        self._job: TimerHandle = None
+        self._rtts: deque[float] = deque(maxlen=window)
+        self._samples: deque[tuple[float, LinkCounters]] = deque(maxlen=window + 1)
+        # 在途的保活请求：发送时间戳（纳秒）
+        self._outstanding: deque[int] = deque()
+        self._sent = 0
+        self._lost = 0
+        self._last_response: float = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._job is not None
+
+    def start(self):
+        with self._lock:
+            if self._job is not None:
+                return
+            self._reset()
+            self._samples.append((time.monotonic(), self._counters()))
+            self._job = self._scheduler.call_every(self.interval, self._tick)
+
+    def stop(self):
+        with self._lock:
+            if self._job is not None:
+                self._job.cancel()
+                self._job = None
+
+    def handle(self, msg: RawMessage):
+        if msg.command == Command.KEEPALIVE_RES:
+            if len(msg.data) != KEEPALIVE_RES_FORMAT.size:
+                logger.warning(f"invalid keepalive response length {len(msg.data)}")
+                return
+            sent_ns, _ = KEEPALIVE_RES_FORMAT.unpack(msg.data)
+            self._handle_response(sent_ns)
+        elif msg.command == Command.KEEPALIVE_REQ:
+            # 对端发起的保活，原样带回其时间戳
+            self._send_message(
+                Command.KEEPALIVE_RES,
+                KEEPALIVE_RES_FORMAT.pack(
+                    KEEPALIVE_REQ_FORMAT.unpack(msg.data)[0], time.monotonic_ns()
+                ),
+            )
+
+    def stats(self) -> LinkStats:
+        with self._lock:
+            stats = LinkStats(sent=self._sent, lost=self._lost, samples=len(self._rtts))
+            if self._rtts:
+                rtts = np.fromiter(self._rtts, dtype=float, count=len(self._rtts))
+                stats.rtt_p50, stats.rtt_p95, stats.rtt_p99 = np.percentile(rtts, [50, 95, 99])
+                stats.rtt_max = float(rtts.max())
+            if self._last_response is not None:
+                stats.last_response_age = time.monotonic() - self._last_response
+            samples = list(self._samples)
+        # 最新的计数不等到下次发送
+        if samples:
+            samples.append((time.monotonic(), self._counters()))
+            (start, first), (end, last) = samples[0], samples[-1]
+            elapsed = end - start
+            if elapsed > 0:
+                stats.rx_bytes_per_second = (last.rx_bytes - first.rx_bytes) / elapsed
+                stats.tx_bytes_per_second = (last.tx_bytes - first.tx_bytes) / elapsed
+                stats.frames_per_second = (last.frames - first.frames) / elapsed
+            bad = last.bad_frames - first.bad_frames
+            total = last.frames - first.frames + bad
+            stats.crc_error_rate = bad / total if total else 0.0
+        return stats
+
+    def _tick(self):
+        now_ns = time.monotonic_ns()
+        with self._lock:
+            if self._job is None:
+                return
+            # 超时未响应的请求记为丢失
+            deadline = now_ns - int(self.timeout * 1e9)
+            while self._outstanding and self._outstanding[0] < deadline:
+                self._outstanding.popleft()
+                self._lost += 1
+                logger.warning(f"keepalive lost, {self._lost} of {self._sent} so far")
+            self._outstanding.append(now_ns)
+            self._sent += 1
+            self._samples.append((time.monotonic(), self._counters()))
+        self._send_message(Command.KEEPALIVE_REQ, KEEPALIVE_REQ_FORMAT.pack(now_ns))
+        if self._on_stats:
+            self._on_stats(self.stats())
+
+    def _handle_response(self, sent_ns: int):
+        now_ns = time.monotonic_ns()
+        with self._lock:
+            try:
+                self._outstanding.remove(sent_ns)
+            except ValueError:
+                # 已按丢失计数的迟到响应，或不是本连接发出的请求
+                return
+            # 更早的请求如果仍在途，说明其响应已经丢失
+            while self._outstanding and self._outstanding[0] < sent_ns:
+                self._outstanding.popleft()
+                self._lost += 1
+            self._rtts.append((now_ns - sent_ns) / 1e9)
+            self._last_response = time.monotonic()
+
+    def _reset(self):
+        self._rtts.clear()
+        self._samples.clear()
+        self._outstanding.clear()
+        self._sent = self._lost = 0
+        self._last_response = None
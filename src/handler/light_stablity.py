@@ -1,39 +1,106 @@
+from dataclasses import replace
 import logging
+import os
+import threading
 import time
-import numpy as np
 
 from comm.protocol.parser import RawMessage, Command
+from storage.archive import ScanArchiveWriter, ScanMetadata
+from .event_bus import EventBus
 from .interference import InterferenceHandler
 from .processor.fft_processor import FFTProcessor
+from .topics import ARCHIVE_FAILED, LIGHT_STABILITY, ScanResult
 
 logger = logging.getLogger(__name__)
 
+# 归档写入失败后，间隔多久（秒）再新建归档，避免磁盘满时每次检测都新建文件
+ARCHIVE_RETRY_INTERVAL = 10.0
+
 
 class LightStabilityHandler(InterferenceHandler):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, events: EventBus = None, archive_dir: str = None):
+        """archive_dir: 检测数据的归档目录，None 表示不保存"""
+        super().__init__(events=events)
         self._fft_processor = FFTProcessor()
+        self.archive_dir = archive_dir
+        # 新归档使用的采集参数，由 set_metadata() 设置
+        self.metadata = ScanMetadata()
+        self._archive_lock = threading.Lock()
+        self._archive: ScanArchiveWriter = None
+        self._archive_retry_at = 0.0
+
+    @property
+    def archive(self) -> ScanArchiveWriter:
+        return self._archive
+
+    def set_metadata(self, metadata: ScanMetadata):
+        """设置采集参数，参数变化时结束当前归档，之后的检测写入新归档"""
+        with self._archive_lock:
+            changed = replace(metadata, created=0) != replace(self.metadata, created=0)
+            self.metadata = replace(metadata)
+            archive = self._take_archive() if changed else None
+        if archive:
+            archive.close()
+
+    def close_archive(self):
+        """结束当前归档，下次检测时新建"""
+        with self._archive_lock:
+            archive = self._take_archive()
+        if archive:
+            archive.close()
+
+    def _take_archive(self) -> ScanArchiveWriter:
+        # 关闭归档要等待写入线程，调用方在锁外关闭，避免阻塞 handle()
+        archive, self._archive = self._archive, None
+        return archive
+
+    def _open_archive(self) -> ScanArchiveWriter:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stem = os.path.join(
+            self.archive_dir, f"light_stability_{time.strftime('%Y%m%d_%H%M%S')}"
+        )
+        path, n = f"{stem}.scan", 1
+        while os.path.exists(path):
+            path, n = f"{stem}_{n}.scan", n + 1
+        metadata = replace(self.metadata, created=time.time())
+        logger.info(f"archiving light stability scans to {path}")
+        return ScanArchiveWriter(path, metadata, name="light stability archive")
+
+    def _archive_scan(self, samples, timestamp: float):
+        failed = None
+        with self._archive_lock:
+            if self._archive is not None and self._archive.failed:
+                # 写入失败的归档不再接受数据，换新文件，避免之后的检测全部被丢弃
+                failed = self._take_archive()
+                self._archive_retry_at = time.monotonic() + ARCHIVE_RETRY_INTERVAL
+            if self._archive is None and time.monotonic() >= self._archive_retry_at:
+                self._archive = self._open_archive()
+            if self._archive is not None:
+                self._archive.append(samples, timestamp)
+        if failed is not None:
+            logger.error(
+                f"archive {failed.path} failed after {failed.stats.scans} scans, "
+                f"new archive in {ARCHIVE_RETRY_INTERVAL:.0f}s"
+            )
+            failed.close()
+            self.events.publish(ARCHIVE_FAILED, failed.path)
 
     def handle(self, msg: RawMessage):
         if msg.command != Command.CHECK_LIGHT_STABILITY_RES:
             return
         try:
-            points = self._parse_spectrum_data(msg.data)
-            interference_data = np.array(points, dtype=np.float32)
+            samples = self._parse_spectrum_data(msg.data)
 
-            spectrum_data = self._fft_processor.process(interference_data)
+            spectrum_data = self._fft_processor.process(samples)
 
-            # save data
-            filename = f"data/interference_{time.strftime('%Y%m%d_%H%M%S')}.txt"
-            np.savetxt(filename, interference_data, fmt="%.6f", delimiter=",")
+            if not self.archive_dir and not self.events.has_subscribers(LIGHT_STABILITY):
+                return
+            interference_data = self._detach(samples)
+            result = ScanResult(interference_data, spectrum_data)
+            if self.archive_dir:
+                self._archive_scan(interference_data, result.timestamp)
 
-            # run callbacks
-            self._run_callbacks(
-                {
-                    "interference_data": interference_data,
-                    "spectrum_data": spectrum_data,
-                }
-            )
+            self.events.publish(LIGHT_STABILITY, result)
         except Exception as e:
             logger.error(f"failed to handle message {msg.command}: {e}")
 
@@ -1,26 +1,58 @@
-from comm.transport.transport import ITransport
+from comm.transport.transport import ITransport, priority_for
 from comm.transport.serial import SerialTransport
 from comm.protocol.parser import MessageParser
 from comm.protocol.parser import RawMessage
 from comm.protocol.parser import Command
+from comm.protocol.command import CONTROL_COMMANDS
+from comm.protocol.codec import PayloadCodec
+from storage.archive import ScanMetadata
+from concurrent.futures import Future
+from functools import partial
 import threading
 import logging
 import time
 from typing import Callable
 from .base import MessageHandler
+from .baudrate import BaudRateNegotiator
+from .codec import CodecNegotiator
+from .event_bus import EventBus
+from .executor import DispatchExecutor
+from .fragment import FragmentHandler
+from .keepalive import LinkCounters, LinkMonitor, LinkStats
+from .request import RequestTracker
+from .supervisor import ConnectionState, ConnectionSupervisor
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
 from .light_stablity import LightStabilityHandler
+from .topics import CONNECTION_STATE, LINK_STATS
 
 logger = logging.getLogger(__name__)
 
+# 协议控制消息在解析线程中直接处理，其余消息交给 DispatchExecutor
+INLINE_COMMANDS = CONTROL_COMMANDS | {Command.FRAGMENT}
+# 与数据消息共用通道的消息：编码切换排在之前收到的干涉图之后生效，
+# 已排队的数据仍按原编码解码
+SHARED_LANES = {Command.SET_CODEC_RES: Command.CHECK_LIGHT_STABILITY_RES}
+
 
 class HandshakeManager(MessageHandler):
-    def __init__(self, send_message_callback: Callable[[Command, bytes], None]):
+    def __init__(
+        self,
+        send_message_callback: Callable[[Command, bytes], None],
+        on_complete: Callable[[], None] = None,
+        scheduler: Scheduler = None,
+    ):
         self._send_message = send_message_callback
+        self._on_complete = on_complete
+        self._scheduler = scheduler or default_scheduler()
 
         self._handshake_complete = False
-        self._handshake_timer = None
+        self._handshake_timer: TimerHandle = None
         self._retry_count = 0
 
+    @property
+    def is_complete(self) -> bool:
+        return self._handshake_complete
+
     def start(self):
         """开始握手过程"""
         if self._handshake_complete:
@@ -39,10 +71,13 @@ class HandshakeManager(MessageHandler):
     def handle(self, msg: RawMessage):
         """处理握手响应"""
         if msg.command == Command.HANDSHAKE_RES:
+            completed = not self._handshake_complete
             self._handshake_complete = True
             if self._handshake_timer:
                 self._handshake_timer.cancel()
                 self._handshake_timer = None
+            if completed and self._on_complete:
+                self._on_complete()
         elif msg.command == Command.HANDSHAKE_REQ:
             self._send_message(Command.HANDSHAKE_RES, b"")
 
@@ -56,8 +91,7 @@ class HandshakeManager(MessageHandler):
         # 发送握手命令
         self._send_message(Command.HANDSHAKE_REQ, b"")
         # 启动握手超时检查定时器
-        self._handshake_timer = threading.Timer(3.0, self._handle_timeout)
-        self._handshake_timer.start()
+        self._handshake_timer = self._scheduler.call_later(3.0, self._handle_timeout)
 
     def _handle_timeout(self):
         """处理握手超时"""
@@ -67,28 +101,108 @@ class HandshakeManager(MessageHandler):
                 f"Handshake timeout, 5 seconds later will retry {self._retry_count + 1} times..."
             )
             # 5秒后重试
-            self._handshake_timer = threading.Timer(5.0, self._start_handshake)
-            self._handshake_timer.start()
+            self._handshake_timer = self._scheduler.call_later(5.0, self._start_handshake)
 
 
 class CommManager:
-    def __init__(self):
-        self.transport = SerialTransport()
+    def __init__(
+        self,
+        transport: ITransport = None,
+        baudrate: int = None,
+        executor: DispatchExecutor = None,
+        name: str = "comm",
+        scheduler: Scheduler = None,
+        keepalive_interval: float = 1.0,
+        auto_reconnect: bool = True,
+        archive_dir: str = None,
+        events: EventBus = None,
+    ):
+        """
+        baudrate: 握手完成后协商的目标波特率，None 表示不协商
+        executor: 执行消息处理器的线程池，可由多个 CommManager 共用，按 "name:消息名" 分通道
+        scheduler: 握手重试和各类超时使用的调度器，默认为进程内共用的调度器
+        keepalive_interval: 握手完成后发送保活的间隔（秒），None 表示不发送
+        auto_reconnect: 连接故障后由 ConnectionSupervisor 自动重连并恢复采集和未停止的检测
+        archive_dir: 检测数据的归档目录，None 表示不保存
+        events: 发布检测结果和遥测的事件总线，多台设备可共用执行器，默认使用单线程执行器
+        """
+        self.name = name
+        self.scheduler = scheduler or default_scheduler()
+        self.executor = executor or DispatchExecutor(name=f"{name} dispatch")
+        # 检测结果和遥测的发布点，订阅者在总线的执行器中执行
+        self.events = events or EventBus(
+            DispatchExecutor(workers=1, name=f"{name} events"), self.scheduler
+        )
+        self.transport = transport or SerialTransport()
         self.transport.on_data_received(self._handle_raw_data)
+        self.transport.on_stream_gap(self._handle_stream_gap)
+        self.transport.on_connection_lost(self._handle_connection_lost)
 
-        self._parser = MessageParser()
+        self._parser = MessageParser(zero_copy=True)
         self._lock = threading.Lock()
 
         self._connected = False
-        self._handshake = HandshakeManager(self._send_message)
+        self._rx_bytes = 0
+        self._tx_bytes = 0
+        # 重连后需要恢复的状态
+        self._collecting = False
+        # 正在进行的检测（消息码和负载），CHECK_STOP 前一直有效
+        self._active_check: tuple[Command, bytes] = None
+        self._codec: PayloadCodec = None
+        self.auto_reconnect = auto_reconnect
+        self.supervisor = ConnectionSupervisor(
+            self,
+            scheduler=self.scheduler,
+            on_state_change=lambda state: self.events.publish(CONNECTION_STATE, state),
+            executor=self.executor,
+        )
+        # 带序号的请求，响应按序号完成对应的 Future
+        self.requests = RequestTracker(scheduler=self.scheduler)
+        self._handshake = HandshakeManager(
+            self._send_message, self._handle_handshake_complete, self.scheduler
+        )
+        self.baudrate = baudrate
+        self._baudrate_negotiator: BaudRateNegotiator = None
+        if isinstance(self.transport, SerialTransport):
+            self._baudrate_negotiator = BaudRateNegotiator(
+                self.transport, self._send_message, scheduler=self.scheduler
+            )
+        elif baudrate:
+            logger.warning("baudrate negotiation requires a serial transport, ignored")
 
-        self.light_stability_handler = LightStabilityHandler()
+        self.light_stability_handler = LightStabilityHandler(self.events, archive_dir)
+        self._codec_negotiator = CodecNegotiator(
+            self._send_message, self._handle_codec_change, scheduler=self.scheduler
+        )
+        # 分片还原后的消息按原消息码分发
+        self.fragment_handler = FragmentHandler(
+            self._send_message, self._process_message, scheduler=self.scheduler
+        )
+
+        self.keepalive_interval = keepalive_interval
+        self.link_monitor = LinkMonitor(
+            self._send_message,
+            self._link_counters,
+            interval=keepalive_interval or 1.0,
+            scheduler=self.scheduler,
+            on_stats=lambda stats: self.events.publish(LINK_STATS, stats),
+        )
 
         self._message_handlers: dict[Command, MessageHandler] = {
             Command.HANDSHAKE_REQ: self._handshake,
             Command.HANDSHAKE_RES: self._handshake,
             Command.CHECK_LIGHT_STABILITY_RES: self.light_stability_handler,
+            Command.SET_CODEC_RES: self._codec_negotiator,
+            Command.FRAGMENT: self.fragment_handler,
+            Command.KEEPALIVE_REQ: self.link_monitor,
+            Command.KEEPALIVE_RES: self.link_monitor,
         }
+        if self._baudrate_negotiator:
+            self._message_handlers[Command.BAUD_RATE_RES] = self._baudrate_negotiator
+            self._message_handlers[Command.BAUD_RATE_PROBE_RES] = self._baudrate_negotiator
+        # 消息码 -> 处理函数（已绑定的 handle 方法），每帧只需一次字典查找
+        self._dispatch: dict[Command, Callable[[RawMessage], None]] = {}
+        self._rebuild_dispatch()
 
     def connect(self):
         try:
@@ -97,16 +211,53 @@ class CommManager:
                 self._connected = True
             # 开始握手
             self._handshake.start()
+            self.supervisor.attach()
         except Exception as e:
             logger.error(f"连接失败: {e}")
             self.disconnect()
 
     def disconnect(self):
         self._connected = False
+        self._collecting = False
+        self._active_check = None
+        self.supervisor.stop()
+        self._close_session(ConnectionError("disconnected"))
+        # 重连期间保持同一个归档，主动断开时才结束
+        self.light_stability_handler.close_archive()
+
+    @property
+    def connection_state(self) -> ConnectionState:
+        return self.supervisor.state
+
+    def _close_session(self, exc: Exception):
+        """关闭传输并结束当前会话，在途的请求以 exc 失败"""
+        # 设备已拔出时先关闭串口，之后恢复波特率等操作只修改参数
+        if self.transport.is_open:
+            try:
+                self.transport.close()
+            except Exception as e:
+                logger.error(f"failed to close transport: {e}")
         self._handshake.stop()
         logger.info("stoped handshake")
-        if self.transport.is_open:
-            self.transport.close()
+        self.link_monitor.stop()
+        if self._baudrate_negotiator:
+            self._baudrate_negotiator.stop()
+        self._codec_negotiator.stop()
+        self.fragment_handler.reset()
+        self._handle_stream_gap()
+        self.requests.fail_all(exc)
+
+    def _resume_session(self):
+        """重连后重新握手，握手完成时恢复负载编码和采集"""
+        self._handshake.start()
+
+    def _handle_connection_lost(self, exc: Exception):
+        if self.auto_reconnect:
+            self.supervisor.connection_lost(exc)
+        else:
+            logger.error(f"connection lost: {exc}")
+            # 不能在传输的线程中关闭传输，关闭可能阻塞数秒，也不放在调度器线程中
+            self.executor.submit(f"{self.name}:disconnect", self.disconnect)
 
     def list_ports(self) -> list[str]:
         return self.transport.list_ports()
@@ -115,51 +266,172 @@ class CommManager:
     def is_connected(self) -> bool:
         return self._connected
 
+    @property
+    def is_handshake_complete(self) -> bool:
+        return self._handshake.is_complete
+
+    def negotiate_baudrate(self, baudrate: int) -> Future:
+        """向下位机提议新的波特率，返回的 Future 给出协商后实际使用的波特率"""
+        if self._baudrate_negotiator is None:
+            future = Future()
+            future.set_exception(
+                NotImplementedError("baudrate negotiation requires a serial transport")
+            )
+            return future
+        return self._baudrate_negotiator.start(baudrate)
+
+    def negotiate_codec(self, codec: PayloadCodec) -> Future:
+        """请求下位机以指定编码发送干涉图，返回的 Future 给出下位机实际采用的编码"""
+        self._codec = codec
+        return self._codec_negotiator.start(codec)
+
+    def set_acquisition_metadata(self, metadata: ScanMetadata):
+        """设置写入检测数据归档的采集参数（分辨率、动镜速度、激光波长、温度）"""
+        self.light_stability_handler.set_metadata(metadata)
+
+    def _handle_codec_change(self, codec: PayloadCodec):
+        self.light_stability_handler.set_codec(codec)
+
+    def link_stats(self) -> LinkStats:
+        """保活往返时间分位数、收发速率和 CRC 错误率"""
+        return self.link_monitor.stats()
+
+    def _link_counters(self) -> LinkCounters:
+        stats = self._parser.stats
+        return LinkCounters(self._rx_bytes, self._tx_bytes, stats.frames, stats.bad_frames)
+
+    def _handle_handshake_complete(self):
+        if self.keepalive_interval:
+            self.link_monitor.start()
+        if self.baudrate:
+            self.negotiate_baudrate(self.baudrate)
+        if self._codec is not None:
+            self.negotiate_codec(self._codec)
+        if self._collecting:
+            logger.info("resume collecting")
+            self._send_message(Command.START_COLLECT)
+        if self._active_check is not None:
+            command, data = self._active_check
+            logger.info(f"resume {command.name}")
+            self._send_message(command, data)
+
     def _handle_raw_data(self, data: bytes):
         with self._lock:
+            self._rx_bytes += len(data)
             self._parser.feed(data)
             for raw_message in self._parser.parse():
                 self._process_message(raw_message)
 
+    def _handle_stream_gap(self):
+        """接收数据有丢失，丢弃未完成的帧"""
+        with self._lock:
+            self._parser.reset()
+
     def _process_message(self, msg: RawMessage):
         """处理接收到的消息"""
-        logger.info(
-            f"received message: {msg.command.name}, payload length: {len(msg.data)}"
-        )
-        handler = self._message_handlers.get(msg.command)
-        if handler:
-            handler.handle(msg)
-        else:
-            logger.warning(f"no handler found for message: {msg.command.name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "received message: %s, payload length: %d", msg.command.name, len(msg.data)
+            )
+        # 分片由 fragment_handler 还原后再按序号匹配
+        if msg.seq is not None and msg.command is not Command.FRAGMENT:
+            if self.requests.resolve(msg):
+                return
+        self._dispatch.get(msg.command, self._handle_unknown)(msg)
+
+    def _handle_unknown(self, msg: RawMessage):
+        logger.warning("no handler found for message: %s", msg.command.name)
+
+    def _rebuild_dispatch(self):
+        self._dispatch = {
+            command: (
+                handler.handle
+                if command in INLINE_COMMANDS
+                else partial(
+                    self._submit,
+                    f"{self.name}:{SHARED_LANES.get(command, command).name}",
+                    handler.handle,
+                )
+            )
+            for command, handler in self._message_handlers.items()
+        }
+
+    def _submit(self, lane: str, handle: Callable[[RawMessage], None], msg: RawMessage):
+        # 零拷贝负载在下一次 feed 后失效，交给其它线程前拷贝
+        if isinstance(msg.data, memoryview):
+            msg = RawMessage(msg.command, bytes(msg.data), msg.seq)
+        self.executor.submit(lane, handle, msg)
+
+    def request(
+        self,
+        command: Command,
+        data: bytes = b"",
+        response: Command = None,
+        timeout: float = None,
+    ) -> Future:
+        """
+        发送带序号的请求，返回在收到对应响应时完成的 Future（结果为 RawMessage）
+
+        多个请求可以同时在途，响应不再经过 register_handler 注册的处理器。
+        response 不为空时只接受该消息码的响应，超时抛出 TimeoutError。
+        """
+        seq, future = self.requests.register(command, response, timeout)
+        try:
+            sent = self._send_message(command, data, seq)
+        except Exception as e:
+            self.requests.cancel(seq, e, sent=False)
+            raise
 
-    def _send_message(self, command: Command, data: bytes = b""):
-        message_bytes = self._parser.pack(command, data)
-        self.transport.send_data(message_bytes)
-        logger.info(f"send message: {command.name}")
+        def check_sent(f: Future):
+            if f.exception() is not None:
+                self.requests.cancel(seq, f.exception())
+
+        sent.add_done_callback(check_sent)
+        return future
+
+    def _send_message(self, command: Command, data: bytes = b"", seq: int = None) -> Future:
+        message_bytes = self._parser.pack(command, data, seq)
+        self._tx_bytes += len(message_bytes)
+        future = self.transport.send_data(
+            message_bytes, priority_for(command, len(message_bytes))
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("send message: %s", command.name)
+        return future
 
     def register_handler(self, command: Command, handler: MessageHandler):
         """注册消息处理器"""
         self._message_handlers[command] = handler
+        self._rebuild_dispatch()
 
     def unregister_handler(self, command: Command):
         """注销消息处理器"""
         if command in self._message_handlers:
             del self._message_handlers[command]
+            self._rebuild_dispatch()
 
     def start_collect(self):
+        self._collecting = True
         self._send_message(Command.START_COLLECT)
 
     def stop_collect(self):
+        self._collecting = False
         self._send_message(Command.STOP_COLLECT)
 
     def check_light_stability(self):
-        self._send_message(Command.CHECK_LIGHT_STABILITY, b"\01")
+        self._start_check(Command.CHECK_LIGHT_STABILITY, b"\01")
 
     def check_standard_wave_accuracy(self):
-        self._send_message(Command.CHECK_STANDARD_WAVE_ACCURACY, b"\02")
+        self._start_check(Command.CHECK_STANDARD_WAVE_ACCURACY, b"\02")
 
     def check_standard_wave_repeatability(self):
-        self._send_message(Command.CHECK_STANDARD_WAVE_REPEATABILITY, b"\03")
+        self._start_check(Command.CHECK_STANDARD_WAVE_REPEATABILITY, b"\03")
 
     def check_stop(self):
+        self._active_check = None
         self._send_message(Command.CHECK_STOP, b"\03")
+
+    def _start_check(self, command: Command, data: bytes):
+        # 记录检测，重连握手完成后重新下发
+        self._active_check = (command, data)
+        self._send_message(command, data)
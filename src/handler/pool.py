@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable
+import logging
+import time
+
+from comm.protocol.parser import Command, RawMessage
+from comm.transport.selector import PooledTransport, SelectorLoop, SerialStream, SocketStream
+from .base import MessageHandler
+from .event_bus import EventBus
+from .executor import DispatchExecutor
+from .manager import CommManager
+
+logger = logging.getLogger(__name__)
+
+# 消费者回调：(设备 ID, 消息)
+DeviceCallback = Callable[[str, RawMessage], None]
+
+
+@dataclass
+class DeviceStats:
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    frames: int = 0
+    bad_frames: int = 0
+    requests: int = 0
+    # 带序号请求的往返时间
+    mean_rtt: float = 0.0
+    max_rtt: float = 0.0
+    # 每次读取后解析和分发的耗时
+    mean_dispatch: float = 0.0
+    max_dispatch: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def rx_bytes_per_second(self) -> float:
+        return self.rx_bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+
+class _DeviceRoute(MessageHandler):
+    """先交给设备原有的处理器，再把消息连同设备 ID 转给订阅者"""
+
+    def __init__(self, device_id: str, pool: "DevicePool", handler: MessageHandler = None):
+        self.device_id = device_id
+        self.handler = handler
+        self._pool = pool
+
+    def handle(self, msg: RawMessage):
+        if self.handler:
+            self.handler.handle(msg)
+        self._pool._route(self.device_id, msg)
+
+
+class DevicePool:
+    """
+    多台仪器共用一个 I/O 线程
+
+    每台设备有独立的 CommManager（解析器、握手和消息处理器），收发都由同一个 SelectorLoop 驱动，
+    不再为每个串口或连接各开一个接收线程。消息处理器在所有设备共用的 DispatchExecutor 中执行，
+    每台设备的每种消息各占一个通道。subscribe() 注册的回调按设备 ID 收到所有设备的消息。
+    各设备的事件总线（CommManager.events）也共用一个执行器，不随设备数增加线程。
+    """
+
+    def __init__(self, name: str = "device pool", workers: int = 2):
+        self._loop = SelectorLoop(name)
+        self.executor = DispatchExecutor(workers, name=f"{name} dispatch")
+        self.events_executor = DispatchExecutor(workers, name=f"{name} events")
+        self._lock = Lock()
+        self._devices: dict[str, CommManager] = {}
+        self._subscribers: dict[Command, list[DeviceCallback]] = {}
+
+    def __enter__(self) -> "DevicePool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._loop.start()
+
+    def stop(self):
+        for device_id in list(self._devices):
+            self.remove(device_id)
+        self._loop.stop()
+        self.executor.shutdown()
+        self.events_executor.shutdown()
+
+    @property
+    def devices(self) -> list[str]:
+        return list(self._devices)
+
+    def __getitem__(self, device_id: str) -> CommManager:
+        return self._devices[device_id]
+
+    def add(self, device_id: str, stream: SerialStream | SocketStream) -> CommManager:
+        """添加设备并连接，返回该设备的 CommManager"""
+        with self._lock:
+            if device_id in self._devices:
+                raise ValueError(f"device {device_id} already exists")
+            manager = CommManager(
+                PooledTransport(self._loop, stream),
+                executor=self.executor,
+                name=device_id,
+                events=EventBus(self.events_executor),
+            )
+            self._devices[device_id] = manager
+            for command in self._subscribers:
+                self._install_route(device_id, manager, command)
+        manager.connect()
+        logger.info(f"added device {device_id} on {stream.name}")
+        return manager
+
+    def add_serial(self, device_id: str, port: str, baudrate: int = 115200) -> CommManager:
+        return self.add(device_id, SerialStream(port, baudrate))
+
+    def add_socket(self, device_id: str, host: str, port: int) -> CommManager:
+        return self.add(device_id, SocketStream(host, port))
+
+    def remove(self, device_id: str):
+        with self._lock:
+            manager = self._devices.pop(device_id, None)
+        if manager is None:
+            logger.warning(f"device {device_id} not found")
+            return
+        manager.disconnect()
+        logger.info(f"removed device {device_id}")
+
+    def subscribe(self, command: Command, callback: DeviceCallback):
+        """订阅所有设备（包括之后添加的设备）的某类消息"""
+        with self._lock:
+            callbacks = self._subscribers.setdefault(command, [])
+            if not callbacks:
+                for device_id, manager in self._devices.items():
+                    self._install_route(device_id, manager, command)
+            callbacks.append(callback)
+
+    def unsubscribe(self, command: Command, callback: DeviceCallback):
+        with self._lock:
+            callbacks = self._subscribers.get(command)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+
+    def wait_handshake(self, timeout: float = 5.0) -> bool:
+        """等待所有设备握手完成"""
+        deadline = time.monotonic() + timeout
+        while not all(m.is_handshake_complete for m in self._devices.values()):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict[str, DeviceStats]:
+        return {device_id: self._device_stats(m) for device_id, m in self._devices.items()}
+
+    def _install_route(self, device_id: str, manager: CommManager, command: Command):
+        handler = manager._message_handlers.get(command)
+        if isinstance(handler, _DeviceRoute):
+            return
+        manager.register_handler(command, _DeviceRoute(device_id, self, handler))
+
+    def _route(self, device_id: str, msg: RawMessage):
+        for callback in self._subscribers.get(msg.command, ()):
+            try:
+                callback(device_id, msg)
+            except Exception as e:
+                logger.error(f"subscriber of {msg.command.name} failed on {device_id}: {e}")
+
+    @staticmethod
+    def _device_stats(manager: CommManager) -> DeviceStats:
+        stream = manager.transport.stats
+        parser = manager._parser.stats
+        requests = manager.requests.stats
+        return DeviceStats(
+            rx_bytes=stream.rx_bytes,
+            tx_bytes=stream.tx_bytes,
+            frames=parser.frames,
+            bad_frames=parser.bad_frames,
+            requests=requests.completed,
+            mean_rtt=requests.mean_rtt,
+            max_rtt=requests.max_rtt,
+            mean_dispatch=stream.dispatch_time / stream.reads if stream.reads else 0.0,
+            max_dispatch=stream.max_dispatch_time,
+            elapsed=time.monotonic() - stream.opened_at if stream.opened_at else 0.0,
+        )
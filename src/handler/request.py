@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+import itertools
+import logging
+import threading
+import time
+
+from comm.protocol.parser import Command, RawMessage
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestStats:
+    sent: int = 0
+    completed: int = 0
+    timeouts: int = 0
+    late_responses: int = 0
+    mismatched: int = 0
+    # 序号不属于任何已发出请求的消息，交给普通处理器
+    unsolicited: int = 0
+    # 已完成请求的往返时间（秒）
+    rtt_total: float = 0.0
+    max_rtt: float = 0.0
+
+    @property
+    def mean_rtt(self) -> float:
+        return self.rtt_total / self.completed if self.completed else 0.0
+
+
+class _PendingRequest:
+    __slots__ = ("command", "response", "future", "timer", "sent_at")
+
+    def __init__(self, command: Command, response: Command | None, future: Future):
+        self.command = command
+        self.response = response
+        self.future = future
+        self.timer: TimerHandle = None
+        self.sent_at = time.perf_counter()
+
+
+class RequestTracker:
+    """
+    按序号关联请求与响应
+
+    每个请求分配一个 16 位序号随帧发送，下位机在响应帧中原样返回。未完成的请求保存在序号表中，
+    各自有独立的超时，因此同一命令可以有多个请求同时在途。最近 max_expired 个超时或取消的序号被保留，
+    之后到达的响应识别为迟到响应并丢弃；不属于任何已发出请求的序号（下位机主动发送的帧）交给普通处理器。
+    """
+
+    def __init__(
+        self, default_timeout: float = 3.0, scheduler: Scheduler = None, max_expired: int = 256
+    ):
+        self.default_timeout = default_timeout
+        self._scheduler = scheduler or default_scheduler()
+        self.stats = RequestStats()
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._pending: dict[int, _PendingRequest] = {}
+        self._max_expired = max_expired
+        self._expired: OrderedDict[int, None] = OrderedDict()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def register(
+        self, command: Command, response: Command = None, timeout: float = None
+    ) -> tuple[int, Future]:
+        """登记一个请求，返回其序号和在收到响应时完成的 Future"""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            seq = self._next_seq()
+            request = self._pending[seq] = _PendingRequest(command, response, future)
+            request.timer = self._scheduler.call_later(
+                self.default_timeout if timeout is None else timeout, self._expire, seq
+            )
+            self.stats.sent += 1
+        return seq, future
+
+    def resolve(self, msg: RawMessage) -> bool:
+        """
+        用响应完成对应的请求，返回该消息是否已被消费（包括迟到的响应）
+
+        响应数据会被拷贝，Future 的结果在解析器下一次 feed 之后仍然有效。
+        """
+        if msg.seq is None:
+            return False
+        with self._lock:
+            request = self._pending.get(msg.seq)
+            if request is None:
+                if msg.seq in self._expired:
+                    del self._expired[msg.seq]
+                    self.stats.late_responses += 1
+                    logger.debug(f"late response {msg.command.name} seq {msg.seq}")
+                    return True
+                self.stats.unsolicited += 1
+                return False
+            if request.response is not None and msg.command != request.response:
+                self.stats.mismatched += 1
+                logger.warning(
+                    f"seq {msg.seq} expects {request.response.name}, got {msg.command.name}"
+                )
+                return False
+            del self._pending[msg.seq]
+            request.timer.cancel()
+            rtt = time.perf_counter() - request.sent_at
+            self.stats.completed += 1
+            self.stats.rtt_total += rtt
+            if rtt > self.stats.max_rtt:
+                self.stats.max_rtt = rtt
+        request.future.set_result(RawMessage(msg.command, bytes(msg.data), msg.seq))
+        return True
+
+    def cancel(self, seq: int, exc: Exception = None, sent: bool = True):
+        """sent=False 表示请求没有发出，不会有迟到的响应"""
+        with self._lock:
+            request = self._pending.pop(seq, None)
+            if request is not None and sent:
+                self._note_expired(seq)
+        if request is not None:
+            request.timer.cancel()
+            request.future.set_exception(exc or ConnectionError("request cancelled"))
+
+    def fail_all(self, exc: Exception):
+        """连接断开时让所有未完成的请求失败"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for seq in pending:
+                self._note_expired(seq)
+        for request in pending.values():
+            request.timer.cancel()
+            request.future.set_exception(exc)
+
+    def _next_seq(self) -> int:
+        # 序号在 1..65535 循环，跳过仍在途的序号
+        for _ in range(0xFFFF):
+            seq = next(self._seq) & 0xFFFF
+            if seq and seq not in self._pending:
+                # 序号重新使用，之前的迟到响应无法再区分
+                self._expired.pop(seq, None)
+                return seq
+        raise RuntimeError("too many requests in flight")
+
+    def _note_expired(self, seq: int):
+        self._expired[seq] = None
+        if len(self._expired) > self._max_expired:
+            self._expired.popitem(last=False)
+
+    def _expire(self, seq: int):
+        with self._lock:
+            request = self._pending.pop(seq, None)
+            if request is None:
+                return
+            self.stats.timeouts += 1
+            self._note_expired(seq)
+        logger.warning(f"request {request.command.name} seq {seq} timed out")
+        request.future.set_exception(TimeoutError(f"no response to {request.command.name}"))
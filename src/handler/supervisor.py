@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+import enum
+import logging
+import threading
+
+from comm.transport.serial import PortIdentity, SerialTransport, find_serial_port
+from .executor import DispatchExecutor
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
+
+if TYPE_CHECKING:
+    from .manager import CommManager
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionState(enum.Enum):
+    DISCONNECTED = "disconnected"
+    CONNECTED = "connected"
+    RECONNECTING = "reconnecting"
+
+
+@dataclass
+class SupervisorStats:
+    faults: int = 0
+    reconnects: int = 0
+    # 累计的重连尝试次数
+    attempts: int = 0
+    # 本次中断以来连续失败的尝试次数，重连成功后清零
+    failed_attempts: int = 0
+
+
+class ConnectionSupervisor:
+    """
+    连接故障后自动重连
+
+    传输报告连接中断后：关闭传输，让在途的请求失败，然后按 min_interval 到 max_interval 指数退避
+    查找同一台设备（串口按序列号或 VID/PID 匹配，设备重新枚举后串口名可以不同），找到后重新打开、
+    重新握手，由 CommManager 恢复中断前的负载编码和采集状态。
+    设备不在时只在第一次尝试失败时告警，之后的失败按调试级别记录。调用 disconnect() 主动断开时不重连。
+    关闭、查找和重新打开传输可能阻塞数秒，在 executor 的通道中执行，调度器只负责退避等待。
+    """
+
+    def __init__(
+        self,
+        manager: "CommManager",
+        min_interval: float = 0.5,
+        max_interval: float = 10.0,
+        scheduler: Scheduler = None,
+        on_state_change: Callable[[ConnectionState], None] = None,
+        executor: DispatchExecutor = None,
+    ):
+        self._manager = manager
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._scheduler = scheduler or default_scheduler()
+        self._executor = executor or DispatchExecutor(workers=1, name="supervisor")
+        self._lane = f"{manager.name}:reconnect"
+        self._on_state_change = on_state_change
+        self.stats = SupervisorStats()
+
+        self._lock = threading.Lock()
+        self._state = ConnectionState.DISCONNECTED
+        self._identity: PortIdentity = None
+        self._interval = min_interval
+        self._timer: TimerHandle = None
+
+    @property
+    def state(self) -> ConnectionState:
+        return self._state
+
+    def attach(self):
+        """连接建立后记录设备身份"""
+        transport = self._manager.transport
+        if isinstance(transport, SerialTransport):
+            self._identity = transport.identity()
+        self._set_state(ConnectionState.CONNECTED)
+
+    def stop(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        self._set_state(ConnectionState.DISCONNECTED)
+
+    def connection_lost(self, exc: Exception):
+        """由传输的线程调用，恢复流程转交给调度线程执行"""
+        with self._lock:
+            if self._state is not ConnectionState.CONNECTED:
+                return
+            self.stats.faults += 1
+        self._set_state(ConnectionState.RECONNECTING)
+        logger.warning(f"connection lost: {exc}, start reconnecting")
+        self._executor.submit(self._lane, self._recover, exc)
+
+    def _recover(self, exc: Exception):
+        if self._state is not ConnectionState.RECONNECTING:
+            return
+        self._manager._close_session(ConnectionError(f"connection lost: {exc}"))
+        self._interval = self.min_interval
+        self._schedule_attempt()
+
+    def _schedule_attempt(self):
+        with self._lock:
+            if self._state is ConnectionState.RECONNECTING:
+                self._timer = self._scheduler.call_later(
+                    self._interval, self._executor.submit, self._lane, self._attempt
+                )
+
+    def _attempt(self):
+        if self._state is not ConnectionState.RECONNECTING:
+            return
+        self.stats.attempts += 1
+        transport = self._manager.transport
+        try:
+            self._locate()
+            transport.open()
+        except Exception as e:
+            self.stats.failed_attempts += 1
+            log = logger.warning if self.stats.failed_attempts == 1 else logger.debug
+            log(f"reconnect attempt {self.stats.failed_attempts} failed: {e}")
+            self._interval = min(self._interval * 2, self.max_interval)
+            self._schedule_attempt()
+            return
+        self.stats.failed_attempts = 0
+        self.stats.reconnects += 1
+        logger.info(f"reconnected after {self.stats.faults} faults")
+        self._set_state(ConnectionState.CONNECTED)
+        self._manager._resume_session()
+
+    def _locate(self):
+        transport = self._manager.transport
+        if not isinstance(transport, SerialTransport):
+            return
+        if self._identity is None:
+            if not transport.port_exists():
+                raise ConnectionError(f"{transport.port} not present")
+            return
+        port = find_serial_port(self._identity)
+        if port is None:
+            raise ConnectionError(f"device {self._identity} not present")
+        if port != transport.port:
+            logger.info(f"device moved from {transport.port} to {port}")
+            transport.set_port(port)
+
+    def _set_state(self, state: ConnectionState):
+        if state is self._state:
+            return
+        self._state = state
+        if self._on_state_change:
+            try:
+                self._on_state_change(state)
+            except Exception as e:
+                logger.error(f"Error in state change callback: {e}")
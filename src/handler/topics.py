@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+import time
+
+import numpy as np
+
+from .event_bus import Topic
+from .keepalive import LinkStats
+from .supervisor import ConnectionState
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    """一次检测的干涉图及其光谱"""
+
+    interference_data: np.ndarray
+    spectrum_data: np.ndarray
+    timestamp: float = field(default_factory=time.time)
+
+
+# 解码后的干涉图（未经处理）
+INTERFEROGRAM = Topic("interferogram", np.ndarray)
+# 光源稳定性检测结果
+LIGHT_STABILITY = Topic("light_stability", ScanResult)
+# 检测数据归档写入失败（磁盘满等），内容为失败的归档路径
+ARCHIVE_FAILED = Topic("archive_failed", str)
+# 检测响应的原始数据
+CHECK_STABILITY = Topic("check.stability", bytes)
+CHECK_ACCURACY = Topic("check.accuracy", bytes)
+CHECK_REPEATABILITY = Topic("check.repeatability", bytes)
+# 链路遥测，每次保活发送后发布
+LINK_STATS = Topic("link_stats", LinkStats)
+CONNECTION_STATE = Topic("connection_state", ConnectionState)
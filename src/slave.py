@@ -1,35 +1,66 @@
 import logging
-import struct
 import time
 import sys
 import threading
+from concurrent.futures import Future
 from typing import Callable
 
 from config.log import setup_logging
 from util.signal import generate_test_signal
 from comm.protocol.command import Command
 from comm.transport.serial import SerialTransport
+from comm.transport.transport import ITransport, priority_for
 from comm.protocol.parser import MessageParser
 from comm.protocol.parser import RawMessage
 from comm.protocol.parser import Command
+from comm.protocol.codec import PayloadCodec, float32_codec
+from comm.protocol.fragment import Fragmenter, unpack_nack
+from handler.baudrate import pack_baudrate, unpack_baudrate
+from handler.keepalive import KEEPALIVE_REQ_FORMAT, KEEPALIVE_RES_FORMAT
+from util.scheduler import Scheduler, TimerHandle, default_scheduler
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
 class SlaveManager:
-    def __init__(self):
-        self.transport = SerialTransport("COM2")
+    def __init__(
+        self,
+        port: str = "COM2",
+        transport: ITransport = None,
+        max_baudrate: int = 921600,
+        baudrate_fallback: float = 3.0,
+        fragment_size: int = None,
+        scheduler: Scheduler = None,
+    ):
+        self.transport = transport or SerialTransport(port)
         self.transport.on_data_received(self._handle_raw_data)
+        self.transport.on_stream_gap(self._handle_stream_gap)
 
         self._parser = MessageParser()
         self._lock = threading.Lock()
 
         self._connected = False
+        # 模拟干涉图的采样点数
+        self.signal_points = 1000
+        # 允许协商的最高波特率，0 表示不支持协商
+        self.max_baudrate = max_baudrate if isinstance(self.transport, SerialTransport) else 0
+        # 切换波特率后等待验证帧的时间，超时退回原波特率
+        self.baudrate_fallback = baudrate_fallback
+        self._scheduler = scheduler or default_scheduler()
+        self._fallback_timer: TimerHandle = None
+        # 干涉图负载编码，由主机通过 SET_CODEC_REQ 协商
+        self.codec = float32_codec
+        # 超过 fragment_size 的负载分片发送，None 表示整帧发送
+        self._fragmenter = Fragmenter(fragment_size) if fragment_size else None
 
         self._message_handlers: dict[Command, Callable[[RawMessage], None]] = {
             Command.HANDSHAKE_REQ: self.receive_handshake_req,
             Command.CHECK_LIGHT_STABILITY: self.receive_check_light_stability,
+            Command.BAUD_RATE_REQ: self.receive_baudrate_req,
+            Command.BAUD_RATE_PROBE: self.receive_baudrate_probe,
+            Command.SET_CODEC_REQ: self.receive_set_codec_req,
+            Command.FRAGMENT_NACK: self.receive_fragment_nack,
+            Command.KEEPALIVE_REQ: self.receive_keepalive_req,
         }
 
     def connect(self):
@@ -43,6 +74,7 @@ class SlaveManager:
 
     def disconnect(self):
         self._connected = False
+        self._cancel_baudrate_fallback()
         if self.transport.is_open:
             self.transport.close()
 
@@ -53,43 +85,139 @@ class SlaveManager:
     def is_connected(self) -> bool:
         return self._connected
 
+    @property
+    def fragment_size(self) -> int | None:
+        return self._fragmenter.fragment_size if self._fragmenter else None
+
+    @fragment_size.setter
+    def fragment_size(self, size: int | None):
+        self._fragmenter = Fragmenter(size) if size else None
+
     def _handle_raw_data(self, data: bytes):
         with self._lock:
             self._parser.feed(data)
             for raw_message in self._parser.parse():
                 self._handle_message(raw_message)
 
+    def _handle_stream_gap(self):
+        """接收数据有丢失，丢弃未完成的帧"""
+        with self._lock:
+            self._parser.reset()
+
     def _handle_message(self, msg: RawMessage):
         """处理接收到的消息"""
-        logger.info(
-            f"received message: {msg.command.name}, payload length: {len(msg.data)}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "received message: %s, payload length: %d", msg.command.name, len(msg.data)
+            )
         handle_func = self._message_handlers.get(msg.command)
         if handle_func:
             handle_func(msg)
         else:
-            logger.warning(f"no handler found for message: {msg.command.name}")
-
-    def _send_message(self, command: Command, data: bytes = b""):
-        message_bytes = self._parser.pack(command, data)
-        self.transport.send_data(message_bytes)
-        logger.info(f"send message: {command.name}")
+            logger.warning("no handler found for message: %s", msg.command.name)
+
+    def _send_message(self, command: Command, data: bytes = b"", seq: int = None) -> Future:
+        """seq 为请求帧携带的序号，响应原样带回"""
+        fragmenter = self._fragmenter
+        if fragmenter and command != Command.FRAGMENT and len(data) > fragmenter.fragment_size:
+            future = None
+            for fragment in fragmenter.split(command, data, seq):
+                future = self._send_message(Command.FRAGMENT, fragment, seq)
+            return future
+        message_bytes = self._parser.pack(command, data, seq)
+        future = self.transport.send_data(
+            message_bytes, priority_for(command, len(message_bytes))
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("send message: %s", command.name)
+        return future
 
     def receive_handshake_req(self, raw_message: RawMessage):
         """处理握手请求"""
         if raw_message.command != Command.HANDSHAKE_REQ:
             return
-        self._send_message(Command.HANDSHAKE_RES, b"")
+        self._send_message(Command.HANDSHAKE_RES, b"", raw_message.seq)
+
+    def receive_baudrate_req(self, raw_message: RawMessage):
+        """处理波特率协商请求：以当前波特率回复，回复发出后切换"""
+        requested = unpack_baudrate(raw_message.data)
+        baudrate = min(requested, self.max_baudrate)
+        if baudrate <= getattr(self.transport, "baudrate", 0):
+            self._send_message(Command.BAUD_RATE_RES, pack_baudrate(0), raw_message.seq)
+            return
+        previous = self.transport.baudrate
+        future = self._send_message(
+            Command.BAUD_RATE_RES, pack_baudrate(baudrate), raw_message.seq
+        )
+
+        def switch(f: Future):
+            if f.exception() is None:
+                self._switch_baudrate(baudrate, previous)
+
+        future.add_done_callback(switch)
+
+    def receive_baudrate_probe(self, raw_message: RawMessage):
+        """新波特率下收到完整的验证帧，确认切换"""
+        self._cancel_baudrate_fallback()
+        self._send_message(
+            Command.BAUD_RATE_PROBE_RES, bytes(raw_message.data), raw_message.seq
+        )
+
+    def receive_keepalive_req(self, raw_message: RawMessage):
+        """带回主机时间戳并附加本机时间戳"""
+        if len(raw_message.data) != KEEPALIVE_REQ_FORMAT.size:
+            return
+        (sent_ns,) = KEEPALIVE_REQ_FORMAT.unpack(raw_message.data)
+        self._send_message(
+            Command.KEEPALIVE_RES,
+            KEEPALIVE_RES_FORMAT.pack(sent_ns, time.monotonic_ns()),
+            raw_message.seq,
+        )
+
+    def receive_fragment_nack(self, raw_message: RawMessage):
+        """重发主机请求的缺失分片"""
+        if not self._fragmenter:
+            return
+        transfer_id, missing = unpack_nack(raw_message.data)
+        seq = self._fragmenter.transfer_seq(transfer_id)
+        for fragment in self._fragmenter.resend(transfer_id, missing):
+            self._send_message(Command.FRAGMENT, fragment, seq)
+
+    def _switch_baudrate(self, baudrate: int, previous: int):
+        self.transport.set_baudrate(baudrate)
+        self._cancel_baudrate_fallback()
+        self._fallback_timer = self._scheduler.call_later(
+            self.baudrate_fallback, self._fallback_baudrate, previous
+        )
+
+    def _fallback_baudrate(self, previous: int):
+        logger.warning(f"no baudrate probe received, fall back to {previous}")
+        self._fallback_timer = None
+        self.transport.set_baudrate(previous)
+
+    def _cancel_baudrate_fallback(self):
+        if self._fallback_timer:
+            self._fallback_timer.cancel()
+            self._fallback_timer = None
 
     def receive_check_light_stability(self, raw_message: RawMessage):
         """处理光源稳定性检测请求"""
         if raw_message.command != Command.CHECK_LIGHT_STABILITY:
             return
         # 这里可以添加处理逻辑
-        t, sig, freq = generate_test_signal()
-        test_data = sig.tolist()
-        data_bytes = struct.pack(f">{len(test_data)}f", *test_data)
-        self._send_message(Command.CHECK_LIGHT_STABILITY_RES, data_bytes)
+        t, sig, freq = generate_test_signal(fs=self.signal_points)
+        self._send_message(
+            Command.CHECK_LIGHT_STABILITY_RES, self.codec.encode(sig), raw_message.seq
+        )
+
+    def receive_set_codec_req(self, raw_message: RawMessage):
+        """处理负载编码协商请求，不支持的编码回退为 FLOAT32"""
+        try:
+            self.codec = PayloadCodec.from_bytes(raw_message.data)
+        except ValueError as e:
+            logger.warning(f"unsupported codec request: {e}")
+            self.codec = float32_codec
+        self._send_message(Command.SET_CODEC_RES, self.codec.to_bytes(), raw_message.seq)
 
     def receive_check_stop(self, raw_message: RawMessage):
         """处理停止检测请求"""
@@ -99,9 +227,11 @@ class SlaveManager:
 
 
 def run():
+    setup_logging()
     logger.info("Starting Slave Manager...")
     print("Commands: connect, disconnect, exit")
-    manager = SlaveManager()
+    port = sys.argv[1] if len(sys.argv) > 1 else "COM2"
+    manager = SlaveManager(port)
     while True:
         cmd = input("> ").strip().lower()
 
@@ -0,0 +1,329 @@
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Condition, Lock, Thread
+from typing import BinaryIO, Iterator
+import enum
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 扫描归档文件，全部按小端保存，样本可直接 np.frombuffer 读取
+# 文件头：魔数、版本、创建时的墙上时间（秒）、分辨率（cm-1）、动镜速度（硬件设置中的数值）、
+# 参考激光波长（nm）、温度（℃）
+ARCHIVE_MAGIC = b"FTSCAN"
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct("<6sBddddd")
+# 扫描记录头：采集时的墙上时间（秒）、样本数，之后是 float32 样本
+RECORD_HEADER = struct.Struct("<dI")
+SAMPLE_DTYPE = np.dtype("<f4")
+# 文件尾：索引位置、扫描数、魔数，索引为每条记录的文件偏移（uint64）
+INDEX_MAGIC = b"FTSIDX"
+ARCHIVE_FOOTER = struct.Struct("<QQ6s")
+INDEX_DTYPE = np.dtype("<u8")
+
+
+@dataclass
+class ScanMetadata:
+    """归档对应的采集参数"""
+
+    resolution: float = 0.0
+    velocity: float = 0.0
+    laser_wavelength: float = 0.0
+    temperature: float = 0.0
+    created: float = field(default_factory=time.time)
+
+
+@dataclass
+class ScanRecord:
+    timestamp: float
+    samples: np.ndarray
+
+
+class FsyncPolicy(enum.Enum):
+    NEVER = "never"  # 只写入操作系统缓存，关闭时仍会同步
+    BATCH = "batch"  # 每批写出后同步
+    INTERVAL = "interval"  # 距上次同步超过 fsync_interval 秒时同步
+
+
+@dataclass
+class ArchiveStats:
+    scans: int = 0
+    samples: int = 0
+    bytes: int = 0
+    batches: int = 0
+    max_batch: int = 0
+    fsyncs: int = 0
+    # 队列满或写入失败后丢弃的扫描
+    dropped: int = 0
+
+
+class ScanArchiveWriter:
+    """
+    扫描归档写入线程
+
+    append() 只把扫描放入队列，由写入线程成批编码为 float32 后一次写出，每个样本占 4 字节。
+    文件头保存采集参数，close() 时在文件尾写入记录偏移索引；程序异常退出没有索引时，
+    ScanArchiveReader 按顺序扫描记录重建索引。队列超过 max_pending 时丢弃新扫描并计数。
+    写入出错（磁盘满等）后不再接受新扫描，close() 把文件截断到最后一条完整的记录之后再写索引。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: ScanMetadata = None,
+        fsync: FsyncPolicy = FsyncPolicy.INTERVAL,
+        fsync_interval: float = 1.0,
+        max_pending: int = 256,
+        batch_size: int = 32,
+        name: str = "archive",
+    ):
+        self.path = path
+        self.metadata = metadata or ScanMetadata()
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.stats = ArchiveStats()
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._name = name
+
+        # 已存在的文件不覆盖
+        self._file: BinaryIO = open(path, "xb")
+        self._file.write(
+            ARCHIVE_HEADER.pack(
+                ARCHIVE_MAGIC,
+                ARCHIVE_VERSION,
+                self.metadata.created,
+                self.metadata.resolution,
+                self.metadata.velocity,
+                self.metadata.laser_wavelength,
+                self.metadata.temperature,
+            )
+        )
+        self._offset = ARCHIVE_HEADER.size
+        self._offsets: list[int] = []
+        self._last_fsync = time.monotonic()
+
+        self._queue: deque[tuple[float, np.ndarray]] = deque()
+        self._cond = Condition()
+        # 已写出的扫描数，用于 flush() 等待
+        self._written = 0
+        self._appended = 0
+        self._is_running = True
+        self._error: Exception = None
+        self._thread = Thread(target=self._write_loop, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def append(self, samples: np.ndarray, timestamp: float = None) -> bool:
+        """放入写入队列，调用后不应再修改 samples"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._cond:
+            if not self._is_running:
+                raise ValueError(f"{self._name} is closed")
+            if self._error is not None:
+                self.stats.dropped += 1
+                return False
+            if len(self._queue) >= self._max_pending:
+                self.stats.dropped += 1
+                logger.warning(f"{self._name} queue full, {self.stats.dropped} scans dropped")
+                return False
+            self._queue.append((timestamp, samples))
+            self._appended += 1
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待已放入的扫描全部写出，写入失败时返回 False"""
+        with self._cond:
+            target = self._appended
+            done = self._cond.wait_for(
+                lambda: self._written >= target or self._error is not None, timeout
+            )
+            return done and self._error is None
+
+    def close(self, timeout: float = 5):
+        with self._cond:
+            if not self._is_running:
+                return
+            self._is_running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.error(f"{self._name} writer did not stop, index not written")
+            return
+        try:
+            if self._error is not None:
+                # 缓冲区中可能残留不完整的记录，重新打开并截断
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = open(self.path, "r+b")
+                self._file.truncate(self._offset)
+                self._file.seek(self._offset)
+            index = np.asarray(self._offsets, dtype=INDEX_DTYPE).tobytes()
+            self._file.write(index)
+            self._file.write(ARCHIVE_FOOTER.pack(self._offset, len(self._offsets), INDEX_MAGIC))
+            self._sync()
+        except OSError as e:
+            logger.error(f"failed to write index of {self.path}: {e}")
+        finally:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        logger.info(
+            f"archive {self.path} closed, {self.stats.scans} scans, {self.stats.bytes} bytes"
+        )
+
+    def __enter__(self) -> "ScanArchiveWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_loop(self):
+        logger.debug(f"{self._name} loop started")
+        while True:
+            with self._cond:
+                while self._is_running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                count = min(len(self._queue), self._batch_size)
+                batch = [self._queue.popleft() for _ in range(count)]
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"{self._name} failed to write {len(batch)} scans, stop archiving: {e}")
+                with self._cond:
+                    self._error = e
+                    self.stats.dropped += len(batch) + len(self._queue)
+                    self._queue.clear()
+                    self._cond.notify_all()
+                break
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+        logger.debug(f"{self._name} loop finished")
+
+    def _write_batch(self, batch: list[tuple[float, np.ndarray]]):
+        chunks = []
+        offsets = []
+        offset = self._offset
+        samples_count = 0
+        for timestamp, samples in batch:
+            data = np.ascontiguousarray(samples, dtype=SAMPLE_DTYPE).reshape(-1)
+            chunks.append(RECORD_HEADER.pack(timestamp, data.size))
+            chunks.append(data.data)
+            offsets.append(offset)
+            offset += RECORD_HEADER.size + data.nbytes
+            samples_count += data.size
+        self._file.writelines(chunks)
+        self._file.flush()
+        # 写出成功后才计入索引
+        self._offsets.extend(offsets)
+        self.stats.samples += samples_count
+        self.stats.bytes += offset - self._offset
+        self._offset = offset
+        self.stats.scans += len(batch)
+        self.stats.batches += 1
+        self.stats.max_batch = max(self.stats.max_batch, len(batch))
+
+        if self.fsync is FsyncPolicy.BATCH or (
+            self.fsync is FsyncPolicy.INTERVAL
+            and time.monotonic() - self._last_fsync >= self.fsync_interval
+        ):
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        self.stats.fsyncs += 1
+
+
+class ScanArchiveReader:
+    """按序号随机读取扫描归档"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        self._lock = Lock()
+        header = self._file.read(ARCHIVE_HEADER.size)
+        if len(header) < ARCHIVE_HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a scan archive")
+        magic, version, *fields = ARCHIVE_HEADER.unpack(header)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self._file.close()
+            raise ValueError(f"{path} is not a version {ARCHIVE_VERSION} scan archive")
+        created, resolution, velocity, laser_wavelength, temperature = fields
+        self.metadata = ScanMetadata(resolution, velocity, laser_wavelength, temperature, created)
+        self._offsets = self._read_index()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> ScanRecord:
+        offset = int(self._offsets[index])
+        with self._lock:
+            self._file.seek(offset)
+            timestamp, count = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            samples = np.fromfile(self._file, dtype=SAMPLE_DTYPE, count=count)
+        return ScanRecord(timestamp, samples)
+
+    def __iter__(self) -> Iterator[ScanRecord]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "ScanArchiveReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_index(self) -> np.ndarray:
+        size = os.fstat(self._file.fileno()).st_size
+        if size >= ARCHIVE_HEADER.size + ARCHIVE_FOOTER.size:
+            self._file.seek(size - ARCHIVE_FOOTER.size)
+            index_offset, count, magic = ARCHIVE_FOOTER.unpack(
+                self._file.read(ARCHIVE_FOOTER.size)
+            )
+            if magic == INDEX_MAGIC and index_offset + count * INDEX_DTYPE.itemsize == (
+                size - ARCHIVE_FOOTER.size
+            ):
+                self._file.seek(index_offset)
+                return np.fromfile(self._file, dtype=INDEX_DTYPE, count=count)
+        logger.warning(f"{self.path} has no index, rebuilding")
+        return self._rebuild_index(size)
+
+    def _rebuild_index(self, size: int) -> np.ndarray:
+        offsets = []
+        offset = ARCHIVE_HEADER.size
+        while offset + RECORD_HEADER.size <= size:
+            self._file.seek(offset)
+            _, count = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            end = offset + RECORD_HEADER.size + count * SAMPLE_DTYPE.itemsize
+            # 写入被中断时最后一条记录可能不完整
+            if end > size:
+                break
+            offsets.append(offset)
+            offset = end
+        return np.asarray(offsets, dtype=INDEX_DTYPE)
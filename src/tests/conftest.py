@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+from comm.transport.virtual import VirtualSerialPair
+
+
+@pytest.fixture
+def virtual_serial_pair():
+    """一对通过伪终端互联的虚拟串口，无需硬件"""
+    if not hasattr(os, "openpty"):
+        pytest.skip("pseudo-terminals are not available on this platform")
+    with VirtualSerialPair() as pair:
+        yield pair
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import tty
+
+import pytest
+
+from comm.protocol.command import Command
+from comm.protocol.parser import MessageParser
+from comm.transport.aio import AsyncSerialTransport
+from handler.aio_manager import AsyncCommManager
+
+
+class PtyDevice:
+    """在伪终端主端模拟仪器：应答握手，可选择忽略前几次请求"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, ignore: int = 0):
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        os.close(slave)
+        os.set_blocking(self.master, False)
+        self.ignore = ignore
+        self.requests = 0
+        self._parser = MessageParser()
+        loop.add_reader(self.master, self._on_readable)
+        self._loop = loop
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.master, 4096)
+        except OSError:
+            return
+        self._parser.feed(data)
+        for msg in self._parser.parse():
+            if msg.command == Command.HANDSHAKE_REQ:
+                self.requests += 1
+                if self.requests > self.ignore:
+                    os.write(self.master, MessageParser.pack(Command.HANDSHAKE_RES))
+            elif msg.command == Command.CHECK_LIGHT_STABILITY:
+                os.write(
+                    self.master,
+                    MessageParser.pack(Command.CHECK_LIGHT_STABILITY_RES, b"\x00" * 4000),
+                )
+
+    def close(self):
+        self._loop.remove_reader(self.master)
+        os.close(self.master)
+
+
+async def open_pair(ignore: int = 0) -> tuple[PtyDevice, AsyncCommManager]:
+    loop = asyncio.get_running_loop()
+    device = PtyDevice(loop, ignore)
+    manager = AsyncCommManager(AsyncSerialTransport(device.port))
+    return device, manager
+
+
+def test_handshake_and_send_and_wait():
+    async def main():
+        device, manager = await open_pair()
+        try:
+            await manager.connect(timeout=1, retries=0)
+            assert manager.is_connected
+            msg = await manager.send_and_wait(
+                Command.CHECK_LIGHT_STABILITY, Command.CHECK_LIGHT_STABILITY_RES, 1, b"\x01"
+            )
+            assert len(msg.data) == 4000
+        finally:
+            manager.disconnect()
+            device.close()
+
+    asyncio.run(main())
+
+
+def test_handshake_retries_on_event_loop_timers():
+    async def main():
+        device, manager = await open_pair(ignore=2)
+        try:
+            await manager.connect(timeout=0.05, retry_interval=0.01, retries=5)
+            assert device.requests == 3
+        finally:
+            manager.disconnect()
+            device.close()
+
+    asyncio.run(main())
+
+
+def test_send_and_wait_timeout():
+    async def main():
+        device, manager = await open_pair(ignore=10)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await manager.connect(timeout=0.05, retry_interval=0.01, retries=1)
+        finally:
+            manager.disconnect()
+            device.close()
+
+    asyncio.run(main())
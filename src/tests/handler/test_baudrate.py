@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import Future
+
+from comm.protocol.command import Command
+from comm.transport.serial import SerialTransport
+from handler.manager import CommManager
+from slave import SlaveManager
+
+
+def connect(port_a: str, port_b: str, **slave_kwargs) -> tuple[CommManager, SlaveManager]:
+    slave = SlaveManager(transport=SerialTransport(port_b), **slave_kwargs)
+    master = CommManager(SerialTransport(port_a))
+    slave.connect()
+    master.connect()
+    deadline = time.monotonic() + 5
+    while not master.is_handshake_complete:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return master, slave
+
+
+def test_negotiate_higher_baudrate(virtual_serial_pair):
+    master, slave = connect(virtual_serial_pair.port_a, virtual_serial_pair.port_b)
+    try:
+        assert master.negotiate_baudrate(921600).result(3) == 921600
+        assert master.transport.baudrate == 921600
+        assert slave.transport.baudrate == 921600
+        # 确认后下位机不再退回
+        time.sleep(0.1)
+        assert slave._fallback_timer is None
+    finally:
+        master.disconnect()
+        slave.disconnect()
+
+    # 断开后恢复协商前的波特率，以便重新连接
+    assert master.transport.baudrate == 115200
+
+
+def test_device_caps_proposed_baudrate(virtual_serial_pair):
+    master, slave = connect(
+        virtual_serial_pair.port_a, virtual_serial_pair.port_b, max_baudrate=460800
+    )
+    try:
+        assert master.negotiate_baudrate(921600).result(3) == 460800
+        assert slave.transport.baudrate == 460800
+    finally:
+        master.disconnect()
+        slave.disconnect()
+
+
+def test_both_sides_fall_back_when_probe_fails(virtual_serial_pair):
+    master, slave = connect(
+        virtual_serial_pair.port_a, virtual_serial_pair.port_b, baudrate_fallback=0.3
+    )
+    # 模拟新波特率下验证帧无法到达下位机
+    del slave._message_handlers[Command.BAUD_RATE_PROBE]
+    master._baudrate_negotiator.probe_timeout = 0.05
+    try:
+        assert master.negotiate_baudrate(921600).result(3) == 115200
+        deadline = time.monotonic() + 2
+        while slave.transport.baudrate != 115200:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        master.disconnect()
+        slave.disconnect()
+
+
+def test_lost_probe_response_does_not_split_link(virtual_serial_pair):
+    master, slave = connect(virtual_serial_pair.port_a, virtual_serial_pair.port_b)
+    negotiator = master._baudrate_negotiator
+    negotiator.probe_timeout = 0.05
+    # 伪终端不区分波特率，双方波特率不一致时由下位机丢弃验证帧
+    receive_probe = slave.receive_baudrate_probe
+
+    def probe_at_rate(raw_message):
+        if master.transport.baudrate == slave.transport.baudrate:
+            receive_probe(raw_message)
+
+    slave._message_handlers[Command.BAUD_RATE_PROBE] = probe_at_rate
+    # 下位机已切换并确认，但前 probe_retries 个验证响应全部丢失
+    send_message = slave._send_message
+    lost = []
+
+    def lossy_send(command, data=b"", seq=None):
+        if command == Command.BAUD_RATE_PROBE_RES and len(lost) < negotiator.probe_retries:
+            lost.append(command)
+            future = Future()
+            future.set_result(0)
+            return future
+        return send_message(command, data, seq)
+
+    slave._send_message = lossy_send
+    try:
+        assert master.negotiate_baudrate(921600).result(5) == 921600
+        assert len(lost) == negotiator.probe_retries
+        assert slave.transport.baudrate == 921600
+    finally:
+        master.disconnect()
+        slave.disconnect()
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from comm.protocol.command import Command
+from comm.protocol.parser import RawMessage
+from handler.event_bus import DeliveryPolicy, EventBus, Topic
+from handler.executor import DispatchExecutor
+from handler.light_stablity import LightStabilityHandler
+from handler.topics import LIGHT_STABILITY, ScanResult
+from util.scheduler import Scheduler, VirtualClock
+
+NUMBERS = Topic("numbers", int)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_all_policy_keeps_order():
+    bus = EventBus(DispatchExecutor(workers=4))
+    received = []
+    bus.subscribe(NUMBERS, received.append, maxsize=200)
+    for i in range(100):
+        bus.publish(NUMBERS, i)
+    assert wait_until(lambda: len(received) == 100)
+    assert received == list(range(100))
+
+    stats = bus.stats()["numbers"]
+    assert stats.published == 100 and stats.delivered == 100 and stats.dropped == 0
+
+
+def test_publish_checks_event_type():
+    bus = EventBus()
+    with pytest.raises(TypeError):
+        bus.publish(NUMBERS, "1")
+
+
+def test_slow_subscriber_only_drops_its_own_events():
+    bus = EventBus(DispatchExecutor(workers=2))
+    release = threading.Event()
+    slow, latest, fast = [], [], []
+
+    def slow_callback(event):
+        release.wait(2)
+        slow.append(event)
+
+    bus.subscribe(NUMBERS, slow_callback, maxsize=4)
+    bus.subscribe(NUMBERS, latest.append, DeliveryPolicy.LATEST)
+    bus.subscribe(NUMBERS, fast.append, maxsize=100)
+    for i in range(20):
+        bus.publish(NUMBERS, i)
+        # 慢订阅者阻塞期间其它订阅者照常收到每个事件
+        assert wait_until(lambda: len(fast) == i + 1)
+    release.set()
+    assert wait_until(lambda: len(slow) == 5)
+    time.sleep(0.05)
+
+    assert fast == list(range(20))
+    # 第一个事件正在处理，之后只保留最新的 4 个
+    assert slow == [0, 16, 17, 18, 19]
+    assert latest[-1] == 19
+    stats = bus.stats()["numbers"]
+    assert stats.subscribers == 3
+    assert stats.dropped == 15 + 20 - len(latest)
+
+
+def test_batch_by_size_and_interval():
+    scheduler = Scheduler(VirtualClock())
+    bus = EventBus(DispatchExecutor(), scheduler)
+    batches = []
+    bus.subscribe(NUMBERS, batches.append, DeliveryPolicy.BATCH, batch_size=4, batch_interval=1.0)
+    for i in range(6):
+        bus.publish(NUMBERS, i)
+    assert wait_until(lambda: len(batches) == 1)
+    assert batches == [[0, 1, 2, 3]]
+
+    # 剩余不足一批的事件等待 batch_interval 后投递
+    scheduler.advance(0.5)
+    time.sleep(0.05)
+    assert len(batches) == 1
+    scheduler.advance(0.5)
+    assert wait_until(lambda: len(batches) == 2)
+    assert batches[1] == [4, 5]
+
+
+def test_unsubscribe_stops_delivery():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe(NUMBERS, received.append)
+    bus.publish(NUMBERS, 1)
+    assert wait_until(lambda: received == [1])
+    subscription.cancel()
+    bus.publish(NUMBERS, 2)
+    time.sleep(0.05)
+
+    assert received == [1]
+    stats = bus.stats()["numbers"]
+    assert stats.subscribers == 0 and stats.delivered == 1
+
+
+def test_light_stability_result_is_published():
+    bus = EventBus()
+    results = []
+    bus.subscribe(LIGHT_STABILITY, results.append)
+    handler = LightStabilityHandler(bus)
+    samples = np.sin(np.linspace(0, 20, 256)).astype(np.float32)
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, samples.astype(">f4").tobytes()))
+
+    assert wait_until(lambda: len(results) == 1)
+    assert isinstance(results[0], ScanResult)
+    np.testing.assert_allclose(results[0].interference_data, samples)
+
+
+def test_light_stability_decodes_into_reused_buffer():
+    bus = EventBus()
+    handler = LightStabilityHandler(bus)
+    scans = [np.full(64, i, dtype=np.float32) for i in range(3)]
+
+    def receive(scan):
+        handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, scan.astype(">f4").tobytes()))
+
+    # 没有订阅者时只解码和计算光谱，不拷贝
+    receive(scans[0])
+    buffer = handler._buffer
+    results = []
+    bus.subscribe(LIGHT_STABILITY, results.append)
+    for scan in scans[1:]:
+        receive(scan)
+    assert wait_until(lambda: len(results) == 2)
+
+    assert handler._buffer is buffer
+    # 发布出去的数据不随可复用数组变化
+    for result, scan in zip(results, scans[1:]):
+        assert not np.may_share_memory(result.interference_data, buffer)
+        np.testing.assert_array_equal(result.interference_data, scan)
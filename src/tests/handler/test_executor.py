@@ -0,0 +1,153 @@
+import threading
+import time
+
+import numpy as np
+
+from comm.protocol.codec import CodecKind, PayloadCodec
+from comm.protocol.command import Command
+from comm.protocol.parser import MessageParser, RawMessage
+from comm.transport.loopback import LoopbackTransport
+from handler.base import MessageHandler
+from handler.executor import DispatchExecutor, Overflow
+from handler.manager import CommManager
+from handler.topics import LIGHT_STABILITY
+
+
+def test_lane_keeps_order():
+    executor = DispatchExecutor(workers=4, max_pending=100)
+    results = []
+    for i in range(100):
+        executor.submit("scan", results.append, i)
+    assert executor.join(2)
+    executor.shutdown()
+    assert results == list(range(100))
+
+
+def test_slow_lane_is_isolated_and_reported():
+    executor = DispatchExecutor(workers=2, max_pending=4, slow_threshold=0.05)
+    # 明确允许丢失的通道，积压时丢弃最早的任务
+    executor.set_overflow("slow", Overflow.DROP_OLDEST)
+    release = threading.Event()
+    fast = []
+    for _ in range(10):
+        executor.submit("slow", release.wait, 1)
+    # 慢通道阻塞期间其它通道照常执行
+    for i in range(10):
+        executor.submit("fast", fast.append, i)
+        deadline = time.monotonic() + 1
+        while len(fast) <= i and time.monotonic() < deadline:
+            time.sleep(0.001)
+    assert fast == list(range(10))
+    assert executor.slow_lanes() == ["slow"]
+
+    release.set()
+    assert executor.join(2)
+    stats = executor.stats()
+    executor.shutdown()
+    assert stats["slow"].dropped == 5
+    assert stats["slow"].completed == 5
+    assert stats["fast"].dropped == 0
+
+
+def test_full_lane_blocks_instead_of_dropping():
+    executor = DispatchExecutor(workers=2, max_pending=2)
+    release = threading.Event()
+    results = []
+
+    def handle(i):
+        release.wait(2)
+        results.append(i)
+
+    def produce():
+        for i in range(6):
+            executor.submit("scan", handle, i)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    # 第一个任务执行中、两个排队，之后的提交等待
+    time.sleep(0.1)
+    assert producer.is_alive()
+    release.set()
+    producer.join(2)
+    assert executor.join(2)
+    stats = executor.stats()["scan"]
+    executor.shutdown()
+
+    assert results == list(range(6))
+    assert stats.dropped == 0 and stats.blocked >= 1
+
+
+def test_shutdown_releases_blocked_submitter():
+    executor = DispatchExecutor(workers=1, max_pending=1)
+    release = threading.Event()
+    for _ in range(2):
+        executor.submit("scan", release.wait, 2)
+    accepted = []
+    producer = threading.Thread(
+        target=lambda: accepted.append(executor.submit("scan", release.wait, 2))
+    )
+    producer.start()
+    time.sleep(0.05)
+    executor.shutdown(wait=False)
+    producer.join(2)
+    release.set()
+
+    assert not producer.is_alive()
+    assert accepted == [False]
+
+
+class _Recorder(MessageHandler):
+    def __init__(self):
+        self.messages: list[RawMessage] = []
+        self.thread = None
+
+    def handle(self, msg: RawMessage):
+        self.thread = threading.current_thread()
+        self.messages.append(msg)
+
+
+def test_manager_copies_payload_before_dispatch():
+    master, _ = LoopbackTransport.pair()
+    manager = CommManager(master)
+    recorder = _Recorder()
+    manager.register_handler(Command.CHECK_LIGHT_STABILITY_RES, recorder)
+
+    buffer = bytearray(MessageParser().pack(Command.CHECK_LIGHT_STABILITY_RES, b"\x01" * 8))
+    manager._handle_raw_data(memoryview(buffer))
+    # 解析器复用接收缓冲区
+    buffer[:] = bytes(len(buffer))
+    assert manager.executor.join(1)
+    manager.executor.shutdown()
+
+    assert recorder.messages[0].data == b"\x01" * 8
+    assert recorder.thread is not threading.current_thread()
+
+
+def test_codec_switch_applies_after_queued_scans():
+    master, _ = LoopbackTransport.pair()
+    manager = CommManager(master, keepalive_interval=None)
+    results = []
+    manager.events.subscribe(LIGHT_STABILITY, results.append)
+    scan = np.linspace(-1, 1, 64, dtype=np.float32)
+    int16 = PayloadCodec(CodecKind.INT16)
+
+    # 干涉图处理通道被占用时到达：旧编码的干涉图、编码切换、新编码的干涉图
+    release = threading.Event()
+    manager.executor.submit(f"{manager.name}:CHECK_LIGHT_STABILITY_RES", release.wait, 1)
+    parser = MessageParser()
+    for command, data in [
+        (Command.CHECK_LIGHT_STABILITY_RES, PayloadCodec().encode(scan)),
+        (Command.SET_CODEC_RES, int16.to_bytes()),
+        (Command.CHECK_LIGHT_STABILITY_RES, int16.encode(scan)),
+    ]:
+        manager._handle_raw_data(parser.pack(command, bytes(data)))
+    release.set()
+    assert manager.executor.join(1)
+    deadline = time.monotonic() + 1
+    while len(results) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    manager.executor.shutdown()
+
+    assert len(results) == 2
+    np.testing.assert_array_equal(results[0].interference_data, scan)
+    np.testing.assert_allclose(results[1].interference_data, scan, atol=1e-4)
@@ -0,0 +1,61 @@
+import time
+
+from comm.protocol.command import Command
+from comm.protocol.parser import RawMessage
+from comm.transport.loopback import LoopbackTransport
+from handler.keepalive import KEEPALIVE_REQ_FORMAT, KEEPALIVE_RES_FORMAT, LinkCounters, LinkMonitor
+from handler.manager import CommManager
+from slave import SlaveManager
+from util.scheduler import Scheduler, VirtualClock
+
+
+def test_keepalive_over_link():
+    master_transport, slave_transport = LoopbackTransport.pair()
+    slave = SlaveManager(transport=slave_transport)
+    master = CommManager(master_transport, keepalive_interval=0.02)
+    slave.connect()
+    master.connect()
+    try:
+        deadline = time.monotonic() + 3
+        while master.link_stats().samples < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        master.check_light_stability()
+        time.sleep(0.05)
+        stats = master.link_stats()
+    finally:
+        master.disconnect()
+        slave.disconnect()
+
+    assert stats.samples >= 5
+    assert 0 < stats.rtt_p50 <= stats.rtt_p99 <= stats.rtt_max < 0.5
+    assert stats.rx_bytes_per_second > 0 and stats.tx_bytes_per_second > 0
+    assert stats.crc_error_rate == 0
+    assert not master.link_monitor.is_running
+
+
+def test_lost_keepalives_and_crc_errors():
+    scheduler = Scheduler(VirtualClock())
+    sent: list[bytes] = []
+    counters = LinkCounters()
+    monitor = LinkMonitor(
+        lambda command, data: sent.append(data),
+        lambda: LinkCounters(**vars(counters)),
+        interval=1.0,
+        timeout=3.0,
+        scheduler=scheduler,
+    )
+    monitor.start()
+    scheduler.advance(4.0)
+    assert len(sent) == 4
+
+    # 只有最后一个请求得到响应，之前的都算丢失
+    (sent_ns,) = KEEPALIVE_REQ_FORMAT.unpack(sent[-1])
+    monitor.handle(RawMessage(Command.KEEPALIVE_RES, KEEPALIVE_RES_FORMAT.pack(sent_ns, 0)))
+    counters.frames, counters.bad_frames = 99, 1
+    stats = monitor.stats()
+    monitor.stop()
+
+    assert stats.sent == 4 and stats.lost == 3 and stats.samples == 1
+    assert stats.crc_error_rate == 0.01
+    scheduler.advance(10.0)
+    assert len(sent) == 4
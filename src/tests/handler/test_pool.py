@@ -0,0 +1,74 @@
+import threading
+import time
+
+from comm.protocol.command import Command
+from comm.transport.serial import SerialTransport
+from comm.transport.tcp import TcpServerTransport
+from handler.pool import DevicePool
+from handler.topics import LIGHT_STABILITY
+from slave import SlaveManager
+
+
+def test_pool_routes_by_device(virtual_serial_pair):
+    serial_slave = SlaveManager(transport=SerialTransport(virtual_serial_pair.port_b))
+    tcp_server = TcpServerTransport()
+    tcp_server.open()
+    tcp_slave = SlaveManager(transport=tcp_server)
+    serial_slave.connect()
+    tcp_slave.connect()
+
+    received = []
+    threads = set()
+    event_threads = set()
+
+    def on_result(device_id, msg):
+        threads.add(threading.current_thread().name)
+        received.append((device_id, len(msg.data)))
+
+    try:
+        with DevicePool() as pool:
+            pool.subscribe(Command.CHECK_LIGHT_STABILITY_RES, on_result)
+            pool.add_serial("serial", virtual_serial_pair.port_a)
+            pool.add_socket("tcp", "127.0.0.1", tcp_server.port)
+            assert pool.wait_handshake()
+            for device_id in pool.devices:
+                pool[device_id].events.subscribe(
+                    LIGHT_STABILITY, lambda _: event_threads.add(threading.current_thread().name)
+                )
+
+            for device_id in pool.devices:
+                for _ in range(3):
+                    pool[device_id].check_light_stability()
+            deadline = time.monotonic() + 5
+            while (len(received) < 6 or not event_threads) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            rtt = pool["tcp"].request(Command.HANDSHAKE_REQ, response=Command.HANDSHAKE_RES)
+            rtt.result(2)
+            stats = pool.stats()
+    finally:
+        serial_slave.disconnect()
+        tcp_slave.disconnect()
+
+    assert sorted(received) == [("serial", 4000)] * 3 + [("tcp", 4000)] * 3
+    # 消息处理在共用的工作线程中执行，不占用 I/O 线程
+    assert threads and all(name.startswith("device pool dispatch") for name in threads)
+    # 各设备的事件总线共用一个执行器
+    assert event_threads and all(name.startswith("device pool events") for name in event_threads)
+    assert set(pool.executor.stats()) >= {
+        "serial:CHECK_LIGHT_STABILITY_RES",
+        "tcp:CHECK_LIGHT_STABILITY_RES",
+    }
+    assert stats["serial"].frames >= 4 and stats["tcp"].frames >= 5
+    assert stats["serial"].rx_bytes > 3 * 4000
+    assert stats["tcp"].requests == 1 and stats["tcp"].max_rtt > 0
+
+
+def test_pool_send_after_peer_closed():
+    server = TcpServerTransport()
+    server.open()
+    with DevicePool() as pool:
+        manager = pool.add_socket("tcp", "127.0.0.1", server.port)
+        server.close()
+        assert manager.transport.closed.wait(2)
+        future = manager._send_message(Command.HANDSHAKE_REQ)
+        assert isinstance(future.exception(1), ConnectionError)
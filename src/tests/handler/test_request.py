@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+import pytest
+
+from bench.link_bench import LinkBench
+from comm.protocol.command import Command
+from comm.protocol.parser import RawMessage
+from comm.transport.loopback import LinkModel, LoopbackTransport
+from handler.manager import CommManager
+from handler.request import RequestTracker
+from util.scheduler import Scheduler, VirtualClock
+
+
+def test_requests_in_flight_resolve_by_sequence():
+    # 带宽有限，扫描数据传输期间握手请求仍在途
+    with LinkBench.over_loopback(LinkModel(bandwidth=2e6)) as bench:
+        bench.slave.signal_points = 16384
+        master = bench.master
+        scans = [
+            master.request(Command.CHECK_LIGHT_STABILITY, b"\01", Command.CHECK_LIGHT_STABILITY_RES)
+            for _ in range(3)
+        ]
+        polls = [master.request(Command.HANDSHAKE_REQ, response=Command.HANDSHAKE_RES) for _ in range(5)]
+
+        assert master.requests.in_flight == 8
+        for poll in polls:
+            assert poll.result(2).command == Command.HANDSHAKE_RES
+        results = [scan.result(5) for scan in scans]
+
+    assert len({msg.seq for msg in results}) == 3
+    assert all(len(msg.data) == 16384 * 4 for msg in results)
+    assert isinstance(results[0].data, bytes)
+    assert master.requests.in_flight == 0
+
+
+def test_fragmented_response_keeps_sequence():
+    with LinkBench.over_loopback() as bench:
+        bench.slave.fragment_size = 1024
+        msg = bench.master.request(Command.CHECK_LIGHT_STABILITY, b"\01").result(2)
+
+    assert msg.command == Command.CHECK_LIGHT_STABILITY_RES
+    assert len(msg.data) == 1000 * 4
+
+
+def test_timeout_then_late_response_is_dropped():
+    tracker = RequestTracker()
+    seq, future = tracker.register(Command.HANDSHAKE_REQ, Command.HANDSHAKE_RES, timeout=0.01)
+    with pytest.raises(TimeoutError):
+        future.result(1)
+
+    assert tracker.resolve(RawMessage(Command.HANDSHAKE_RES, b"", seq))
+    assert tracker.stats.timeouts == 1
+    assert tracker.stats.late_responses == 1
+    # 同一序号只识别一次迟到响应
+    assert not tracker.resolve(RawMessage(Command.HANDSHAKE_RES, b"", seq))
+    # 不带序号的消息交给普通处理器
+    assert not tracker.resolve(RawMessage(Command.HANDSHAKE_RES, b""))
+
+
+def test_unsolicited_sequence_reaches_handlers():
+    tracker = RequestTracker()
+    seq, future = tracker.register(Command.CHECK_LIGHT_STABILITY)
+    # 下位机主动发送的带序号帧不属于任何请求
+    assert not tracker.resolve(RawMessage(Command.CHECK_STANDARD_WAVE_ACCURACY_RES, b"\x01", seq + 100))
+    assert tracker.stats.unsolicited == 1 and tracker.stats.late_responses == 0
+    assert tracker.resolve(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, b"", seq))
+    assert future.result(0).seq == seq
+
+
+def test_request_unregistered_when_send_fails():
+    master, _ = LoopbackTransport.pair()
+    scheduler = Scheduler(VirtualClock())
+    manager = CommManager(master, keepalive_interval=None, scheduler=scheduler)
+    # 负载超过长度字段上限时打包失败
+    with patch.object(manager._parser, "pack", side_effect=ValueError("payload too long")):
+        with pytest.raises(ValueError):
+            manager.request(Command.CHECK_LIGHT_STABILITY, b"\x01")
+
+    # 请求和超时定时器都已注销
+    assert manager.requests.in_flight == 0
+    assert scheduler.pending == 0
+
+
+def test_disconnect_fails_pending_requests():
+    tracker = RequestTracker()
+    _, future = tracker.register(Command.CHECK_LIGHT_STABILITY)
+    tracker.fail_all(ConnectionError("disconnected"))
+    with pytest.raises(ConnectionError):
+        future.result(0)
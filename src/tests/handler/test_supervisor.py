@@ -0,0 +1,195 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import serial
+
+from comm.protocol.command import Command
+from comm.transport.loopback import LoopbackTransport
+from comm.transport.serial import PortIdentity, SerialTransport, find_serial_port
+from handler.manager import CommManager
+from handler.supervisor import ConnectionState, ConnectionSupervisor
+from slave import SlaveManager
+from util.scheduler import Scheduler, VirtualClock
+
+
+class UnpluggedSerial:
+    """每次读取都失败的串口替身，模拟 USB 转串口被拔出"""
+
+    in_waiting = 0
+
+    def __init__(self, **kwargs):
+        self.is_open = True
+        self.reads = 0
+
+    def fileno(self):
+        raise OSError("not selectable")
+
+    def read(self, size: int) -> bytes:
+        self.reads += 1
+        raise serial.SerialException("device reports readiness to read but returned no data")
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+
+
+def test_receive_loop_stops_on_device_loss():
+    transport = SerialTransport("/dev/ttyUSB0")
+    lost = []
+    fake = {}
+
+    def factory(**kwargs):
+        fake["serial"] = UnpluggedSerial(**kwargs)
+        return fake["serial"]
+
+    transport.on_connection_lost(lost.append)
+    with patch("comm.transport.serial.serial.Serial", side_effect=factory):
+        transport.open()
+    time.sleep(0.1)
+    transport.close()
+
+    # 只报告一次，不在错误上空转
+    assert len(lost) == 1
+    assert fake["serial"].reads == 1
+
+
+def test_find_port_by_serial_number_after_rename():
+    ports = [
+        SimpleNamespace(device="/dev/ttyUSB1", serial_number="OTHER", vid=0x0403, pid=0x6001),
+        SimpleNamespace(device="/dev/ttyUSB2", serial_number="FT123", vid=0x0403, pid=0x6001),
+    ]
+    with patch("serial.tools.list_ports.comports", return_value=ports):
+        assert find_serial_port(PortIdentity("FT123", 0x0403, 0x6001)) == "/dev/ttyUSB2"
+        assert find_serial_port(PortIdentity(None, 0x0403, 0x6001)) == "/dev/ttyUSB1"
+        assert find_serial_port(PortIdentity("MISSING")) is None
+
+
+def test_reconnect_resumes_collecting(virtual_serial_pair):
+    slave = SlaveManager(transport=SerialTransport(virtual_serial_pair.port_b))
+    collects = []
+    slave._message_handlers[Command.START_COLLECT] = lambda msg: collects.append(msg.command)
+    checks = []
+    slave._message_handlers[Command.CHECK_LIGHT_STABILITY] = lambda msg: checks.append(msg.data)
+    transport = SerialTransport(virtual_serial_pair.port_a)
+    master = CommManager(transport, keepalive_interval=None)
+    master.supervisor.min_interval = 0.05
+    states = []
+    master.supervisor._on_state_change = states.append
+
+    def wait_until(condition, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    slave.connect()
+    master.connect()
+    try:
+        assert wait_until(lambda: master.is_handshake_complete)
+        master.start_collect()
+        master.check_light_stability()
+        assert wait_until(lambda: len(collects) == 1 and len(checks) == 1)
+        # 下位机不响应 CHECK_STOP，请求一直在途
+        pending = master.request(Command.CHECK_STOP, b"\03", timeout=30)
+
+        def unplug(block_size):
+            del transport._read_block
+            raise serial.SerialException("device disconnected")
+
+        transport._read_block = unplug
+        slave._send_message(Command.HANDSHAKE_REQ)
+
+        with pytest.raises(ConnectionError):
+            pending.result(2)
+        assert wait_until(lambda: master.connection_state is ConnectionState.CONNECTED)
+        assert wait_until(lambda: master.is_handshake_complete)
+        assert wait_until(lambda: len(collects) == 2)
+        # 未停止的光源稳定性检测同样重新下发
+        assert wait_until(lambda: checks == [b"\x01", b"\x01"])
+        master.check_stop()
+        assert master._active_check is None
+    finally:
+        master.disconnect()
+        slave.disconnect()
+
+    assert states == [
+        ConnectionState.CONNECTED,
+        ConnectionState.RECONNECTING,
+        ConnectionState.CONNECTED,
+        ConnectionState.DISCONNECTED,
+    ]
+    assert master.supervisor.stats.faults == 1
+    assert master.supervisor.stats.reconnects == 1
+
+
+class BlockingTransport:
+    """第一次打开失败，第二次打开阻塞到 release 被设置"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.opens = 0
+
+    def open(self):
+        self.opens += 1
+        if self.opens == 1:
+            raise ConnectionError("device not ready")
+        self.release.wait(2)
+
+
+def test_recovery_does_not_block_scheduler():
+    scheduler = Scheduler(name="test scheduler")
+    scheduler.start()
+    transport = BlockingTransport()
+    closed = threading.Event()
+    resumed = threading.Event()
+    manager = SimpleNamespace(
+        name="dev",
+        transport=transport,
+        _close_session=lambda exc: closed.set(),
+        _resume_session=resumed.set,
+    )
+    supervisor = ConnectionSupervisor(manager, min_interval=0.01, scheduler=scheduler)
+    supervisor.attach()
+    try:
+        supervisor.connection_lost(OSError("unplugged"))
+        deadline = time.monotonic() + 2
+        while transport.opens < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert closed.is_set() and transport.opens == 2
+        # 重新打开阻塞期间其它定时器照常执行
+        fired = threading.Event()
+        scheduler.call_later(0.01, fired.set)
+        assert fired.wait(1)
+        assert not resumed.is_set()
+        transport.release.set()
+        assert resumed.wait(2)
+    finally:
+        supervisor.stop()
+        scheduler.stop()
+
+    assert supervisor.stats.attempts == 2
+    assert supervisor.stats.failed_attempts == 0
+    assert supervisor.stats.reconnects == 1
+
+
+def test_disconnect_without_reconnect_runs_off_scheduler():
+    master_transport, _ = LoopbackTransport.pair()
+    scheduler = Scheduler(VirtualClock())
+    master = CommManager(
+        master_transport, keepalive_interval=None, scheduler=scheduler, auto_reconnect=False
+    )
+    master.connect()
+    master._handle_connection_lost(ConnectionError("device disconnected"))
+
+    # 关闭传输在执行器通道中完成，不占用调度器
+    assert master.executor.join(2)
+    assert not master.is_connected
+    assert not master_transport.is_open
+    assert "comm:disconnect" in master.executor.stats()
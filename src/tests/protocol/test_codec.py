@@ -0,0 +1,91 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from bench.link_bench import LinkBench
+from comm.protocol.codec import (
+    CODEC_HEADER,
+    CodecFlag,
+    CodecKind,
+    PayloadCodec,
+    decode_payload,
+    float32_codec,
+)
+from comm.protocol.payload import float32_decoder
+
+
+def interferogram(points: int = 16384) -> np.ndarray:
+    x = np.linspace(-1, 1, points)
+    rng = np.random.default_rng(0)
+    return np.cos(200 * x) * np.exp(-40 * x**2) * 3.0 + 0.5 + rng.normal(0, 1e-3, points)
+
+
+@pytest.mark.parametrize("kind", [CodecKind.INT16, CodecKind.INT24])
+@pytest.mark.parametrize(
+    "flags", [CodecFlag.NONE, CodecFlag.DELTA, CodecFlag.ZLIB, CodecFlag.DELTA | CodecFlag.ZLIB]
+)
+def test_round_trip_within_quantization_step(kind, flags):
+    values = interferogram()
+    codec = PayloadCodec(kind, flags)
+    data = codec.encode(values)
+    _, _, count, scale, _ = CODEC_HEADER.unpack_from(data)
+
+    result = codec.decode(data)
+    assert count == len(values)
+    assert result.dtype == np.float32
+    # 量化误差不超过半个步长（另加 float32 舍入）
+    assert np.max(np.abs(result - values)) <= scale / 2 + 1e-6
+
+
+def test_integer_adc_samples_are_lossless():
+    values = np.random.default_rng(1).integers(-(1 << 23), 1 << 23, 4096, dtype=np.int32)
+    codec = PayloadCodec(CodecKind.INT24, CodecFlag.DELTA)
+    assert np.array_equal(decode_payload(codec.encode(values)), values.astype(np.float32))
+
+
+def test_wire_size_reduction():
+    values = interferogram()
+    raw = len(float32_codec.encode(values))
+    int16 = len(PayloadCodec(CodecKind.INT16).encode(values))
+    packed = len(PayloadCodec(CodecKind.INT16, CodecFlag.DELTA | CodecFlag.ZLIB).encode(values))
+
+    assert raw / int16 > 1.99
+    assert raw / packed > 2.5
+
+
+def test_float32_codec_matches_legacy_payload():
+    values = interferogram(100)
+    data = float32_codec.encode(values)
+    assert np.array_equal(float32_decoder.decode(data), values.astype(np.float32))
+    assert PayloadCodec.from_bytes(PayloadCodec(CodecKind.INT24, CodecFlag.ZLIB).to_bytes()) == (
+        PayloadCodec(CodecKind.INT24, CodecFlag.ZLIB)
+    )
+
+
+def test_zlib_payload_cannot_expand_beyond_header():
+    # 头部声明 16 个采样点，压缩数据却能解压出 64 MiB
+    bomb = CODEC_HEADER.pack(CodecKind.INT16, CodecFlag.ZLIB, 16, 1.0, 0.0) + zlib.compress(
+        bytes(64 << 20), 9
+    )
+    assert len(bomb) < 128 * 1024
+    with pytest.raises(ValueError):
+        decode_payload(bomb)
+
+    short = CODEC_HEADER.pack(CodecKind.INT16, CodecFlag.ZLIB, 16, 1.0, 0.0) + zlib.compress(
+        bytes(30)
+    )
+    with pytest.raises(ValueError):
+        decode_payload(short)
+
+
+def test_negotiate_codec_with_slave():
+    codec = PayloadCodec(CodecKind.INT16, CodecFlag.DELTA | CodecFlag.ZLIB)
+    with LinkBench.over_loopback() as bench:
+        assert bench.master.negotiate_codec(codec).result(2) == codec
+        assert bench.slave.codec == codec
+        assert bench.master.light_stability_handler.codec == codec
+
+        result = bench.measure_light_stability(points=4096, count=1)
+    # 模拟信号以白噪声为主，zlib 几乎无收益，主要来自 int16 量化
+    assert result["payload_len"] < 4096 * 4 / 1.9
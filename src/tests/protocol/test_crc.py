@@ -0,0 +1,42 @@
+import os
+
+from bench import parser_bench
+from comm.protocol.crc import Crc16, calc_crc16
+from comm.protocol.parser import MessageParser
+
+
+def bitwise_crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+            crc &= 0xFFFF
+    return crc
+
+
+def test_matches_bitwise_reference():
+    assert calc_crc16(b"123456789") == 0x29B1
+    for size in (0, 1, 7, 255, 4096):
+        data = os.urandom(size)
+        assert calc_crc16(data) == bitwise_crc16(data)
+
+
+def test_incremental_update():
+    data = os.urandom(1000)
+    crc = Crc16()
+    for i in range(0, len(data), 33):
+        crc.update(data[i : i + 33])
+    assert crc.value == calc_crc16(data)
+    assert calc_crc16(data[500:], calc_crc16(data[:500])) == crc.value
+
+
+def test_parser_bench_parses_every_frame():
+    # 耗时由 python -m bench.parser_bench --check 检查，这里只验证基准本身可运行
+    result = parser_bench.run(rate=64 * 1024, payload_size=4000, chunk_size=4096, repeat=1)
+    frame_size = MessageParser.frame_size(4000)
+    assert result["frames"] == (64 * 1024) // frame_size
+    assert result["bytes"] == result["frames"] * frame_size
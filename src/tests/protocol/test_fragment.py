@@ -0,0 +1,61 @@
+import numpy as np
+
+from bench.link_bench import LinkBench
+from comm.protocol.command import Command
+from comm.protocol.fragment import Fragmenter, Reassembler, pack_nack, unpack_nack
+from comm.transport.loopback import LinkModel, LoopbackTransport
+
+
+def test_reassemble_out_of_order_with_duplicates():
+    data = bytes(np.random.default_rng(0).integers(0, 256, 10000, dtype=np.uint8))
+    fragments = Fragmenter(1024).split(Command.CHECK_LIGHT_STABILITY_RES, data)
+    assert len(fragments) == 10
+
+    reassembler = Reassembler()
+    order = [9, 3, 0, 3, 1, 2, 8, 7, 6, 5]
+    for index in order:
+        _, message = reassembler.add(fragments[index])
+        assert message is None
+    assert reassembler.missing(0) == [4]
+    assert reassembler.stats.duplicates == 1
+
+    _, message = reassembler.add(fragments[4])
+    assert message.command == Command.CHECK_LIGHT_STABILITY_RES
+    assert bytes(message.data) == data
+    assert reassembler.pending == []
+
+
+def test_resend_only_missing_fragments():
+    fragmenter = Fragmenter(100)
+    fragments = fragmenter.split(Command.CHECK_LIGHT_STABILITY_RES, bytes(1000))
+    transfer_id, missing = unpack_nack(pack_nack(0, [2, 7]))
+
+    assert fragmenter.resend(transfer_id, missing) == [fragments[2], fragments[7]]
+    assert fragmenter.resend(99, [0]) == []
+
+
+def test_reassembler_bounds_concurrent_transfers():
+    fragmenter = Fragmenter(100)
+    reassembler = Reassembler(max_transfers=2)
+    for _ in range(3):
+        reassembler.add(fragmenter.split(Command.CHECK_LIGHT_STABILITY_RES, bytes(300))[0])
+
+    assert reassembler.pending == [1, 2]
+    assert reassembler.stats.dropped == 1
+
+
+def test_scan_survives_noisy_link_without_full_retransmit():
+    clean = LinkModel(seed=1)
+    noisy = LinkModel(max_chunk=512, corrupt_rate=2e-5, seed=7)
+    master, slave = LoopbackTransport.pair(clean, noisy)
+    with LinkBench(master, slave) as bench:
+        bench.slave.fragment_size = 1024
+        result = bench.measure_light_stability(points=16384, count=3)
+
+    stats = bench.master.fragment_handler.reassembler.stats
+    assert result["payload_len"] == 16384 * 4
+    assert stats.completed == 3
+    assert slave.stats.corrupted_bytes > 0
+    # 只重发了损坏的分片
+    assert stats.nacks > 0
+    assert stats.fragments - stats.duplicates == 3 * 64
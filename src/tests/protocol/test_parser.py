@@ -0,0 +1,150 @@
+from comm.protocol.buffer import RingBuffer
+from comm.protocol.command import Command
+from comm.protocol.parser import MessageParser
+
+
+def feed_in_chunks(parser: MessageParser, data: bytes, chunk_size: int) -> list:
+    messages = []
+    for i in range(0, len(data), chunk_size):
+        parser.feed(data[i : i + chunk_size])
+        messages.extend((msg.command, bytes(msg.data)) for msg in parser.parse())
+    return messages
+
+
+def test_ring_buffer_compacts_instead_of_growing():
+    buffer = RingBuffer(16)
+    buffer.write(b"0123456789")
+    buffer.consume(8)
+    buffer.write(b"abcdefghij")
+    assert buffer.capacity == 16
+    assert bytes(buffer.view(0, len(buffer))) == b"89abcdefghij"
+
+
+def test_ring_buffer_grows_when_full():
+    buffer = RingBuffer(4)
+    buffer.write(b"0123456789")
+    assert buffer.capacity >= 10
+    assert buffer.find(b"56") == 5
+
+
+def test_parse_fragmented_stream():
+    payload = bytes(range(256)) * 64
+    frame = MessageParser.pack(Command.CHECK_LIGHT_STABILITY_RES, payload)
+    stream = b"\x00\xa5" + frame + b"noise" + frame
+
+    parser = MessageParser(capacity=1024)
+    messages = feed_in_chunks(parser, stream, 7)
+
+    assert messages == [(Command.CHECK_LIGHT_STABILITY_RES, payload)] * 2
+    assert parser.pending == 0
+
+
+def test_zero_copy_payload_is_memoryview():
+    parser = MessageParser(zero_copy=True)
+    parser.feed(MessageParser.pack(Command.HANDSHAKE_RES, b"abc"))
+    (msg,) = list(parser.parse())
+    assert isinstance(msg.data, memoryview)
+    assert msg.data.readonly
+    assert msg.data == b"abc"
+
+
+def test_bad_crc_and_end_flag_are_counted():
+    frame = MessageParser.pack(Command.HANDSHAKE_RES, b"payload")
+    bad_crc = bytearray(frame)
+    bad_crc[10] ^= 0xFF
+    bad_end = frame[:-1] + b"\x00"
+
+    parser = MessageParser()
+    parser.feed(bytes(bad_crc) + bad_end + frame)
+    messages = list(parser.parse())
+
+    assert [bytes(msg.data) for msg in messages] == [b"payload"]
+    assert parser.stats.crc_errors == 1
+    assert parser.stats.end_flag_errors == 1
+    assert parser.stats.frames == 1
+
+
+def test_crc_verification_can_be_disabled():
+    frame = bytearray(MessageParser.pack(Command.HANDSHAKE_RES, b"payload"))
+    frame[-4:-2] = b"\x00\x00"
+    parser = MessageParser(verify_crc=False)
+    parser.feed(bytes(frame))
+    assert len(list(parser.parse())) == 1
+
+
+def test_oversize_length_resyncs_one_byte_past_false_start():
+    good = MessageParser.pack(Command.HANDSHAKE_RES, b"ok")
+    # 负载长度被破坏为 0x40000000
+    corrupt = b"\xa5\x5a\x02\x01\x40\x00\x00\x00"
+
+    parser = MessageParser()
+    parser.feed(corrupt + good)
+    messages = list(parser.parse())
+
+    assert [bytes(msg.data) for msg in messages] == [b"ok"]
+    assert parser.stats.oversize_frames == 1
+    assert parser.stats.false_starts == 1
+    assert parser.stats.last_recovery_bytes == len(corrupt)
+
+
+def test_unknown_command_is_a_false_start():
+    good = MessageParser.pack(Command.HANDSHAKE_REQ)
+    parser = MessageParser()
+    parser.feed(b"\xa5\x5a\xff\xff\x00\x00\x00\x00" + good)
+    assert [msg.command for msg in parser.parse()] == [Command.HANDSHAKE_REQ]
+    assert parser.stats.unknown_commands == 1
+
+
+def test_recovery_after_line_noise_is_bounded():
+    import random
+
+    rng = random.Random(1)
+    noise = bytes(rng.randrange(256) for _ in range(4096)).replace(b"\xa5\x5a", b"\xa5\x00")
+    frame = MessageParser.pack(Command.CHECK_LIGHT_STABILITY_RES, b"\x01" * 100)
+
+    parser = MessageParser()
+    messages = feed_in_chunks(parser, frame + b"\xa5\x5a" + noise + frame, 64)
+
+    assert len(messages) == 2
+    assert parser.stats.skipped_bytes == len(noise) + 2
+    assert parser.stats.max_recovery_bytes == len(noise) + 2
+
+
+def test_pack_variants_produce_identical_frames():
+    import numpy as np
+
+    from comm.protocol.parser import FramePacker
+
+    values = np.linspace(-1, 1, 257)
+    payload = values.astype(">f4").tobytes()
+    expected = MessageParser.pack(Command.CHECK_LIGHT_STABILITY_RES, payload)
+
+    assert MessageParser.pack(Command.CHECK_LIGHT_STABILITY_RES, values.astype(np.float32)) == expected
+    assert b"".join(MessageParser.pack_vectored(Command.CHECK_LIGHT_STABILITY_RES, payload)) == expected
+
+    buffer = bytearray(len(expected) + 3)
+    n = MessageParser.pack_into(buffer, 3, Command.CHECK_LIGHT_STABILITY_RES, payload)
+    assert bytes(buffer[3 : 3 + n]) == expected
+
+    packer = FramePacker(capacity=16)
+    assert packer.pack(Command.CHECK_LIGHT_STABILITY_RES, payload) == expected
+
+    parser = MessageParser()
+    parser.feed(expected)
+    (msg,) = list(parser.parse())
+    assert msg.data == payload
+
+
+def test_sequence_number_round_trip():
+    from comm.protocol.parser import FramePacker
+
+    payload = b"\x01\x02\x03"
+    framed = MessageParser.pack(Command.CHECK_LIGHT_STABILITY, payload, seq=0xBEEF)
+    assert len(framed) == len(MessageParser.pack(Command.CHECK_LIGHT_STABILITY, payload)) + 2
+    assert bytes(FramePacker().pack(Command.CHECK_LIGHT_STABILITY, payload, seq=0xBEEF)) == framed
+
+    parser = MessageParser()
+    parser.feed(framed + MessageParser.pack(Command.HANDSHAKE_REQ))
+    first, second = parser.parse()
+    assert (first.command, first.data, first.seq) == (Command.CHECK_LIGHT_STABILITY, payload, 0xBEEF)
+    assert second.seq is None
@@ -0,0 +1,38 @@
+import struct
+
+import numpy as np
+import pytest
+
+from comm.protocol.payload import PayloadDecoder, float32_decoder
+
+
+def test_decode_matches_struct_unpack():
+    values = [0.5, -1.25, 3.0e6, 0.0]
+    data = struct.pack(f">{len(values)}f", *values)
+    result = float32_decoder.decode(data)
+    assert result.dtype == np.float32
+    assert result.dtype.isnative
+    assert result.tolist() == list(struct.unpack(f">{len(values)}f", data))
+
+
+def test_decode_into_reusable_buffer():
+    out = float32_decoder.buffer(8)
+    data = np.arange(5, dtype=">f4").tobytes()
+    result = float32_decoder.decode(memoryview(data), out=out)
+    assert np.shares_memory(result, out)
+    assert result.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_decode_rejects_bad_length_and_buffer():
+    with pytest.raises(ValueError):
+        float32_decoder.decode(b"\x00" * 5)
+    with pytest.raises(ValueError):
+        float32_decoder.decode(b"\x00" * 16, out=np.empty(2, dtype=np.float32))
+
+
+def test_view_is_zero_copy():
+    data = bytearray(np.arange(3, dtype=">i2").tobytes())
+    decoder = PayloadDecoder(">i2")
+    view = decoder.view(data)
+    data[1] = 9
+    assert view[0] == 9
@@ -0,0 +1,220 @@
+import errno
+import os
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from comm.protocol.command import Command
+from comm.protocol.parser import RawMessage
+from comm.transport.loopback import LoopbackTransport
+from handler import light_stablity
+from handler.event_bus import EventBus
+from handler.executor import DispatchExecutor
+from handler.light_stablity import LightStabilityHandler
+from handler.manager import CommManager
+from handler.topics import ARCHIVE_FAILED
+from storage.archive import (
+    ARCHIVE_FOOTER,
+    ARCHIVE_HEADER,
+    RECORD_HEADER,
+    FsyncPolicy,
+    ScanArchiveReader,
+    ScanArchiveWriter,
+    ScanMetadata,
+)
+
+
+def make_scans(count: int, points: int = 1024) -> list[np.ndarray]:
+    t = np.linspace(0, 20 * np.pi, points)
+    return [np.sin(t + i).astype(np.float32) for i in range(count)]
+
+
+def test_write_and_read_back(tmp_path):
+    path = str(tmp_path / "scans.scan")
+    metadata = ScanMetadata(resolution=8.0, velocity=0.32, laser_wavelength=1550.0, temperature=25.5)
+    scans = make_scans(50)
+    with ScanArchiveWriter(path, metadata, fsync=FsyncPolicy.BATCH, batch_size=8) as writer:
+        for i, scan in enumerate(scans):
+            assert writer.append(scan, timestamp=1000.0 + i)
+        assert writer.flush(2)
+    stats = writer.stats
+
+    assert stats.scans == 50 and stats.samples == 50 * 1024 and stats.dropped == 0
+    assert stats.max_batch <= 8 and stats.fsyncs >= stats.batches
+    # 每个样本 4 字节
+    assert os.path.getsize(path) == (
+        ARCHIVE_HEADER.size
+        + 50 * (RECORD_HEADER.size + 1024 * 4)
+        + 50 * 8
+        + ARCHIVE_FOOTER.size
+    )
+
+    with ScanArchiveReader(path) as reader:
+        assert reader.metadata == metadata
+        assert len(reader) == 50
+        assert reader[7].timestamp == 1007.0
+        np.testing.assert_array_equal(reader[-1].samples, scans[-1])
+        assert [record.timestamp for record in reader] == [1000.0 + i for i in range(50)]
+
+
+def test_index_rebuilt_after_crash(tmp_path):
+    path = str(tmp_path / "crash.scan")
+    scans = make_scans(3, points=16)
+    writer = ScanArchiveWriter(path, fsync=FsyncPolicy.NEVER)
+    for scan in scans:
+        writer.append(scan)
+    assert writer.flush(2)
+    # 模拟写最后一条记录时断电：没有索引，记录不完整
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(time.time(), 16) + b"\0" * 10)
+
+    with ScanArchiveReader(path) as reader:
+        assert len(reader) == 3
+        np.testing.assert_array_equal(reader[2].samples, scans[2])
+    writer.close()
+
+
+class FullDisk:
+    """写出 limit 字节后报告磁盘已满"""
+
+    def __init__(self, file, limit: int):
+        self._file = file
+        self._limit = limit
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            chunk = memoryview(chunk).cast("B")
+            if len(chunk) > self._limit:
+                self._file.write(chunk[: self._limit])
+                raise OSError(errno.ENOSPC, "No space left on device")
+            self._file.write(chunk)
+            self._limit -= len(chunk)
+
+
+def test_write_error_keeps_index_consistent(tmp_path):
+    path = str(tmp_path / "full.scan")
+    scans = make_scans(4, points=64)
+    writer = ScanArchiveWriter(path, batch_size=1)
+    for scan in scans[:2]:
+        writer.append(scan)
+    assert writer.flush(2)
+    # 第三条记录只写出一部分
+    writer._file = FullDisk(writer._file, RECORD_HEADER.size + 100)
+    writer.append(scans[2])
+    assert not writer.flush(2)
+    assert writer.failed
+    assert not writer.append(scans[3])
+    writer.close()
+
+    assert writer.stats.scans == 2 and writer.stats.dropped == 2
+    with ScanArchiveReader(path) as reader:
+        assert len(reader) == 2
+        np.testing.assert_array_equal(reader[1].samples, scans[1])
+    assert os.path.getsize(path) == (
+        ARCHIVE_HEADER.size + 2 * (RECORD_HEADER.size + 64 * 4) + 2 * 8 + ARCHIVE_FOOTER.size
+    )
+
+
+def test_full_queue_drops_new_scans(tmp_path):
+    writer = ScanArchiveWriter(str(tmp_path / "full.scan"), max_pending=2)
+    # 持有锁让写入线程无法取走扫描
+    with writer._cond:
+        assert [writer.append(scan) for scan in make_scans(3, 4)] == [True, True, False]
+    writer.close()
+
+    assert writer.stats.dropped == 1 and writer.stats.scans == 2
+
+
+def test_light_stability_scans_are_archived(tmp_path):
+    master, _ = LoopbackTransport.pair()
+    manager = CommManager(master, keepalive_interval=None, archive_dir=str(tmp_path / "data"))
+    metadata = ScanMetadata(resolution=0.4, velocity=300.0, laser_wavelength=632.8, temperature=24.5)
+    manager.set_acquisition_metadata(metadata)
+    handler = manager.light_stability_handler
+    scans = make_scans(5, points=256)
+    start = time.perf_counter()
+    for scan in scans:
+        handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, scan.astype(">f4").tobytes()))
+    elapsed = time.perf_counter() - start
+    path = handler.archive.path
+    handler.close_archive()
+
+    # 同一秒内的检测写入同一个归档，不再互相覆盖
+    assert os.listdir(tmp_path / "data") == [os.path.basename(path)]
+    with ScanArchiveReader(path) as reader:
+        assert replace(reader.metadata, created=0) == replace(metadata, created=0)
+        assert len(reader) == 5
+        np.testing.assert_allclose(reader[4].samples, scans[4])
+    assert elapsed < 1
+
+
+def test_metadata_change_starts_new_archive(tmp_path):
+    handler = LightStabilityHandler(EventBus(), archive_dir=str(tmp_path))
+    handler.set_metadata(ScanMetadata(temperature=25.0))
+    payload = make_scans(1, points=16)[0].astype(">f4").tobytes()
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    first = handler.archive.path
+    # 参数不变时继续写入同一个归档
+    handler.set_metadata(ScanMetadata(temperature=25.0))
+    assert handler.archive.path == first
+    handler.set_metadata(ScanMetadata(temperature=30.0))
+    assert handler.archive is None
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    second = handler.archive.path
+    handler.close_archive()
+
+    assert second != first
+    with ScanArchiveReader(first) as a, ScanArchiveReader(second) as b:
+        assert (a.metadata.temperature, len(a)) == (25.0, 1)
+        assert (b.metadata.temperature, len(b)) == (30.0, 1)
+
+
+def test_metadata_change_closes_archive_outside_lock(tmp_path):
+    handler = LightStabilityHandler(EventBus(), archive_dir=str(tmp_path))
+    payload = make_scans(1, points=16)[0].astype(">f4").tobytes()
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    archive = handler.archive
+    close = archive.close
+    locked = []
+
+    def checked_close(*args):
+        locked.append(handler._archive_lock.locked())
+        close(*args)
+
+    archive.close = checked_close
+    handler.set_metadata(ScanMetadata(temperature=30.0))
+
+    # 关闭归档时不持有锁，handle() 不会等待写入线程退出
+    assert locked == [False]
+
+
+def test_failed_archive_is_replaced(tmp_path, monkeypatch):
+    monkeypatch.setattr(light_stablity, "ARCHIVE_RETRY_INTERVAL", 0)
+    executor = DispatchExecutor(workers=1)
+    events = EventBus(executor)
+    failures = []
+    events.subscribe(ARCHIVE_FAILED, failures.append)
+    handler = LightStabilityHandler(events, archive_dir=str(tmp_path))
+    payload = make_scans(1, points=16)[0].astype(">f4").tobytes()
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    first = handler.archive
+    assert first.flush(2)
+    first._file = FullDisk(first._file, 0)
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    assert not first.flush(2)
+
+    # 下一次检测换新的归档继续写入，失败只通知一次
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    handler.handle(RawMessage(Command.CHECK_LIGHT_STABILITY_RES, payload))
+    second = handler.archive
+    handler.close_archive()
+    assert executor.join(2)
+
+    assert second.path != first.path
+    assert failures == [first.path]
+    with ScanArchiveReader(first.path) as a, ScanArchiveReader(second.path) as b:
+        assert (len(a), len(b)) == (1, 2)
@@ -0,0 +1,80 @@
+import time
+
+from bench import replay_bench
+from bench.link_bench import LinkBench
+from comm.protocol.command import Command
+from comm.protocol.parser import MessageParser
+from comm.transport.capture import CaptureReader, CaptureWriter, Direction
+from comm.transport.replay import ReplayTransport
+
+
+def test_capture_round_trip(tmp_path):
+    path = tmp_path / "wire.cap"
+    with CaptureWriter(str(path)) as capture:
+        capture.record(Direction.TX, b"\x01\x02")
+        capture.record(Direction.RX, memoryview(b"abc"))
+        capture.record(Direction.GAP)
+
+    records = list(CaptureReader(str(path)))
+    assert [(r.direction, r.data) for r in records] == [
+        (Direction.TX, b"\x01\x02"),
+        (Direction.RX, b"abc"),
+        (Direction.GAP, b""),
+    ]
+    assert records[0].timestamp <= records[1].timestamp <= records[2].timestamp
+
+
+def test_replay_link_capture(tmp_path):
+    path = str(tmp_path / "link.cap")
+    with LinkBench.over_loopback() as bench:
+        bench.master.transport.start_capture(path)
+        bench.measure_light_stability(points=2048, count=3)
+        bench.master.transport.stop_capture()
+
+    tx = [r for r in CaptureReader(path) if r.direction == Direction.TX]
+    assert len(tx) == 3
+
+    replay = ReplayTransport(path)
+    parser = MessageParser()
+    commands = []
+
+    def on_data(data: bytes):
+        parser.feed(data)
+        commands.extend(msg.command for msg in parser.parse())
+
+    replay.on_data_received(on_data)
+    replay.open()
+    assert replay.wait(2)
+    replay.close()
+    assert commands == [Command.CHECK_LIGHT_STABILITY_RES] * 3
+    assert replay.stats.bytes == 3 * MessageParser.frame_size(2048 * 4)
+
+
+def test_replay_at_original_timing(tmp_path):
+    path = str(tmp_path / "timed.cap")
+    with CaptureWriter(path) as capture:
+        capture.record(Direction.RX, b"a")
+        time.sleep(0.1)
+        capture.record(Direction.RX, b"b")
+
+    fast = ReplayTransport(path)
+    fast.open()
+    assert fast.wait(1)
+    realtime = ReplayTransport(path, speed=1.0)
+    realtime.open()
+    assert realtime.wait(1)
+
+    assert fast.stats.elapsed < 0.05
+    assert realtime.stats.elapsed >= 0.09
+
+
+def test_replay_bench_waits_for_handlers(tmp_path):
+    path = str(tmp_path / "bench.cap")
+    replay_bench.record(path, points=2048, count=3)
+    result = replay_bench.replay(path)
+
+    # 计时包括执行器中的消息处理
+    count, busy = result["handlers"]["comm:CHECK_LIGHT_STABILITY_RES"]
+    assert count == 3 and busy > 0
+    assert result["elapsed"] >= result["feed_elapsed"]
+    assert "comm:CHECK_LIGHT_STABILITY_RES" in replay_bench.format_result(result)
@@ -0,0 +1,75 @@
+import threading
+
+from comm.transport.channel import GAP, ByteChannel, OverflowPolicy
+
+
+def drain(channel: ByteChannel) -> list[bytes]:
+    chunks = []
+    while (data := channel.get(timeout=0)) is not None:
+        chunks.append(data)
+    return chunks
+
+
+def test_budget_counts_bytes_not_chunks():
+    channel = ByteChannel(budget=10, policy=OverflowPolicy.DROP)
+    accepted = [channel.put(b"x") for _ in range(100)]
+    assert accepted.count(True) == 10
+    assert channel.stats.depth_bytes == 10
+    assert channel.stats.dropped_bytes == 90
+
+
+def test_drop_policy_inserts_single_gap_and_waits_for_low_water():
+    channel = ByteChannel(budget=8, policy=OverflowPolicy.DROP)
+    assert channel.put(b"aaaa")
+    assert channel.put(b"bbbb")
+    assert not channel.put(b"cccc")
+    assert not channel.put(b"dddd")
+    assert channel.get(timeout=0) == b"aaaa"
+    # 仍高于低水位，继续丢弃
+    assert not channel.put(b"eeee")
+    assert channel.get(timeout=0) == b"bbbb"
+    assert channel.put(b"ffff")
+
+    assert drain(channel) == [GAP, b"ffff"]
+    assert channel.stats.dropped_bytes == 12
+    assert channel.stats.gaps == 1
+
+
+def test_drop_policy_recovers_with_chunks_above_low_water():
+    channel = ByteChannel(budget=10, policy=OverflowPolicy.DROP)
+    assert channel.put(b"aaaaaa")
+    assert not channel.put(b"bbbbbb")
+    assert channel.get(timeout=0) == b"aaaaaa"
+    # 数据块超过预算的一半，通道取空后仍应恢复接收
+    assert channel.put(b"cccccc")
+    assert drain(channel) == [GAP, b"cccccc"]
+    assert channel.put(b"dddddd")
+
+
+def test_spill_policy_keeps_order():
+    channel = ByteChannel(budget=4, policy=OverflowPolicy.SPILL)
+    chunks = [bytes([i]) * 3 for i in range(10)]
+    for chunk in chunks:
+        assert channel.put(chunk)
+    assert channel.stats.spilled_bytes > 0
+    assert drain(channel) == chunks
+    assert channel.stats.spill_bytes == 0
+    channel.close()
+
+
+def test_block_policy_waits_for_consumer():
+    channel = ByteChannel(budget=4, policy=OverflowPolicy.BLOCK)
+    channel.put(b"1234")
+    done = threading.Event()
+
+    def producer():
+        channel.put(b"5678")
+        done.set()
+
+    threading.Thread(target=producer, daemon=True).start()
+    assert not done.wait(0.05)
+    assert channel.get(timeout=1) == b"1234"
+    assert done.wait(1)
+    assert channel.get(timeout=1) == b"5678"
+    assert channel.stats.blocked_time > 0
+    assert channel.stats.dropped_bytes == 0
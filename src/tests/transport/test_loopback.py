@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from bench.link_bench import LinkBench
+from comm.protocol.command import Command
+from comm.transport.loopback import LinkModel, LoopbackTransport
+
+
+def collect(model: LinkModel, payload: bytes) -> list[bytes]:
+    a, b = LoopbackTransport.pair(model)
+    chunks = []
+    done = threading.Event()
+
+    def on_data(data: bytes):
+        chunks.append(data)
+        if sum(map(len, chunks)) >= len(payload):
+            done.set()
+
+    b.on_data_received(on_data)
+    a.open()
+    b.open()
+    try:
+        a.send_data(payload).result(1)
+        assert done.wait(2)
+    finally:
+        a.close()
+        b.close()
+    return chunks
+
+
+def test_fragmentation_and_corruption_are_deterministic():
+    model = LinkModel(min_chunk=3, max_chunk=17, corrupt_rate=0.01, seed=42)
+    payload = bytes(range(256)) * 8
+    first = collect(model, payload)
+    second = collect(model, payload)
+
+    assert first == second
+    assert all(3 <= len(chunk) <= 17 for chunk in first[:-1])
+    assert b"".join(first) != payload
+    assert len(b"".join(first)) == len(payload)
+
+
+def test_bandwidth_and_latency():
+    model = LinkModel(bandwidth=100_000, latency=0.05)
+    start = time.monotonic()
+    collect(model, b"x" * 5000)
+    # 5000 字节 @ 100 kB/s = 50 ms，加 50 ms 传播延迟
+    assert time.monotonic() - start >= 0.1
+
+
+def test_comm_manager_detects_corrupted_frames():
+    clean = LinkModel(seed=1)
+    noisy = LinkModel(max_chunk=64, corrupt_rate=0.0002, seed=7)
+    with LinkBench(*LoopbackTransport.pair(clean, noisy)) as bench:
+        bench.slave.signal_points = 2000
+        for _ in range(20):
+            bench.master._send_message(Command.CHECK_LIGHT_STABILITY, b"\x01")
+        time.sleep(0.5)
+        stats = bench.master._parser.stats
+
+    assert stats.bad_frames > 0
+    assert stats.frames > 1
+
+
+def test_measure_restores_response_handler():
+    with LinkBench.over_loopback() as bench:
+        handler = bench.master._message_handlers[Command.CHECK_LIGHT_STABILITY_RES]
+        bench.measure_light_stability(points=64, count=2)
+        assert bench.master._message_handlers[Command.CHECK_LIGHT_STABILITY_RES] is handler
+        # 测量超时后同样恢复
+        del bench.slave._message_handlers[Command.CHECK_LIGHT_STABILITY]
+        with pytest.raises(TimeoutError):
+            bench.measure(
+                Command.CHECK_LIGHT_STABILITY, Command.CHECK_LIGHT_STABILITY_RES, b"\x01", 1, 0.05
+            )
+        assert bench.master._message_handlers[Command.CHECK_LIGHT_STABILITY_RES] is handler
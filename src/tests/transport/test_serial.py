@@ -1,30 +1,38 @@
-import pytest
-import time
+import threading
 
+from bench.link_bench import LinkBench
 from comm.transport.serial import SerialTransport
 
 
-def print_data(data: bytes):
-    print(data.hex(), flush=True)
+def test_send_data(virtual_serial_pair):
+    received = bytearray()
+    done = threading.Event()
 
+    def on_data(data: bytes):
+        received.extend(data)
+        if len(received) >= 5:
+            done.set()
 
-def test_send_data():
-    transport = SerialTransport("COM1")
-    transport.open()
-    transport.send_data(b"\x01\x02\x03\x04\x05")
+    sender = SerialTransport(virtual_serial_pair.port_a)
+    receiver = SerialTransport(virtual_serial_pair.port_b)
+    receiver.on_data_received(on_data)
+    sender.open()
+    receiver.open()
+    try:
+        assert sender.send_data(b"\x01\x02\x03\x04\x05").result(2) == 5
+        assert done.wait(2)
+    finally:
+        sender.close()
+        receiver.close()
 
-    # while True:
-    #     data = transport.receive_data()
-    #     print(data.hex(), flush=True)
-    #     time.sleep(0.1)
+    assert bytes(received) == b"\x01\x02\x03\x04\x05"
 
-    transport.on_data_received(print_data)
 
-    input("按回车退出程序\n")
+def test_comm_manager_against_slave(virtual_serial_pair):
+    with LinkBench.over_serial(virtual_serial_pair, baudrate=921600) as bench:
+        handshake = bench.measure_handshake(count=3)
+        stability = bench.measure_light_stability(points=500, count=2)
 
-    transport.close()
-    # time.sleep(1000000)
-
-
-if __name__ == "__main__":
-    test_send_data()
+    assert handshake["frames"] == 3
+    assert stability["payload_len"] == 500 * 4
+    assert stability["bytes_per_s"] > 0
@@ -0,0 +1,86 @@
+import threading
+from unittest.mock import patch
+
+from comm.transport.serial import SerialTransport
+
+
+class FakeSerial:
+    """按脚本返回数据的串口替身"""
+
+    in_waiting = 0
+
+    def __init__(self, chunks: list[bytes], **kwargs):
+        self.kwargs = kwargs
+        self.is_open = True
+        self.read_sizes = []
+        self._chunks = list(chunks)
+        self._drained = threading.Event()
+
+    def read(self, size: int) -> bytes:
+        self.read_sizes.append(size)
+        if self._chunks:
+            return self._chunks.pop(0)
+        self._drained.set()
+        self._drained.wait(0.01)
+        return b""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+
+
+def open_with(chunks: list[bytes], transport: SerialTransport) -> FakeSerial:
+    fake = {}
+
+    def factory(**kwargs):
+        fake["serial"] = FakeSerial(chunks, **kwargs)
+        return fake["serial"]
+
+    with patch("comm.transport.serial.serial.Serial", side_effect=factory):
+        transport.open()
+    return fake["serial"]
+
+
+def test_block_size_and_timeout_follow_baudrate():
+    transport = SerialTransport(expected_frame_size=1024)
+    transport.baudrate = 115200
+    slow_timeout = transport.read_timeout
+    transport.baudrate = 921600
+    assert transport.read_timeout < slow_timeout
+    assert transport.block_size >= 1024
+
+
+def test_single_byte_chunks_are_delivered():
+    received = []
+    done = threading.Event()
+
+    def on_data(data: bytes):
+        received.append(data)
+        if len(received) == 3:
+            done.set()
+
+    transport = SerialTransport("fake")
+    transport.on_data_received(on_data)
+    fake = open_with([b"\xa5", b"\x5a\x01", b"x" * 100], transport)
+    try:
+        assert done.wait(2)
+    finally:
+        transport.close()
+
+    assert received == [b"\xa5", b"\x5a\x01", b"x" * 100]
+    assert fake.kwargs["timeout"] == transport.read_timeout
+    assert max(fake.read_sizes) <= transport.block_size
+
+
+def test_reads_full_blocks_without_select():
+    transport = SerialTransport("fake")
+    fake = open_with([b"x" * 10], transport)
+    try:
+        assert fake._drained.wait(2)
+    finally:
+        transport.close()
+
+    # 没有可 select 的文件描述符时按块读取，不退化为逐字节读取
+    assert set(fake.read_sizes) == {transport.block_size}
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from bench.link_bench import LinkBench
+from comm.transport.tcp import TcpServerTransport, TcpTransport
+from comm.transport.transport import SendPriority
+from comm.transport.writer import CoalescingWriter
+
+
+def test_round_trip_over_localhost():
+    with LinkBench.over_tcp() as bench:
+        result = bench.measure_light_stability(points=16384, count=3)
+
+    assert result["payload_len"] == 16384 * 4
+
+
+def test_coalescing_writer_batches_bulk_and_flushes_control():
+    batches = []
+    writer = CoalescingWriter(lambda buffers: batches.append(len(buffers)), delay=0.05)
+    writer.start()
+    try:
+        futures = [writer.submit(b"x" * 100, SendPriority.BULK) for _ in range(10)]
+        for future in futures:
+            assert future.result(1) == 100
+        assert sum(batches) == 10
+        assert len(batches) < 10
+
+        batches.clear()
+        start = time.monotonic()
+        writer.submit(b"c", SendPriority.CONTROL).result(1)
+        assert time.monotonic() - start < 0.04
+    finally:
+        writer.stop()
+
+
+def test_client_reconnects_and_reports_gap():
+    server = TcpServerTransport()
+    server.open()
+    client = TcpTransport("127.0.0.1", server.port, reconnect_interval=0.01)
+    received = []
+    gaps = threading.Event()
+    server.on_data_received(lambda data: received.append(bytes(data)))
+    client.on_stream_gap(gaps.set)
+    client.open()
+    try:
+        client.send_data(b"first").result(1)
+        # 服务端主动断开当前连接，客户端应自动重连
+        server._detach()
+        assert gaps.wait(2)
+        assert client.wait_connected(2)
+        deadline = time.monotonic() + 2
+        while b"second" not in received and time.monotonic() < deadline:
+            client.send_data(b"second")
+            time.sleep(0.05)
+        assert b"first" in received and b"second" in received
+    finally:
+        client.close()
+        server.close()
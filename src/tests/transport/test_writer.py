@@ -0,0 +1,60 @@
+import threading
+import time
+
+from comm.protocol.command import Command
+from comm.transport.transport import BULK_MESSAGE_LEN, SendPriority, priority_for
+from comm.transport.writer import PacedWriter, TokenBucket
+
+
+def test_control_frames_skip_queued_bulk_frames():
+    written = []
+    gate = threading.Event()
+
+    def write(chunk):
+        gate.wait(2)
+        written.append(bytes(chunk))
+        return len(chunk)
+
+    writer = PacedWriter(write, chunk_size=4)
+    writer.start()
+    try:
+        first = writer.submit(b"AAAA", SendPriority.BULK)
+        time.sleep(0.05)  # 第一帧已开始写出
+        writer.submit(b"BBBBBBBB", SendPriority.BULK)
+        stop = writer.submit(b"STOP", SendPriority.CONTROL)
+        gate.set()
+        assert stop.result(2) == 4
+        assert first.result(2) == 4
+    finally:
+        writer.stop()
+
+    assert written[:2] == [b"AAAA", b"STOP"]
+
+
+def test_writes_are_paced_by_rate():
+    writer = PacedWriter(lambda chunk: len(chunk), rate=20000, chunk_size=1000)
+    writer.start()
+    try:
+        start = time.monotonic()
+        writer.submit(b"x" * 5000).result(2)
+        elapsed = time.monotonic() - start
+    finally:
+        writer.stop()
+    # 首块使用突发额度，其余 4000 字节按 20 kB/s 发送
+    assert elapsed >= 0.15
+
+
+def test_stopped_writer_fails_futures():
+    writer = PacedWriter(lambda chunk: len(chunk))
+    future = writer.submit(b"data")
+    assert isinstance(future.exception(), RuntimeError)
+
+
+def test_token_bucket_unlimited():
+    assert TokenBucket(None).delay(10**9) == 0.0
+
+
+def test_priority_for_command():
+    assert priority_for(Command.CHECK_STOP, BULK_MESSAGE_LEN * 2) is SendPriority.CONTROL
+    assert priority_for(Command.CHECK_LIGHT_STABILITY, 16) is SendPriority.NORMAL
+    assert priority_for(Command.CHECK_LIGHT_STABILITY_RES, BULK_MESSAGE_LEN) is SendPriority.BULK
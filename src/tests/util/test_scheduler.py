@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from comm.protocol.command import Command
+from comm.protocol.parser import MessageParser
+from comm.transport.loopback import LoopbackTransport
+from handler.manager import CommManager
+from handler.request import RequestTracker
+from util.scheduler import Scheduler, VirtualClock
+
+
+def wait_for(condition, timeout: float = 1.0) -> bool:
+    # 回环链路在线程中投递数据，需要等待真实时间
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+@pytest.fixture
+def scheduler():
+    return Scheduler(VirtualClock())
+
+
+def test_timers_fire_in_deadline_order(scheduler):
+    fired = []
+    scheduler.call_later(2.0, fired.append, "b")
+    scheduler.call_later(1.0, fired.append, "a")
+    cancelled = scheduler.call_later(1.5, fired.append, "x")
+    cancelled.cancel()
+
+    scheduler.advance(1.0)
+    assert fired == ["a"]
+    scheduler.advance(1.0)
+    assert fired == ["a", "b"]
+    assert scheduler.pending == 0
+
+
+def test_periodic_job_runs_at_fixed_rate(scheduler):
+    ticks = []
+    job = scheduler.call_every(0.5, lambda: ticks.append(scheduler.now()))
+    scheduler.advance(2.0)
+    job.cancel()
+    scheduler.advance(2.0)
+    assert ticks == [0.5, 1.0, 1.5, 2.0]
+
+
+def test_real_clock_runs_on_one_thread():
+    scheduler = Scheduler(name="test scheduler")
+    threads = set()
+    done = threading.Event()
+    for i in range(50):
+        scheduler.call_later(0.001 * i, lambda: threads.add(threading.current_thread().name))
+    scheduler.call_later(0.06, done.set)
+    assert done.wait(2)
+    scheduler.stop()
+    assert threads == {"test scheduler"}
+
+
+def test_handshake_retries_on_virtual_time(scheduler):
+    master, device = LoopbackTransport.pair()
+    parser = MessageParser()
+    requests = []
+
+    def on_device_data(data):
+        parser.feed(data)
+        requests.extend(msg.command for msg in parser.parse())
+
+    device.on_data_received(on_device_data)
+    device.open()
+    manager = CommManager(master, scheduler=scheduler)
+    manager.connect()
+    try:
+        # 3 秒超时后等待 5 秒重试，不需要真的等待
+        assert wait_for(lambda: len(requests) == 1)
+        scheduler.advance(2.9)
+        scheduler.advance(0.1 + 4.9)
+        assert not wait_for(lambda: len(requests) > 1, 0.05)
+        scheduler.advance(0.1)
+        assert wait_for(lambda: len(requests) == 2)
+        scheduler.advance(8.0)
+        assert wait_for(lambda: len(requests) == 3)
+    finally:
+        manager.disconnect()
+        device.close()
+        manager.executor.shutdown()
+    scheduler.advance(60)
+    assert requests == [Command.HANDSHAKE_REQ] * 3
+
+
+def test_request_timeout_on_virtual_time(scheduler):
+    tracker = RequestTracker(scheduler=scheduler)
+    _, slow = tracker.register(Command.HANDSHAKE_REQ, timeout=10.0)
+    _, fast = tracker.register(Command.HANDSHAKE_REQ, timeout=1.0)
+    scheduler.advance(1.0)
+    with pytest.raises(TimeoutError):
+        fast.result(0)
+    assert not slow.done()
+    scheduler.advance(9.0)
+    assert isinstance(slow.exception(0), TimeoutError)
+    assert tracker.stats.timeouts == 2
@@ -0,0 +1,212 @@
+from threading import Condition, Lock, Thread
+from typing import Callable
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MonotonicClock:
+    def now(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock:
+    """只在 Scheduler.advance() 时前进的时钟，用于测试超时和重试逻辑"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def set(self, now: float):
+        self._now = max(self._now, now)
+
+
+class TimerHandle:
+    __slots__ = ("when", "interval", "callback", "args", "cancelled", "queued", "_scheduler")
+
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        when: float,
+        interval: float | None,
+        callback: Callable,
+        args: tuple,
+    ):
+        self._scheduler = scheduler
+        self.when = when
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        # 是否仍在堆中，由调度器在锁内维护
+        self.queued = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self._scheduler._note_cancelled(self)
+
+
+class Scheduler:
+    """
+    共用的定时器调度器
+
+    所有超时、重试和周期任务保存在一个按到期时间排序的堆中，由一个线程依次执行，
+    不再为每次超时创建一个 threading.Timer 线程。取消的定时器只做标记，到期时跳过，
+    已取消的数量超过堆的一半时整体重建。回调在调度线程中执行，应尽快返回。
+
+    使用 VirtualClock 时不启动线程，由 advance() 在调用者线程中推进时间并执行到期的回调，
+    测试不必真的等待数秒。
+    """
+
+    def __init__(self, clock: MonotonicClock | VirtualClock = None, name: str = "scheduler"):
+        self.clock = clock or MonotonicClock()
+        self._name = name
+        self._cond = Condition(Lock())
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._thread: Thread = None
+        self._is_running = False
+
+    @property
+    def is_virtual(self) -> bool:
+        return isinstance(self.clock, VirtualClock)
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap) - self._cancelled
+
+    def now(self) -> float:
+        return self.clock.now()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """delay 秒后执行一次 callback(*args)，返回可取消的句柄"""
+        return self._schedule(max(delay, 0.0), None, callback, args)
+
+    def call_every(
+        self, interval: float, callback: Callable, *args, delay: float = None
+    ) -> TimerHandle:
+        """每隔 interval 秒执行一次，首次在 delay（默认 interval）秒后"""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self._schedule(interval if delay is None else delay, interval, callback, args)
+
+    def advance(self, seconds: float):
+        """推进虚拟时钟，按到期顺序执行期间到期的回调"""
+        if not self.is_virtual:
+            raise RuntimeError("advance() requires a VirtualClock")
+        target = self.clock.now() + seconds
+        while True:
+            with self._cond:
+                due = self._pop_due(target)
+                if due is None:
+                    break
+                self.clock.set(due[0])
+            self._run(due[1])
+        self.clock.set(target)
+
+    def start(self):
+        with self._cond:
+            if self._is_running or self.is_virtual:
+                return
+            self._is_running = True
+            self._thread = Thread(target=self._run_loop, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            if not self._is_running:
+                return
+            self._is_running = False
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        thread.join(timeout=2)
+
+    def _schedule(
+        self, delay: float, interval: float | None, callback: Callable, args: tuple
+    ) -> TimerHandle:
+        handle = TimerHandle(self, self.clock.now() + delay, interval, callback, args)
+        with self._cond:
+            self._push(handle)
+            # 新的定时器可能比调度线程正在等待的更早到期
+            self._cond.notify()
+        if not self._is_running:
+            self.start()
+        return handle
+
+    def _push(self, handle: TimerHandle):
+        handle.queued = True
+        heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+
+    def _pop_due(self, now: float) -> tuple[float, TimerHandle] | None:
+        """取出 now 之前到期的定时器，返回其计划执行时间和句柄"""
+        while self._heap:
+            when, _, handle = self._heap[0]
+            if handle.cancelled:
+                heapq.heappop(self._heap)
+                handle.queued = False
+                self._cancelled -= 1
+                continue
+            if when > now:
+                return None
+            heapq.heappop(self._heap)
+            handle.queued = False
+            if handle.interval is not None:
+                # 周期任务按计划时间递推，不随回调耗时漂移；落后太多时跳过错过的周期
+                handle.when = max(when + handle.interval, self.clock.now())
+                self._push(handle)
+            return when, handle
+        return None
+
+    def _note_cancelled(self, handle: TimerHandle):
+        with self._cond:
+            if not handle.queued:
+                return
+            self._cancelled += 1
+            if self._cancelled > 64 and self._cancelled > len(self._heap) // 2:
+                for entry in self._heap:
+                    if entry[2].cancelled:
+                        entry[2].queued = False
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _run(self, handle: TimerHandle):
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            logger.error(f"{self._name} callback {handle.callback!r} failed: {e}")
+
+    def _run_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._is_running:
+                        return
+                    now = self.clock.now()
+                    due = self._pop_due(now)
+                    if due is not None:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+            self._run(due[1])
+
+
+_default: Scheduler = None
+_default_lock = Lock()
+
+
+def default_scheduler() -> Scheduler:
+    """进程内共用的调度器"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Scheduler()
+        return _default